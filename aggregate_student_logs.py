@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生徒の反応ログ（Firestore の student_logs）を教材ごとに事前集計するスクリプト
+student_logs を書き出した NDJSON（1行1ドキュメント、.gz も可）を1行ずつ読み、
+(contentId, cardIndex) ごとの 👍(good) / 🤔(hmm) の数・回答した生徒数・最近のメモを
+data/analytics/<教材ID>.json に書き出す。管理画面（js/admin-core.js の fetchCardStats）は
+このファイルを取得できれば読み、student_logs 全体を問い合わせずに集計結果を表示する。
+
+- 生徒ごとのメモを含むので公開サイトには載せない（publish_assets.py は dist/ に写さず、
+  firebase.json の hosting.ignore でも除外している）。取得できない場合、管理画面は student_logs を問い合わせる
+- student_logs はユーザー×問題×カードごとに1ドキュメント（viewer.js が merge で上書き）なので、
+  集計は加算ではなく「ドキュメントごとの最新状態」から作り直す。状態は
+  .build-cache/student-logs-state.json に保存する
+- 前回処理した最新の timestamp（high-water mark）より古い行は読み飛ばし、
+  変更があった問題を含む教材のサマリーだけを書き直す
+- contentId は viewer.js と同じく問題ID（?id=）か解説ファイル名で、教材JSONから教材を特定する。
+  どの教材にも当てはまらないものは _unassigned.json にまとめる
+
+使い方:
+  python3 aggregate_student_logs.py export.ndjson          # 差分を取り込んで集計
+  python3 aggregate_student_logs.py export.ndjson.gz --full  # 状態を捨てて全件から作り直す
+  python3 benchmarks/generate_student_logs.py --docs 50000 > /tmp/logs.ndjson   # 動作確認用の合成ログ
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from generate_explanation_index import load_manifest
+
+ANALYTICS_DIR = Path("data/analytics")
+STATE_PATH = Path(".build-cache/student-logs-state.json")
+STATE_VERSION = 1
+SUMMARY_VERSION = 1
+UNASSIGNED = "_unassigned"
+DEFAULT_MEMO_LIMIT = 20
+REACTIONS = ("good", "hmm")
+
+
+def parse_timestamp(value) -> Optional[int]:
+    """Firestore の書き出しで現れる timestamp の形式をエポックミリ秒にする
+
+    {"_seconds": …, "_nanoseconds": …} / {"seconds": …} / {"$date": …} /
+    ISO 8601 文字列 / 秒またはミリ秒の数値 に対応する。
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if "$date" in value:
+            return parse_timestamp(value["$date"])
+        seconds = value.get("_seconds", value.get("seconds"))
+        if seconds is None:
+            return None
+        nanos = value.get("_nanoseconds", value.get("nanoseconds", 0)) or 0
+        return int(seconds) * 1000 + int(nanos) // 1_000_000
+    if isinstance(value, (int, float)):
+        # 1e11 未満は秒とみなす（ミリ秒なら 1973 年以前になる）
+        return int(value * 1000) if value < 1e11 else int(value)
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+    return None
+
+
+def format_timestamp(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def open_export(path: Path) -> IO[str]:
+    if str(path) == "-":
+        return sys.stdin
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_logs(stream: IO[str], stats: Dict[str, int]) -> Iterator[Dict]:
+    """NDJSON を1行ずつ読む。壊れた行・必須項目のない行は数えて読み飛ばす
+
+    Firestore のエクスポートツールによっては {"id": …, "data": {…}} の形で出力されるため、
+    data の中身も受け付ける。
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats["invalid"] += 1
+            continue
+        if isinstance(record, dict) and isinstance(record.get("data"), dict):
+            record = record["data"]
+        if not isinstance(record, dict) or "contentId" not in record or "userId" not in record:
+            stats["invalid"] += 1
+            continue
+        yield record
+
+
+class LogState:
+    """ドキュメント（ユーザー×問題×カード）ごとの最新の反応・メモと high-water mark"""
+
+    def __init__(self, path: Optional[Path] = STATE_PATH):
+        self.path = path
+        self.high_water_mark = 0
+        # "userId\tcontentId\tcardIndex" -> [reaction, memo, timestamp(ms)]
+        self.docs: Dict[str, List] = {}
+
+    def load(self) -> "LogState":
+        if self.path is None:
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self.high_water_mark = data.get("highWaterMark", 0)
+                self.docs = data.get("docs", {})
+        except (OSError, ValueError):
+            pass
+        return self
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": STATE_VERSION, "highWaterMark": self.high_water_mark, "docs": self.docs},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def apply(self, records: Iterator[Dict], stats: Dict[str, int]) -> Set[str]:
+        """high-water mark 以降の行を取り込み、変更のあった contentId を返す
+
+        同じ timestamp の行は前回の最後と重なる可能性があるため取り込み直す（結果は同じ）。
+        """
+        changed: Set[str] = set()
+        newest = self.high_water_mark
+        for record in records:
+            ts = parse_timestamp(record.get("timestamp")) or 0
+            if ts < self.high_water_mark:
+                stats["skipped"] += 1
+                continue
+            try:
+                card_index = int(record.get("cardIndex"))
+            except (TypeError, ValueError):
+                stats["invalid"] += 1
+                continue
+            content_id = str(record["contentId"])
+            key = f"{record['userId']}\t{content_id}\t{card_index}"
+            previous = self.docs.get(key)
+            if previous is not None and previous[2] > ts:
+                # 書き出し順が前後しても新しい状態を残す
+                stats["skipped"] += 1
+                continue
+            reaction = record.get("reaction")
+            value = [reaction if reaction in REACTIONS else None, record.get("memo") or "", ts]
+            if previous != value:
+                self.docs[key] = value
+                changed.add(content_id)
+            stats["applied"] += 1
+            newest = max(newest, ts)
+        self.high_water_mark = newest
+        return changed
+
+
+def build_content_lookup(manifest: List[Dict]) -> Dict[str, List[str]]:
+    """contentId（問題ID・解説ファイル名）-> 教材IDのリスト"""
+    lookup: Dict[str, List[str]] = {}
+    for entry in manifest:
+        material_id = entry.get("id")
+        path = entry.get("path")
+        if not material_id or not path or not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for subject in data.get("subjects", []):
+            for field in subject.get("fields", []):
+                for problem in field.get("problems", []):
+                    keys = [str(problem.get("id", ""))]
+                    explanation_path = problem.get("explanationPath") or ""
+                    if explanation_path:
+                        keys.append(Path(explanation_path).stem)
+                    for key in keys:
+                        if key and material_id not in lookup.setdefault(key, []):
+                            lookup[key].append(material_id)
+    return lookup
+
+
+def summarize_contents(state: LogState, content_ids: Optional[Set[str]], memo_limit: int) -> Dict[str, List]:
+    """contentId -> [[cardIndex, good, hmm, 生徒数, [[userId, memo, timestamp], …]], …]"""
+    cards: Dict[Tuple[str, int], Dict] = {}
+    for key, (reaction, memo, ts) in state.docs.items():
+        user_id, content_id, card_index = key.split("\t")
+        if content_ids is not None and content_id not in content_ids:
+            continue
+        card = cards.setdefault((content_id, int(card_index)), {"good": 0, "hmm": 0, "users": set(), "memos": []})
+        if reaction:
+            card[reaction] += 1
+        if reaction or memo.strip():
+            card["users"].add(user_id)
+        if memo.strip():
+            card["memos"].append((ts, user_id, memo))
+
+    contents: Dict[str, List] = {}
+    for (content_id, card_index), card in sorted(cards.items()):
+        memos = sorted(card["memos"], reverse=True)[:memo_limit]
+        contents.setdefault(content_id, []).append([
+            card_index, card["good"], card["hmm"], len(card["users"]),
+            [[user_id, memo, format_timestamp(ts)] for ts, user_id, memo in memos],
+        ])
+    return contents
+
+
+def write_summaries(state: LogState, lookup: Dict[str, List[str]], changed: Optional[Set[str]], memo_limit: int) -> List[Path]:
+    """変更のあった教材のサマリーを書き出す（changed が None なら全教材）"""
+    by_material: Dict[str, Set[str]] = {}
+    for key in state.docs:
+        content_id = key.split("\t")[1]
+        for material_id in lookup.get(content_id, [UNASSIGNED]):
+            by_material.setdefault(material_id, set()).add(content_id)
+
+    targets = set(by_material)
+    if changed is not None:
+        targets = {m for c in changed for m in lookup.get(c, [UNASSIGNED])}
+
+    ANALYTICS_DIR.mkdir(parents=True, exist_ok=True)
+    written = []
+    for material_id in sorted(targets):
+        summary = {
+            "version": SUMMARY_VERSION,
+            "material": material_id,
+            "highWaterMark": format_timestamp(state.high_water_mark) if state.high_water_mark else None,
+            "contents": summarize_contents(state, by_material.get(material_id, set()), memo_limit),
+        }
+        path = ANALYTICS_DIR / f"{material_id}.json"
+        path.write_text(json.dumps(summary, ensure_ascii=False, separators=(",", ":")) + "\n", encoding='utf-8')
+        written.append(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="student_logs の NDJSON を教材ごとに事前集計")
+    parser.add_argument("export", type=Path, help="student_logs を書き出した NDJSON（.gz 可、- で標準入力）")
+    parser.add_argument("--full", action="store_true", help="前回の状態を使わず全件から作り直す")
+    parser.add_argument("--memos", type=int, default=DEFAULT_MEMO_LIMIT, help=f"カードごとに残す最近のメモの数（既定: {DEFAULT_MEMO_LIMIT}）")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    state = LogState() if args.full else LogState().load()
+    stats = {"applied": 0, "skipped": 0, "invalid": 0}
+    try:
+        with open_export(args.export) as stream:
+            changed = state.apply(read_logs(stream, stats), stats)
+    except OSError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    lookup = build_content_lookup(load_manifest())
+    written = write_summaries(state, lookup, None if args.full else changed, args.memos)
+    state.save()
+
+    print(f"取り込み: {stats['applied']} 行 / 古い行のため省略: {stats['skipped']} 行 / 不正: {stats['invalid']} 行")
+    print(f"変更のあった問題: {len(changed)} / ドキュメント総数: {len(state.docs)}")
+    if state.high_water_mark:
+        print(f"high-water mark: {format_timestamp(state.high_water_mark)}")
+    for path in written:
+        print(f"  更新: {path}（{path.stat().st_size} bytes）")
+    print(f"処理時間: {time.perf_counter() - started:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
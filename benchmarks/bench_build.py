@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+データ生成スクリプト（ビルドの各段階）のベンチマーク
+benchmarks/synth_catalog.py で現在のカタログの 1倍・10倍・100倍 の合成カタログを作業ディレクトリに作り、
+各段階を別プロセスで実行して、経過時間・最大RSS・ファイルI/O（read/write の呼び出し回数とバイト数）を測る。
+結果は JSON に書き出し、--compare で以前の結果と比べて遅くなった段階を報告する。
+
+- 段階は作業ディレクトリにコピーしたスクリプトを、リポジトリのルートで実行するときと同じ形で実行する
+  （教材JSON・解説HTMLを書き換える段階があるため、元のリポジトリには触れない）
+- I/O は Linux の /proc/self/io（終了時に回収した子プロセスの分も含む）から取る。
+  /proc がない環境ではブロックI/O数（getrusage）だけを記録する
+- 終了コードも記録する（--check 系の段階は問題があると1を返すため、失敗扱いにはしない）
+
+使い方（リポジトリのルートで実行）:
+  python3 benchmarks/bench_build.py                                  # 1,10,100倍を測る
+  python3 benchmarks/bench_build.py --scales 1,10 --output /tmp/before.json
+  python3 benchmarks/bench_build.py --scales 1,10 --compare /tmp/before.json   # 25%以上遅くなれば終了コード1
+  python3 benchmarks/bench_build.py --stages check_catalog,build_search_index --keep
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from synth_catalog import CatalogShape, write_catalog
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT_DIR = REPO_ROOT / ".build-cache" / "bench"
+RESULTS_VERSION = 1
+SHEET_NAME = "sheet.csv"
+# 作業ディレクトリにコピーするもの（ルートの *.py に加えて）
+COPY_DIRS = ["scripts", "config"]
+
+# (段階名, 引数)。上から順に同じ作業ディレクトリで実行する
+STAGES: List[Tuple[str, List[str]]] = [
+    ("fix_html_fragments_check", ["fix_html_fragments.py", "--check"]),
+    ("fix_html_fragments", ["fix_html_fragments.py"]),
+    ("generate_textbook_basic_json", ["generate_textbook_basic_json.py"]),
+    ("generate_textbook_basic_json_cached", ["generate_textbook_basic_json.py"]),
+    ("update_from_sheet", ["scripts/update_textbook_basic_from_sheet.py", SHEET_NAME, "--material-col", "A"]),
+    ("generate_explanation_index", ["generate_explanation_index.py"]),
+    ("check_catalog", ["check_catalog.py", "--json"]),
+    ("build_search_index", ["build_search_index.py"]),
+    ("build_speech_text", ["build_speech_text.py"]),
+    ("build_prefetch_map", ["build_prefetch_map.py"]),
+    ("publish_assets", ["publish_assets.py", "--quiet"]),
+]
+
+# 子プロセスの終了時に /proc/self/io を書き出してから、対象のスクリプトを __main__ として実行する
+_RUNNER = """
+import atexit, os, runpy, sys
+_out, _pid = os.environ["BENCH_IO_OUT"], os.getpid()
+def _dump():
+    if os.getpid() != _pid:
+        return
+    try:
+        with open("/proc/self/io") as src, open(_out, "w") as dst:
+            dst.write(src.read())
+    except OSError:
+        pass
+atexit.register(_dump)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def prepare_workspace(root: Path) -> None:
+    """スクリプトと設定を作業ディレクトリにコピーする"""
+    for path in REPO_ROOT.glob("*.py"):
+        shutil.copy2(path, root / path.name)
+    for name in COPY_DIRS:
+        if (REPO_ROOT / name).is_dir():
+            shutil.copytree(REPO_ROOT / name, root / name,
+                            ignore=shutil.ignore_patterns("__pycache__"), dirs_exist_ok=True)
+
+
+def read_proc_io(path: Path) -> Dict[str, int]:
+    counters = {}
+    try:
+        for line in path.read_text().splitlines():
+            key, _, value = line.partition(":")
+            counters[key.strip()] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+def run_stage(workspace: Path, argv: List[str]) -> Dict:
+    """1つの段階を実行して、時間・最大RSS・I/O を返す"""
+    io_path = workspace / ".bench-io"
+    io_path.unlink(missing_ok=True)
+    env = dict(os.environ, BENCH_IO_OUT=str(io_path), PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", _RUNNER, *argv], cwd=workspace, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 でこの子プロセス（とその子）だけの資源使用量を得る。stderr は終了前に読み切る
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    io = read_proc_io(io_path)
+    result = {
+        "wall": round(wall, 4),
+        "cpu": round(usage.ru_utime + usage.ru_stime, 4),
+        "maxRssKb": usage.ru_maxrss if sys.platform != "darwin" else usage.ru_maxrss // 1024,
+        "readCalls": io.get("syscr"),
+        "writeCalls": io.get("syscw"),
+        "readBytes": io.get("rchar"),
+        "writeBytes": io.get("wchar"),
+        "blocksIn": usage.ru_inblock,
+        "blocksOut": usage.ru_oublock,
+        "exitCode": proc.returncode,
+    }
+    if proc.returncode not in (0, 1):
+        result["stderr"] = stderr.decode("utf-8", "replace")[-2000:]
+    return result
+
+
+def run_scale(scale: int, shape: CatalogShape, stages: List[Tuple[str, List[str]]], seed: int,
+              keep: bool) -> Dict:
+    workspace = Path(tempfile.mkdtemp(prefix=f"bench-build-x{scale}-"))
+    try:
+        prepare_workspace(workspace)
+        started = time.perf_counter()
+        catalog = write_catalog(workspace, shape.scaled(scale), seed, SHEET_NAME)
+        catalog["synthesizeSeconds"] = round(time.perf_counter() - started, 3)
+        print(f"\n×{scale}: 教材 {catalog['materials']} / 問題 {catalog['problems']} / 解説 {catalog['explanations']}"
+              f"（{catalog['explanationBytes'] // 1024} KB）/ シート {catalog['sheetRows']} 行  [{workspace}]")
+        print(f"  {'段階':<38}{'秒':>9}{'RSS(MB)':>9}{'read回':>10}{'write回':>10}{'read(MB)':>10}{'write(MB)':>10}{'終了':>5}")
+
+        results = []
+        for name, argv in stages:
+            result = run_stage(workspace, argv)
+            results.append({"name": name, **result})
+            mb = lambda value: f"{value / 1048576:.1f}" if value is not None else "-"  # noqa: E731
+            print(f"  {name:<38}{result['wall']:>9.3f}{result['maxRssKb'] / 1024:>9.1f}"
+                  f"{result['readCalls'] if result['readCalls'] is not None else '-':>10}"
+                  f"{result['writeCalls'] if result['writeCalls'] is not None else '-':>10}"
+                  f"{mb(result['readBytes']):>10}{mb(result['writeBytes']):>10}{result['exitCode']:>5}")
+            if "stderr" in result:
+                print(f"    エラー: {result['stderr'].strip().splitlines()[-1]}")
+        return {"scale": scale, "catalog": catalog, "stages": results}
+    finally:
+        if keep:
+            print(f"  作業ディレクトリを残しました: {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_seconds: float) -> List[str]:
+    """前回の結果と同じ倍率・段階を比べ、tolerance 倍を超えて遅く（大きく）なったものを返す"""
+    previous = {(run["scale"], stage["name"]): stage for run in baseline.get("runs", []) for stage in run["stages"]}
+    regressions = []
+    for run in current["runs"]:
+        for stage in run["stages"]:
+            before = previous.get((run["scale"], stage["name"]))
+            if before is None:
+                continue
+            checks = [("wall", "秒", max(before["wall"], min_seconds)),
+                      ("maxRssKb", "RSS(KB)", before["maxRssKb"]),
+                      ("readCalls", "read回", before.get("readCalls")),
+                      ("writeCalls", "write回", before.get("writeCalls"))]
+            for key, label, reference in checks:
+                value = stage.get(key)
+                if value is None or not reference:
+                    continue
+                ratio = value / reference
+                if ratio > tolerance and (key != "wall" or value > min_seconds):
+                    regressions.append(f"×{run['scale']} {stage['name']}: {label} {before.get(key)} -> {value}（{ratio:.2f}倍）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ビルドの各段階のベンチマーク（合成カタログ）")
+    parser.add_argument("--scales", default="1,10,100", help="現在のカタログに対する倍率（カンマ区切り）")
+    parser.add_argument("--stages", help="実行する段階（カンマ区切り、既定: すべて）。順序は固定")
+    parser.add_argument("--explanation-kb", type=int, help="解説HTML1ファイルの大きさ（KB）")
+    parser.add_argument("--cards", type=int, help="解説1ファイルあたりの .card の数")
+    parser.add_argument("--seed", type=int, default=1, help="合成カタログの乱数の種")
+    parser.add_argument("--output", type=Path, help=f"結果の JSON（既定: {DEFAULT_OUTPUT_DIR.relative_to(REPO_ROOT)}/build-日時.json）")
+    parser.add_argument("--compare", type=Path, help="比較する以前の結果の JSON")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="遅くなったとみなす倍率（既定: 1.25）")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="これより短い段階は時間を比較しない")
+    parser.add_argument("--keep", action="store_true", help="作業ディレクトリを削除しない")
+    args = parser.parse_args()
+
+    stages = STAGES
+    if args.stages:
+        wanted = set(args.stages.split(","))
+        unknown = wanted - {name for name, _ in STAGES}
+        if unknown:
+            parser.error(f"不明な段階: {', '.join(sorted(unknown))}（{', '.join(name for name, _ in STAGES)}）")
+        stages = [stage for stage in STAGES if stage[0] in wanted]
+
+    shape = CatalogShape()
+    if args.explanation_kb is not None:
+        shape.explanation_kb = args.explanation_kb
+    if args.cards is not None:
+        shape.cards = args.cards
+
+    results = {
+        "version": RESULTS_VERSION,
+        "createdAt": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "shape": shape.to_json(),
+        "seed": args.seed,
+        "runs": [run_scale(int(s), shape, stages, args.seed, args.keep) for s in args.scales.split(",")],
+    }
+
+    output = args.output or DEFAULT_OUTPUT_DIR / f"build-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n結果: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for line in regressions:
+            print(f"  遅くなりました: {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"{args.compare} と比べて {args.tolerance} 倍を超えて遅くなった段階はありません")
+
+
+if __name__ == "__main__":
+    main()
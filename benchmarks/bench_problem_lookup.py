@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+create_problem_entry の解説ファイル照合のベンチマーク
+合成した問題・解説（既定で最大1万件）に対して ExplanationLookup の構築と照合の時間を測り、
+問題数に対して線形に伸びることを確認する。比較用に従来の全件走査（二重ループ）も小さい規模で測る。
+
+使い方（リポジトリのルートで実行）:
+  python3 benchmarks/bench_problem_lookup.py
+  python3 benchmarks/bench_problem_lookup.py --sizes 1000,10000,100000 --legacy-max 5000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_textbook_basic_json import ExplanationLookup, create_problem_entry  # noqa: E402
+
+PROBLEM_TYPES = ["例題", "類題", "問", "演習問題"]
+PROBLEMS_PER_FIELD = 40
+
+
+def synthesize(n: int) -> Tuple[List[Tuple[str, str, str]], Dict[str, Dict]]:
+    """n 問の問題（folderId, 問題番号, タイトル）と、それぞれに対応する解説ファイルを合成"""
+    problems = []
+    explanations = {}
+    for i in range(n):
+        field_no, pos = divmod(i, PROBLEMS_PER_FIELD)
+        folder_id = f"{field_no // 100 + 1:02d}/{field_no % 100 + 1:02d}"
+        problem_type = PROBLEM_TYPES[pos % len(PROBLEM_TYPES)]
+        number = pos // len(PROBLEM_TYPES) + 1
+        problem_num = f"{problem_type}{number}"
+        title = f"合成タイトル{i}"
+        problems.append((folder_id, problem_num, title))
+
+        file_name = f"{pos + 1:03d}.html"
+        explanations[f"{folder_id}/{file_name}"] = {
+            "path": f"data/explanations/textbook_basic/{folder_id}/{file_name}",
+            "title": f"{problem_num}：{title}",
+        }
+    return problems, explanations
+
+
+def legacy_find(folder_id: str, problem_num: str, title: str, existing_explanations: Dict[str, Dict]) -> Optional[str]:
+    """従来の create_problem_entry と同じ全件走査（ファイル存在確認は除く）"""
+    for key, exp_info in existing_explanations.items():
+        if folder_id in key:
+            exp_title = exp_info.get("title", "").lower()
+            if problem_num.lower() in exp_title or title.lower() in exp_title:
+                return exp_info["path"]
+    return None
+
+
+def bench_indexed(problems, explanations) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    lookup = ExplanationLookup(explanations)
+    built = time.perf_counter()
+    matched = 0
+    for folder_id, problem_num, title in problems:
+        entry = create_problem_entry(folder_id, 0, 0, 0, problem_num, title, lookup)
+        if "explanationPath" in entry:
+            matched += 1
+    return built - started, time.perf_counter() - built, matched
+
+
+def bench_legacy(problems, explanations) -> Tuple[float, int]:
+    started = time.perf_counter()
+    matched = 0
+    for folder_id, problem_num, title in problems:
+        if legacy_find(folder_id, problem_num, title, explanations):
+            matched += 1
+    return time.perf_counter() - started, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説ファイル照合のベンチマーク")
+    parser.add_argument("--sizes", default="1000,2500,5000,10000", help="問題数（カンマ区切り）")
+    parser.add_argument("--legacy-max", type=int, default=2500, help="従来方式を測る最大の問題数")
+    args = parser.parse_args()
+
+    print(f"{'問題数':>8}{'索引構築(ms)':>14}{'照合(ms)':>10}{'µs/問':>9}{'一致':>8}{'従来(ms)':>11}{'µs/問':>10}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        problems, explanations = synthesize(n)
+        build_s, resolve_s, matched = bench_indexed(problems, explanations)
+        per_problem = (build_s + resolve_s) / n * 1e6
+        row = f"{n:>8}{build_s * 1e3:>14.1f}{resolve_s * 1e3:>10.1f}{per_problem:>9.2f}{matched:>8}"
+        if n <= args.legacy_max:
+            legacy_s, legacy_matched = bench_legacy(problems, explanations)
+            row += f"{legacy_s * 1e3:>11.1f}{legacy_s / n * 1e6:>10.2f}"
+            if legacy_matched != matched:
+                row += f"  (従来の一致数: {legacy_matched})"
+        else:
+            row += f"{'-':>11}{'-':>10}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+aggregate_student_logs.py の動作確認用に、student_logs の合成ログを NDJSON で出力する
+実際の教材JSONの問題IDを contentId に使い、viewer.js の saveReactionData と同じ項目
+（userId / contentId / cardIndex / reaction / memo / timestamp）を持つ行を生成する。
+--since を指定すると、その時刻以降の更新（差分の書き出し）を想定した行を出力する。
+
+使い方（リポジトリのルートで実行）:
+  python3 benchmarks/generate_student_logs.py --docs 50000 > /tmp/logs.ndjson
+  python3 benchmarks/generate_student_logs.py --docs 2000 --since 2026-10-01T00:00:00Z --seed 2 > /tmp/delta.ndjson
+  python3 aggregate_student_logs.py /tmp/logs.ndjson && python3 aggregate_student_logs.py /tmp/delta.ndjson
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregate_student_logs import build_content_lookup  # noqa: E402
+from generate_explanation_index import load_manifest  # noqa: E402
+
+MEMOS = ["ここの式変形がわかりません", "符号の向きが不安です", "図があって分かりやすかった", "なぜ2倍になるのですか", ""]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="student_logs の合成ログを NDJSON で出力")
+    parser.add_argument("--docs", type=int, default=10000, help="出力する行数")
+    parser.add_argument("--users", type=int, default=400, help="生徒数")
+    parser.add_argument("--cards", type=int, default=8, help="1問あたりのカード数の上限")
+    parser.add_argument("--since", default="2026-04-01T00:00:00Z", help="timestamp の開始時刻（ISO 8601）")
+    parser.add_argument("--days", type=int, default=30, help="timestamp を散らばらせる日数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数の種")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    content_ids = sorted(build_content_lookup(load_manifest()))
+    # 一部の問題に反応が集中する分布にする
+    weights = [1.0 / (rank + 1) for rank in range(len(content_ids))]
+    rng.shuffle(weights)
+    start = datetime.fromisoformat(args.since.replace("Z", "+00:00"))
+    span = timedelta(days=args.days).total_seconds()
+
+    out = sys.stdout
+    for contentId in rng.choices(content_ids, weights=weights, k=args.docs):
+        ts = start + timedelta(seconds=rng.random() * span)
+        record = {
+            "userId": f"user_{rng.randrange(args.users):04d}",
+            "contentId": contentId,
+            "cardIndex": rng.randrange(args.cards),
+            "reaction": rng.choice(["good", "good", "hmm", None]),
+            "memo": rng.choice(MEMOS) if rng.random() < 0.15 else "",
+            # firebase-admin の書き出しと同じ {_seconds, _nanoseconds} 形式
+            "timestamp": {"_seconds": int(ts.timestamp()), "_nanoseconds": ts.microsecond * 1000},
+        }
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生徒の学習の流れを再現する配信の負荷試験
+serve_local.py（または --url で指定したサーバー）に対して、仮想の生徒を --concurrency 人同時に動かし、
+1人あたり次の流れ（セッション）を繰り返す。
+
+  1. 一覧: index.html とその CSS・JS、data/manifest.json、教材JSON
+     （prerender_index.py で一覧を埋め込んだ index.html なら index.html とその CSS・JS だけ）
+  2. 解説へ直接リンク: viewer.html?path=... とその CSS・JS、data/explanation-index.json、
+     教材JSON、解説HTML、data/prefetch-map.json（viewer.js と同じ順）
+  3. 次の問題: data/prefetch-map.json の最初の先読み先を viewer.html で開く
+
+- 生徒ごとにブラウザと同じようなキャッシュを持つ。Cache-Control の max-age の間はリクエストせず、
+  no-cache（HTML・sw.js）や期限切れは If-None-Match で再検証する（304 が返る）。--cache none で毎回取得する
+- 通信は asyncio のストリームで HTTP/1.1 を直接話す（生徒ごとに1本の keep-alive 接続）
+- 種類（page・asset・data・material・explanation）ごとに p50/p95/p99 の応答時間、
+  ステータス、転送バイト数（ヘッダー込み）を集計し、JSON にも書き出す
+
+使い方（リポジトリのルートで実行）:
+  python3 benchmarks/load_test.py                                # serve_local.py を起動して 20人×200セッション
+  python3 benchmarks/load_test.py --source --concurrency 50      # 変換前のファイル（リポジトリのルート）を配信して測る
+  python3 benchmarks/load_test.py --url http://127.0.0.1:5000/ --encoding identity --cache none
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT_DIR = REPO_ROOT / ".build-cache" / "bench"
+RESULTS_VERSION = 1
+KINDS = ["page", "asset", "data", "material", "explanation"]
+PERCENTILES = [50, 95, 99]
+
+# HTML から同じサイトの CSS・JS を拾う
+_ASSET_RE = re.compile(r'<(?:script|link)\b[^>]*?\b(?:src|href)="(?!https?:|//|data:)([^"#?]+\.(?:js|css))"', re.IGNORECASE)
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+def load_json(path: Path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def page_assets(page: str) -> List[str]:
+    """ページが読み込む CSS・JS（HTML に書かれた順）"""
+    html = (REPO_ROOT / page).read_text(encoding='utf-8')
+    return list(dict.fromkeys(_ASSET_RE.findall(html)))
+
+
+class SessionPlan:
+    """リポジトリの manifest・逆引きインデックス・先読みマップから、セッションで開く解説を選ぶ"""
+
+    def __init__(self):
+        index = load_json(REPO_ROOT / "data/explanation-index.json")
+        self.material_paths = [material[1] for material in index["materials"]]
+        # 解説パス -> 教材JSONのパス（ファイルがあるものだけ）
+        self.explanations: Dict[str, str] = {
+            path: self.material_paths[loc[0]] for path, loc in index["paths"].items()
+            if (REPO_ROOT / path).is_file()
+        }
+        try:
+            self.next_map: Dict[str, List[str]] = load_json(REPO_ROOT / "data/prefetch-map.json").get("next", {})
+        except OSError:
+            self.next_map = {}
+        self.index_assets = page_assets("index.html")
+        # prerender_index.py で一覧と manifest が埋め込まれていれば、最初の一覧にデータの取得はいらない
+        self.index_prerendered = 'id="prerendered-manifest"' in (REPO_ROOT / "index.html").read_text(encoding='utf-8')
+        self.viewer_assets = page_assets("viewer.html")
+        if not self.explanations:
+            raise SystemExit("data/explanation-index.json に解説がありません。python3 generate_explanation_index.py を実行してください。")
+        # 先読み先のある解説を優先して選ぶ（次の問題まで進めるため）
+        self.entry_points = sorted(p for p in self.explanations if p in self.next_map) or sorted(self.explanations)
+
+    def index_steps(self, rng: random.Random) -> List[Tuple[str, str]]:
+        steps = [("page", "index.html")] + [("asset", a) for a in self.index_assets]
+        if self.index_prerendered:
+            return steps
+        steps.append(("data", "data/manifest.json"))
+        steps.append(("material", rng.choice(self.material_paths)))
+        return steps
+
+    def viewer_steps(self, path: str) -> List[Tuple[str, str]]:
+        steps = [("page", "viewer.html?path=" + quote(path, safe=""))] + [("asset", a) for a in self.viewer_assets]
+        steps.append(("data", "data/explanation-index.json"))
+        steps.append(("material", self.explanations.get(path, self.material_paths[0])))
+        steps.append(("explanation", path))
+        steps.append(("data", "data/prefetch-map.json"))
+        return steps
+
+    def session(self, rng: random.Random) -> List[Tuple[str, str]]:
+        path = rng.choice(self.entry_points)
+        steps = self.index_steps(rng) + self.viewer_steps(path)
+        following = self.next_map.get(path)
+        if following:
+            steps += self.viewer_steps(following[0])
+        return steps
+
+
+class ClientCache:
+    """1人の生徒のブラウザキャッシュ（URL -> ETag と有効期限）"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.entries: Dict[str, Tuple[Optional[str], float]] = {}
+
+    def lookup(self, url: str) -> Tuple[bool, Optional[str]]:
+        """(期限内でリクエスト不要か, 再検証に使う ETag)"""
+        if not self.enabled or url not in self.entries:
+            return False, None
+        etag, fresh_until = self.entries[url]
+        return time.monotonic() < fresh_until, etag
+
+    def store(self, url: str, headers: Dict[str, str]) -> None:
+        if not self.enabled:
+            return
+        cache_control = headers.get("cache-control", "")
+        if "no-store" in cache_control:
+            return
+        match = _MAX_AGE_RE.search(cache_control)
+        max_age = 0 if "no-cache" in cache_control or not match else int(match.group(1))
+        self.entries[url] = (headers.get("etag"), time.monotonic() + max_age)
+
+
+class Connection:
+    """keep-alive の HTTP/1.1 接続（切れていれば次のリクエストでつなぎ直す）"""
+
+    def __init__(self, host: str, port: int, encoding: str):
+        self.host = host
+        self.port = port
+        self.encoding = encoding
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, target: str, etag: Optional[str]) -> Tuple[int, Dict[str, str], int]:
+        """GET して (ステータス, ヘッダー, 受信バイト数) を返す。本文は読み捨てる"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET /{target} HTTP/1.1", f"Host: {self.host}:{self.port}", "User-Agent: load_test"]
+        if self.encoding:
+            lines.append(f"Accept-Encoding: {self.encoding}")
+        if etag:
+            lines.append(f"If-None-Match: {etag}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("接続が閉じられました")
+        received = len(status_line)
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            received += len(line)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await self.reader.readline()
+                size = int(size_line.split(b";")[0], 16)
+                received += len(size_line) + size + 2
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            await self.reader.readexactly(length)
+            received += length
+        elif status != 304:
+            received += len(await self.reader.read())
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, headers, received
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {kind: [] for kind in KINDS}
+        self.statuses: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        self.bytes: Dict[str, int] = {kind: 0 for kind in KINDS}
+        self.cache_hits: Dict[str, int] = {kind: 0 for kind in KINDS}
+        self.errors: Dict[str, int] = {kind: 0 for kind in KINDS}
+        self.sessions = 0
+
+    def record(self, kind: str, seconds: float, status: int, received: int) -> None:
+        self.latencies[kind].append(seconds)
+        self.statuses[kind][str(status)] = self.statuses[kind].get(str(status), 0) + 1
+        self.bytes[kind] += received
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近順位法のパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def student(queue: "asyncio.Queue[int]", plan: SessionPlan, results: Results, args, host: str, port: int) -> None:
+    """1人の生徒: キューからセッション番号を取り、終わるまで順に実行する"""
+    conn = Connection(host, port, args.encoding)
+    cache = ClientCache(args.cache == "browser")
+    try:
+        while True:
+            try:
+                number = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            rng = random.Random(args.seed * 1_000_003 + number)
+            for kind, target in plan.session(rng):
+                fresh, etag = cache.lookup(target)
+                if fresh:
+                    results.cache_hits[kind] += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    status, headers, received = await conn.request(target, etag)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    results.errors[kind] += 1
+                    await conn.close()
+                    continue
+                results.record(kind, time.perf_counter() - started, status, received)
+                if status in (200, 304):
+                    cache.store(target, headers)
+                if args.think_ms:
+                    await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+            results.sessions += 1
+    finally:
+        await conn.close()
+
+
+async def run(args, host: str, port: int, plan: SessionPlan) -> Tuple[Results, float]:
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for number in range(args.sessions):
+        queue.put_nowait(number)
+    results = Results()
+    started = time.perf_counter()
+    await asyncio.gather(*(student(queue, plan, results, args, host, port) for _ in range(args.concurrency)))
+    return results, time.perf_counter() - started
+
+
+def start_server(source: bool) -> Tuple[subprocess.Popen, str]:
+    """serve_local.py を空いているポートで起動し、最初の行の URL を返す"""
+    command = [sys.executable, "serve_local.py", "--port", "0"] + (["--source"] if source else [])
+    proc = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    # 起動に失敗した場合は何も出力せずに終了するので、空の行が返る
+    line = proc.stdout.readline().strip()
+    if not line.startswith("http"):
+        proc.kill()
+        raise SystemExit("serve_local.py を起動できませんでした")
+    return proc, line
+
+
+def summarize(results: Results, elapsed: float) -> Dict:
+    kinds = {}
+    all_latencies: List[float] = []
+    for kind in KINDS:
+        values = sorted(results.latencies[kind])
+        all_latencies += values
+        kinds[kind] = {
+            "requests": len(values),
+            "statuses": dict(sorted(results.statuses[kind].items())),
+            "cacheHits": results.cache_hits[kind],
+            "errors": results.errors[kind],
+            "bytes": results.bytes[kind],
+            **{f"p{p}Ms": round(percentile(values, p) * 1000, 3) for p in PERCENTILES},
+        }
+    all_latencies.sort()
+    requests = len(all_latencies)
+    total_bytes = sum(results.bytes.values())
+    return {
+        "sessions": results.sessions,
+        "seconds": round(elapsed, 3),
+        "requests": requests,
+        "requestsPerSecond": round(requests / elapsed, 1) if elapsed else 0.0,
+        "bytes": total_bytes,
+        "errors": sum(results.errors.values()),
+        **{f"p{p}Ms": round(percentile(all_latencies, p) * 1000, 3) for p in PERCENTILES},
+        "kinds": kinds,
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    print(f"{'種類':<12}{'件数':>8}{'200':>7}{'304':>7}{'省略':>7}{'失敗':>6}"
+          f"{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'転送(KB)':>11}")
+    for kind, row in summary["kinds"].items():
+        statuses = row["statuses"]
+        print(f"{kind:<12}{row['requests']:>8}{statuses.get('200', 0):>7}{statuses.get('304', 0):>7}"
+              f"{row['cacheHits']:>7}{row['errors']:>6}{row['p50Ms']:>10.2f}{row['p95Ms']:>10.2f}{row['p99Ms']:>10.2f}"
+              f"{row['bytes'] / 1024:>11.1f}")
+    print(f"{'合計':<12}{summary['requests']:>8}{'':>27}"
+          f"{summary['p50Ms']:>10.2f}{summary['p95Ms']:>10.2f}{summary['p99Ms']:>10.2f}{summary['bytes'] / 1024:>11.1f}")
+    print(f"\nセッション: {summary['sessions']} / {summary['seconds']:.2f}秒 / "
+          f"{summary['requestsPerSecond']} req/s / {summary['bytes'] / summary['seconds'] / 1024 / 1024:.2f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生徒の学習の流れを再現する配信の負荷試験")
+    parser.add_argument("--url", help="試験するサーバー（省略時は serve_local.py を起動）")
+    parser.add_argument("--source", action="store_true", help="起動する serve_local.py に --source を付ける（既定は dist/ を配信）")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時に動かす生徒の数")
+    parser.add_argument("--sessions", type=int, default=200, help="セッションの総数")
+    parser.add_argument("--encoding", default="br, gzip", help="Accept-Encoding（identity で圧縮なし）")
+    parser.add_argument("--cache", choices=["browser", "none"], default="browser",
+                        help="生徒ごとのキャッシュ（none で毎回取得）")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="リクエストの間の平均待ち時間（ミリ秒）")
+    parser.add_argument("--seed", type=int, default=1, help="解説の選び方の乱数の種")
+    parser.add_argument("--output", type=Path, help=f"結果の JSON（既定: {DEFAULT_OUTPUT_DIR.relative_to(REPO_ROOT)}/load-日時.json）")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.sessions < 1:
+        parser.error("--concurrency と --sessions は1以上にしてください")
+
+    plan = SessionPlan()
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = start_server(args.source)
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    print(f"対象: {url}  生徒: {args.concurrency}人  セッション: {args.sessions}  "
+          f"Accept-Encoding: {args.encoding or '(なし)'}  キャッシュ: {args.cache}\n")
+    try:
+        results, elapsed = asyncio.run(run(args, host, port, plan))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    summary = summarize(results, elapsed)
+    print_summary(summary)
+
+    output = args.output or DEFAULT_OUTPUT_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": RESULTS_VERSION,
+            "createdAt": datetime.now().isoformat(timespec="seconds"),
+            "url": url,
+            "options": {"concurrency": args.concurrency, "sessions": args.sessions, "encoding": args.encoding,
+                        "cache": args.cache, "thinkMs": args.think_ms, "seed": args.seed},
+            **summary,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n結果: {output}")
+    if summary["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ビルド用スクリプトのベンチマークのための合成カタログを生成する
+教材 × 科目 × 分野 × 問題 の教材JSONと data/manifest.json、.card と TeX を含む解説HTML、
+スプレッドシートの書き出し（CSV）を、指定したディレクトリにリポジトリと同じ配置で書き出す。
+
+- 既定の形（--scale 1）は現在のカタログと同程度（教材8・問題約1500・解説約40・シート約200行）
+- --scale は分野数・シートの行数を倍にする（教材数と1分野あたりの問題数は変えない）
+- 最初の教材は textbook_basic で、generate_textbook_basic_json.py と
+  scripts/update_textbook_basic_from_sheet.py がそのまま処理できる形にする
+- 解説の一部は完全なHTML文書として書き、fix_html_fragments.py の変換対象にする
+- 同じ --seed なら同じ内容を生成する
+
+使い方（リポジトリのルートで実行）:
+  python3 benchmarks/synth_catalog.py /tmp/catalog
+  python3 benchmarks/synth_catalog.py /tmp/catalog --scale 10 --explanation-kb 48
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+PROBLEM_TYPES = ["問", "例題", "類題", "演習問題"]
+TOPICS = ["等加速度運動", "運動方程式", "力学的エネルギー", "運動量保存", "単振動", "熱量保存",
+          "気体の状態変化", "正弦波", "定在波", "ドップラー効果", "コンデンサー", "電磁誘導"]
+INLINE_TEX = [r"$v = v_0 + at$", r"$x = v_0 t + \frac{1}{2}at^2$", r"$F = ma$", r"$\Delta U = Q - W$",
+              r"$T = 2\pi\sqrt{\frac{m}{k}}$", r"$\lambda = \frac{v}{f}$", r"$E = \frac{1}{2}mv^2$"]
+DISPLAY_TEX = [r"$$v^2 - v_0^2 = 2ax$$", r"$$\frac{1}{2}mv^2 + mgh = \text{一定}$$",
+               r"$$f' = \frac{V}{V - v_s} f$$", r"$$Q = CV, \quad U = \frac{1}{2}CV^2$$"]
+SHEET_HEADER_WIDTH = 18  # A〜R列
+
+
+class CatalogShape:
+    """合成カタログの形（--scale 1 のときの大きさ）"""
+
+    def __init__(self, materials: int = 8, subjects: int = 2, fields: int = 4, problems: int = 24,
+                 explanation_ratio: float = 0.03, explanation_kb: int = 24, cards: int = 6,
+                 full_document_ratio: float = 0.4, youtube_ratio: float = 0.5, sheet_rows: int = 200):
+        self.materials = materials
+        self.subjects = subjects
+        self.fields = fields
+        self.problems = problems
+        self.explanation_ratio = explanation_ratio
+        self.explanation_kb = explanation_kb
+        self.cards = cards
+        self.full_document_ratio = full_document_ratio
+        self.youtube_ratio = youtube_ratio
+        self.sheet_rows = sheet_rows
+
+    def scaled(self, scale: int) -> "CatalogShape":
+        shape = CatalogShape(**self.to_json())
+        shape.fields = self.fields * scale
+        shape.sheet_rows = self.sheet_rows * scale
+        return shape
+
+    def to_json(self) -> Dict:
+        return dict(vars(self))
+
+
+def material_id_of(m: int) -> str:
+    return "textbook_basic" if m == 0 else f"synth_{m:02d}"
+
+
+def folder_id_of(field_index: int) -> str:
+    """分野番号 -> "編/章"（章番号は scripts/update_textbook_basic_from_sheet.py の照合に使われる）"""
+    part, chapter = divmod(field_index, 50)
+    return f"{part + 1:02d}/{chapter + 1:02d}"
+
+
+def problem_number_of(position: int) -> str:
+    """分野内の位置（0始まり）-> 問題番号（問1, 例題1, 類題1, 演習問題1, 問2, …）"""
+    problem_type = PROBLEM_TYPES[position % len(PROBLEM_TYPES)]
+    return f"{problem_type}{position // len(PROBLEM_TYPES) + 1}"
+
+
+def video_url(rng: random.Random) -> str:
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    return "https://youtu.be/" + "".join(rng.choice(alphabet) for _ in range(11))
+
+
+def explanation_html(title: str, shape: CatalogShape, rng: random.Random, full_document: bool) -> str:
+    """.card ごとに見出し・TeX を含む段落・補足を持つ解説HTMLを、目標の大きさになるまで作る"""
+    target = shape.explanation_kb * 1024
+    cards: List[List[str]] = [[] for _ in range(max(1, shape.cards))]
+    size = 0
+    i = 0
+    while size < target:
+        card = cards[i % len(cards)]
+        if not card:
+            card.append(f"  <h3>{rng.choice(TOPICS)}の考え方（{i // len(cards) + 1}）</h3>")
+        if i % 5 == 4:
+            block = f'  <div class="box-note">\n    <p>{rng.choice(TOPICS)}では {rng.choice(INLINE_TEX)} を使う。</p>\n  </div>'
+        elif i % 3 == 2:
+            block = f"  <p>\n    式にまとめると\n    {rng.choice(DISPLAY_TEX)}\n    となる。\n  </p>"
+        else:
+            block = (f"  <p>\n    {rng.choice(TOPICS)}の関係 {rng.choice(INLINE_TEX)} と "
+                     f"{rng.choice(INLINE_TEX)} から，<span class=\"highlight\">{rng.choice(TOPICS)}</span>を求める。\n  </p>")
+        card.append(block)
+        size += len(block.encode("utf-8"))
+        i += 1
+
+    body = f'<h2 class="prob-title-sub">{title}</h2>\n\n' + "\n\n".join(
+        '<div class="card">\n' + "\n".join(card) + "\n</div>" for card in cards) + "\n"
+    if not full_document:
+        return body
+    return ("<!DOCTYPE html>\n<html lang=\"ja\">\n<head>\n  <meta charset=\"UTF-8\">\n"
+            f"  <title>{title}</title>\n  <link rel=\"stylesheet\" href=\"../../../../css/viewer.css\">\n"
+            "</head>\n<body>\n  <div class=\"viewer-container\">\n    <div class=\"explanation-area\">\n"
+            f"{body}    </div>\n  </div>\n</body>\n</html>\n")
+
+
+def write_catalog(root: Path, shape: CatalogShape, seed: int = 1, sheet_name: str = "sheet.csv") -> Dict:
+    """root 以下に合成カタログを書き出し、生成した量を返す"""
+    rng = random.Random(seed)
+    materials_dir = root / "data" / "materials"
+    materials_dir.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    sheet_candidates = []
+    stats = {"materials": shape.materials, "problems": 0, "explanations": 0, "explanationBytes": 0,
+             "fullDocuments": 0, "sheetRows": 0}
+
+    for m in range(shape.materials):
+        material_id = material_id_of(m)
+        subjects = []
+        for s in range(shape.subjects):
+            fields = []
+            for f in range(shape.fields):
+                field_index = s * shape.fields + f
+                folder_id = folder_id_of(field_index)
+                problems = []
+                for p in range(shape.problems):
+                    number = problem_number_of(p)
+                    title = f"{number}：{rng.choice(TOPICS)}" if rng.random() < 0.7 else number
+                    problem = {"id": str(p + 1), "title": title}
+                    if rng.random() < shape.youtube_ratio:
+                        problem["youtubeUrl"] = video_url(rng)
+                    if rng.random() < shape.explanation_ratio:
+                        rel = f"data/explanations/{material_id}/{folder_id}/{p + 1:02d}.html"
+                        full_document = rng.random() < shape.full_document_ratio
+                        html = explanation_html(title, shape, rng, full_document)
+                        path = root / rel
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        path.write_text(html, encoding="utf-8")
+                        problem["explanationPath"] = rel
+                        stats["explanations"] += 1
+                        stats["explanationBytes"] += len(html.encode("utf-8"))
+                        stats["fullDocuments"] += int(full_document)
+                    problems.append(problem)
+                    sheet_candidates.append((material_id, int(folder_id.split("/")[1]), number,
+                                             problem.get("youtubeUrl")))
+                stats["problems"] += len(problems)
+                fields.append({"fieldName": f"第{folder_id[:2]}編 / 第{folder_id[3:]}章 {rng.choice(TOPICS)}",
+                               "folderId": folder_id, "problems": problems})
+            subjects.append({"subjectName": f"科目{s + 1}", "folderName": "", "fields": fields})
+
+        path = f"data/materials/{material_id}.json"
+        data = {"materialName": "物理基礎" if m == 0 else f"合成教材{m}", "subjects": subjects}
+        with open(root / path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        manifest.append({"id": material_id, "name": data["materialName"], "path": path, "type": "standard"})
+
+    with open(root / "data" / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    stats["sheetRows"] = write_sheet(root / sheet_name, sheet_candidates, shape.sheet_rows, rng)
+    return stats
+
+
+def write_sheet(path: Path, candidates: List, rows: int, rng: random.Random) -> int:
+    """A列に教材ID・I列に章・L列に問題番号・R列に URL を持つ CSV を書き出す
+
+    一致する行（URL が同じもの・新しいもの・既存と異なるもの）と、どの問題にも当たらない行を混ぜる。
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        header = [""] * SHEET_HEADER_WIDTH
+        header[0], header[8], header[11], header[17] = "教材", "章", "問題番号", "URL"
+        writer.writerow(header)
+        for _ in range(rows):
+            row = [""] * SHEET_HEADER_WIDTH
+            material_id, chapter, number, url = rng.choice(candidates)
+            roll = rng.random()
+            if roll < 0.1:
+                number = f"問{900 + rng.randrange(100)}"
+            elif roll < 0.6 or not url:
+                url = video_url(rng)
+            row[0], row[8], row[11], row[17] = material_id, str(chapter), number, url or ""
+            writer.writerow(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成カタログを生成")
+    parser.add_argument("out", type=Path, help="出力先ディレクトリ（data/ と sheet.csv を作る）")
+    parser.add_argument("--scale", type=int, default=1, help="現在のカタログに対する倍率（分野数・シート行数）")
+    parser.add_argument("--explanation-kb", type=int, help="解説HTML1ファイルの大きさ（KB）")
+    parser.add_argument("--cards", type=int, help="解説1ファイルあたりの .card の数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数の種")
+    args = parser.parse_args()
+
+    shape = CatalogShape()
+    if args.explanation_kb is not None:
+        shape.explanation_kb = args.explanation_kb
+    if args.cards is not None:
+        shape.cards = args.cards
+    stats = write_catalog(args.out, shape.scaled(args.scale), args.seed)
+    print(f"{args.out}: 教材 {stats['materials']} / 問題 {stats['problems']} / 解説 {stats['explanations']}"
+          f"（{stats['explanationBytes'] // 1024} KB、完全なHTML文書 {stats['fullDocuments']}）/ シート {stats['sheetRows']} 行")
+
+
+if __name__ == "__main__":
+    main()
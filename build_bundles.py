@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+オフライン用の解説バンドルを生成するスクリプト
+教材ごと（入試系の教材は build_materials.py の分割と同じく大学・年度ごと）に、
+公開されている解説HTMLをすべて1つのファイル data/bundles/<教材ID>[/<科目>].pack にまとめ、
+解説パス -> バイト位置の索引を data/bundles/index.json に書き出す。
+sw.js は「教材をまとめて保存」の依頼を受けると、索引とバンドルを1回ずつ取得し、
+解説ごとに切り出して DATA_CACHE に入れる（電波のない場所でも、開いたことのない解説を読める）。
+
+バンドルの形式:
+  - 解説は publish_assets.py が dist/ に書き出す中身（実際に配信するもの）を入れる
+  - 解説ファイルを1つずつ gzip（mtime 0・最大圧縮）で圧縮し、索引の順に連結したもの
+    （連結した gzip はそのまま1つの gzip としても展開できる）
+  - 索引の entries は 解説パス -> [開始バイト, バイト数, 配信する中身のハッシュ]。
+    切り出した範囲だけを DecompressionStream("gzip") で展開すれば配信する解説と1バイトも違わない
+  - ハッシュは generate_asset_manifest.py と同じ（配信する中身の SHA-256 の先頭16桁）。sw.js は展開後に照合する
+  - バンドルのハッシュが変わらなければファイルは書き換えない
+
+非公開（isPublic: false）の問題と、解説ファイルがない問題は含めない（build_prefetch_map.py と同じ）。
+
+使い方:
+  python3 build_bundles.py           # バンドルと索引を生成（内容が変わったものだけ書き込む）
+  python3 build_bundles.py --verify  # 全解説をバンドルから展開し、配信する中身と一致するか確認（不一致なら終了コード1）
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_materials import SHARD_POLICY
+from build_prefetch_map import is_prefetchable
+from generate_explanation_index import load_manifest, read_material
+from material_store import write_bytes_if_changed, write_text_if_changed
+from publish_assets import Publisher
+
+BUNDLES_ROOT = Path("data/bundles")
+BUNDLE_INDEX_PATH = BUNDLES_ROOT / "index.json"
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = ".pack"
+
+
+def plan_bundles(manifest: List[Dict]) -> Dict[str, List[str]]:
+    """バンドル名 -> 含める解説パス（教材JSONの並び順、同じ解説は manifest 順で最初のバンドルだけ）"""
+    bundles: Dict[str, List[str]] = {}
+    seen = set()
+    for entry in manifest:
+        material_id = entry.get("id", "")
+        material_path = entry.get("path", "")
+        if not material_id or not material_path:
+            continue
+        try:
+            _, data = read_material(Path(material_path))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {material_path}: {e}")
+            continue
+        by_subject = SHARD_POLICY.get(entry.get("type", "")) == "subject"
+        for subject in data.get("subjects", []):
+            name = material_id
+            if by_subject and subject.get("folderName"):
+                name = f"{material_id}/{subject['folderName']}"
+            for field in subject.get("fields", []):
+                for problem in field.get("problems", []):
+                    if not is_prefetchable(problem):
+                        continue
+                    path = problem["explanationPath"]
+                    if path in seen:
+                        continue
+                    seen.add(path)
+                    bundles.setdefault(name, []).append(path)
+    return bundles
+
+
+def pack(paths: List[str], publisher: Publisher) -> Tuple[bytes, Dict[str, List]]:
+    """配信する解説を1つずつ gzip にして連結し、(バンドル, 解説パス -> [開始, バイト数, ハッシュ]) を返す"""
+    chunks: List[bytes] = []
+    entries: Dict[str, List] = {}
+    offset = 0
+    for path in paths:
+        source = publisher.render(Path(path))
+        member = gzip.compress(source, compresslevel=9, mtime=0)
+        entries[path] = [offset, len(member), hashlib.sha256(source).hexdigest()[:16]]
+        chunks.append(member)
+        offset += len(member)
+    return b"".join(chunks), entries
+
+
+def bundle_file(name: str) -> Path:
+    return BUNDLES_ROOT / f"{name}{BUNDLE_SUFFIX}"
+
+
+def build_bundles(manifest: List[Dict], publisher: Publisher) -> Tuple[Dict, Dict[str, bytes]]:
+    """(索引, バンドル名 -> バンドルの中身) を作る"""
+    index: Dict[str, Dict] = {}
+    payloads: Dict[str, bytes] = {}
+    digest = hashlib.sha256()
+    for name, paths in plan_bundles(manifest).items():
+        payload, entries = pack(paths, publisher)
+        bundle_hash = hashlib.sha256(payload).hexdigest()[:16]
+        digest.update(f"{name}:{bundle_hash}\n".encode('utf-8'))
+        index[name] = {
+            "file": bundle_file(name).as_posix(),
+            "hash": bundle_hash,
+            "size": len(payload),
+            "entries": entries,
+        }
+        payloads[name] = payload
+    return {
+        "version": BUNDLE_VERSION,
+        "hash": digest.hexdigest()[:16],
+        "bundles": index,
+    }, payloads
+
+
+def serialize_index(index: Dict) -> str:
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def load_index(path: Path = BUNDLE_INDEX_PATH) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_stale_bundles(index: Dict) -> List[Path]:
+    """索引に載っていない .pack（教材・大学がなくなったもの）を削除する"""
+    keep = {Path(bundle["file"]) for bundle in index["bundles"].values()}
+    removed = []
+    if BUNDLES_ROOT.exists():
+        for path in sorted(BUNDLES_ROOT.rglob(f"*{BUNDLE_SUFFIX}")):
+            if path not in keep:
+                path.unlink()
+                removed.append(path)
+    return removed
+
+
+def verify_bundle(name: str, bundle: Dict, publisher: Publisher) -> List[str]:
+    """バンドルを読み、全解説を切り出して展開し、配信する中身と1バイトずつ比べる"""
+    errors = []
+    path = Path(bundle["file"])
+    try:
+        payload = path.read_bytes()
+    except OSError:
+        return [f"{name}: {path} がありません"]
+    if len(payload) != bundle["size"] or hashlib.sha256(payload).hexdigest()[:16] != bundle["hash"]:
+        errors.append(f"{name}: {path} のサイズ・ハッシュが索引と一致しません")
+
+    # 各解説の範囲が隙間も重なりもなくバンドル全体を覆っているか
+    expected_offset = 0
+    for explanation, (offset, length, source_hash) in sorted(bundle["entries"].items(), key=lambda item: item[1][0]):
+        if offset != expected_offset:
+            errors.append(f"{name}: {explanation} の開始位置 {offset} が前の解説の終わり {expected_offset} と一致しません")
+        expected_offset = offset + length
+        try:
+            unpacked = gzip.decompress(payload[offset:offset + length])
+        except (OSError, EOFError) as e:
+            errors.append(f"{name}: {explanation} を展開できません（{e}）")
+            continue
+        if hashlib.sha256(unpacked).hexdigest()[:16] != source_hash:
+            errors.append(f"{name}: {explanation} を展開した内容が索引のハッシュと一致しません")
+        try:
+            source = publisher.render(Path(explanation))
+        except OSError:
+            errors.append(f"{name}: {explanation} の元ファイルがありません")
+            continue
+        if unpacked != source:
+            errors.append(f"{name}: {explanation} が配信する中身と一致しません")
+    if expected_offset != len(payload):
+        errors.append(f"{name}: 索引の範囲（{expected_offset} バイト）がバンドルの大きさ {len(payload)} と一致しません")
+    return errors
+
+
+def verify(manifest: List[Dict], publisher: Publisher, index_path: Path = BUNDLE_INDEX_PATH) -> int:
+    """索引が教材JSONと一致し、全解説がバンドルから元どおりに取り出せるか確認し、終了コードを返す"""
+    index = load_index(index_path)
+    if index is None:
+        print(f"NG: {index_path} がありません。python3 build_bundles.py を実行してください。")
+        return 1
+
+    errors = []
+    expected, _ = build_bundles(manifest, publisher)
+    if index != expected:
+        errors.append(f"{index_path} が教材JSON・解説ファイルより古くなっています。python3 build_bundles.py を実行してください。")
+    explanations = 0
+    for name, bundle in index.get("bundles", {}).items():
+        errors.extend(verify_bundle(name, bundle, publisher))
+        explanations += len(bundle["entries"])
+
+    for error in errors:
+        print(f"  {error}")
+    if errors:
+        print(f"NG: {len(errors)} 件の問題があります")
+        return 1
+    print(f"OK: {len(index['bundles'])} バンドル・{explanations} 解説をすべて配信する中身どおりに展開できました（hash: {index['hash']}）")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="オフライン用の解説バンドルを生成")
+    parser.add_argument("--verify", action="store_true", help="全解説をバンドルから展開して配信する中身と比べるのみ行う")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    publisher = Publisher()
+
+    if args.verify:
+        sys.exit(verify(manifest, publisher))
+
+    index, payloads = build_bundles(manifest, publisher)
+    publisher.save()
+    source_bytes = 0
+    for name, bundle in index["bundles"].items():
+        written = write_bytes_if_changed(Path(bundle["file"]), payloads[name])
+        size = sum(Path(path).stat().st_size for path in bundle["entries"])
+        source_bytes += size
+        print(f"  {'更新' if written else '変更なし'}: {bundle['file']}（解説 {len(bundle['entries'])} / {size} -> {bundle['size']} bytes）")
+    for path in remove_stale_bundles(index):
+        print(f"  削除: {path.as_posix()}")
+
+    changed = write_text_if_changed(BUNDLE_INDEX_PATH, serialize_index(index))
+    total = sum(bundle["size"] for bundle in index["bundles"].values())
+    print(f"バンドルの索引を{'更新しました' if changed else '確認しました（変更なし）'}: {BUNDLE_INDEX_PATH}")
+    print(f"バンドル数: {len(index['bundles'])} / 解説 {source_bytes} -> {total} bytes（hash: {index['hash']}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全教材の問題JSONを解説ファイルから再構築するスクリプト
+config/material-rules.json の命名規則に従って data/explanations/<教材ID>/ 以下を走査し、
+data/materials/<教材ID>.json に未登録の解説を追加する（既存の問題・手入力の項目はそのまま）。
+走査とタイトル抽出は教材の第1階層フォルダごとにプロセスプールで並列実行する。
+
+使い方:
+  python3 build_materials.py                       # 全教材を再構築
+  python3 build_materials.py --materials lead_light,exam_national
+  python3 build_materials.py --dry-run             # 書き込まずに追加・リンクされる件数だけ表示
+  python3 build_materials.py --jobs 1              # 並列化せずに実行
+  python3 build_materials.py --shard               # 再構築後、入試系教材を科目ごとのファイルに分割
+  python3 build_materials.py --shard-only          # 走査せずに分割ファイルだけ作り直す
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from generate_explanation_index import INDEX_PATH, build_index, load_manifest, serialize_index
+from generate_textbook_basic_json import TitleCache, sort_problems
+from material_store import MaterialStore, write_text_if_changed
+
+RULES_PATH = Path("config/material-rules.json")
+EXPLANATIONS_ROOT = Path("data/explanations")
+MANIFEST_PATH = Path("data/manifest.json")
+
+# manifest の type ごとの分割方針（subject: 科目＝大学・年度ごとに分割 / None: 分割しない）
+SHARD_POLICY = {
+    "exam_univ": "subject",
+    "exam_year": "subject",
+    "standard": None,
+}
+
+
+def load_rules(rules_path: Path = RULES_PATH) -> Dict[str, Dict]:
+    """教材ごとの命名規則を読み込む"""
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    return {key: value for key, value in rules.items() if not key.startswith("_")}
+
+
+def plan_tasks(material_id: str, rule: Dict) -> List[Path]:
+    """教材の走査タスク（第1階層フォルダごと）を列挙する"""
+    root = EXPLANATIONS_ROOT / material_id
+    if not root.is_dir():
+        return []
+    if not rule.get("layout"):
+        return [root]
+    return sorted(d for d in root.iterdir() if d.is_dir())
+
+
+def scan_folder(material_id: str, folder: str, rule: Dict, cache_entries: Dict[str, Dict]) -> Dict:
+    """1つのフォルダ配下の解説HTMLを走査してタイトルを抽出する（ワーカープロセスで実行）"""
+    started = time.perf_counter()
+    layout = rule.get("layout", [])
+    exclude = rule.get("exclude", [])
+    root = EXPLANATIONS_ROOT / material_id
+    folder_path = Path(folder)
+
+    cache = TitleCache()
+    cache.entries = cache_entries
+
+    # layout の階層数だけフォルダを降りた位置にある HTML が解説ファイル
+    depth = len(layout) - (1 if folder_path != root else 0)
+    pattern = "*/" * depth + "*.html"
+
+    records = []
+    for html_file in sorted(folder_path.glob(pattern)):
+        if any(fnmatch(html_file.name, p) for p in exclude):
+            continue
+        parts = html_file.relative_to(root).parts[:-1]
+        info = cache.lookup(html_file)
+        records.append({
+            "path": str(html_file).replace("\\", "/"),
+            "values": dict(zip(layout, parts)),
+            "stem": html_file.stem,
+            "title": (info or {}).get("title", ""),
+        })
+
+    return {
+        "material": material_id,
+        "records": records,
+        "entries": {key: cache.entries[key] for key in cache.seen if key in cache.entries},
+        "seen": sorted(cache.seen),
+        "stats": (cache.hits, cache.rehashed, cache.misses),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def find_subject(data: Dict, rule: Dict, values: Dict[str, str]) -> Dict:
+    """解説ファイルの属する科目を探す（なければ作成）"""
+    subjects = data.setdefault("subjects", [])
+    if "subject" not in values:
+        if not subjects:
+            subjects.append({"subjectName": data.get("materialName", ""), "folderName": "", "fields": []})
+        return subjects[0]
+
+    folder_name = values["subject"]
+    for subject in subjects:
+        if subject.get("folderName") == folder_name:
+            return subject
+    subject = {
+        "subjectName": rule.get("subjectName", "{subject}").format(**values),
+        "folderName": folder_name,
+        "fields": [],
+    }
+    subjects.append(subject)
+    return subject
+
+
+def merge_records(data: Dict, rule: Dict, records: List[Dict]) -> Tuple[int, int]:
+    """走査結果を教材JSONに反映し、(追加数, 既存問題へのリンク数) を返す"""
+    referenced = {
+        problem.get("explanationPath")
+        for subject in data.get("subjects", [])
+        for field in subject.get("fields", [])
+        for problem in field.get("problems", [])
+    }
+    added = 0
+    linked = 0
+    touched_fields = []
+
+    for record in sorted(records, key=lambda r: r["path"]):
+        if record["path"] in referenced:
+            continue
+        values = dict(record["values"], stem=record["stem"])
+        subject = find_subject(data, rule, values)
+
+        folder_id = rule["folderId"].format(**values)
+        fields = subject.setdefault("fields", [])
+        field = next((f for f in fields if f.get("folderId") == folder_id), None)
+        if field is None:
+            field_name = rule.get("fieldNames", {}).get(folder_id) or rule["fieldName"].format(**values)
+            field = {"fieldName": field_name, "folderId": folder_id, "problems": []}
+            fields.append(field)
+
+        problems = field.setdefault("problems", [])
+        problem_id = rule["id"].format(**values)
+        existing = next((p for p in problems if p.get("id") == problem_id), None)
+        if existing is not None:
+            if existing.get("explanationPath"):
+                print(f"Warning: {record['path']} の問題ID {problem_id} は別の解説で使用済みのためスキップします")
+                continue
+            existing["explanationPath"] = record["path"]
+            linked += 1
+        else:
+            problems.append({
+                "id": problem_id,
+                "title": record["title"] or record["stem"],
+                "explanationPath": record["path"],
+            })
+            added += 1
+            if field not in touched_fields:
+                touched_fields.append(field)
+        referenced.add(record["path"])
+
+    if rule.get("sortProblems"):
+        for field in touched_fields:
+            sort_problems(field["problems"])
+    return added, linked
+
+
+def load_material(entry: Dict, store: Optional[MaterialStore] = None) -> Dict:
+    """教材JSONを読み込む（なければ空の教材を返す）"""
+    store = store or MaterialStore()
+    return store.load(Path(entry["path"]), default={"materialName": entry.get("name", entry["id"]), "subjects": []})
+
+
+def field_summary(field: Dict) -> Dict:
+    """分野の一覧表示に必要な件数だけをまとめる（index.js の件数表示と同じ数え方）"""
+    problems = field.get("problems", [])
+    explanation_count = 0
+    for p in problems:
+        path = p.get("explanationPath") or ""
+        if path and not path.lower().endswith(".pdf") and "pdfs/" not in path:
+            explanation_count += 1
+    return {
+        "fieldName": field.get("fieldName", ""),
+        "folderId": field.get("folderId", ""),
+        "count": len(problems),
+        "publicCount": sum(1 for p in problems if p.get("isPublic") is not False),
+        "explanationCount": explanation_count,
+        "videoCount": sum(1 for p in problems if (p.get("youtubeUrl") or "").strip()),
+    }
+
+
+def shard_material(entry: Dict, data: Dict) -> Optional[str]:
+    """教材を索引＋科目ごとのファイルに分割し、索引のパスを返す（分割しない教材は None）
+
+    data/materials/<教材ID>/<folderName>.json に科目（fields・problems を含む）を書き、
+    data/materials/<教材ID>/index.json には科目・分野名と件数だけを書く。
+    """
+    policy = SHARD_POLICY.get(entry.get("type", "standard"))
+    shard_dir = Path(entry["path"]).with_suffix("")
+    if policy is None:
+        return None
+
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    written = set()
+    index_subjects = []
+    for i, subject in enumerate(data.get("subjects", [])):
+        shard_name = f"{subject.get('folderName') or f'subject{i}'}.json"
+        shard_path = shard_dir / shard_name
+        write_json_if_changed(shard_path, subject, compact=True)
+        written.add(shard_name)
+        index_subjects.append({
+            "subjectName": subject.get("subjectName", ""),
+            "folderName": subject.get("folderName", ""),
+            "shard": str(shard_path).replace("\\", "/"),
+            "fields": [field_summary(field) for field in subject.get("fields", [])],
+        })
+
+    index_path = shard_dir / "index.json"
+    index = {key: value for key, value in data.items() if key != "subjects"}
+    index["subjects"] = index_subjects
+    write_json_if_changed(index_path, index, compact=True)
+    written.add(index_path.name)
+
+    # 削除された科目の分割ファイルを片付ける
+    for stale in shard_dir.glob("*.json"):
+        if stale.name not in written:
+            stale.unlink()
+    return str(index_path).replace("\\", "/")
+
+
+def write_json_if_changed(path: Path, data, compact: bool = False) -> bool:
+    """内容が変わったときだけ JSON を書き込む"""
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+    return write_text_if_changed(path, text)
+
+
+def shard_all(manifest: List[Dict]) -> bool:
+    """manifest の全教材を分割し、manifest の index 項目を更新する。manifest を書き換えたら True"""
+    changed = False
+    for entry in manifest:
+        if not entry.get("path") or not Path(entry["path"]).exists():
+            continue
+        index_path = shard_material(entry, load_material(entry))
+        if index_path and entry.get("index") != index_path:
+            entry["index"] = index_path
+            changed = True
+        elif not index_path and "index" in entry:
+            del entry["index"]
+            changed = True
+        if index_path:
+            print(f"分割: {entry['id']} -> {index_path}")
+    if changed:
+        write_json_if_changed(MANIFEST_PATH, manifest)
+    return changed
+
+
+def run_tasks(tasks: List[Tuple[str, str, Dict, Dict]], jobs: int) -> List[Dict]:
+    """走査タスクを実行する（jobs が1ならこのプロセス内で順に実行）"""
+    if jobs <= 1 or len(tasks) <= 1:
+        return [scan_folder(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(scan_folder, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全教材の問題JSONを解説ファイルから再構築")
+    parser.add_argument("--materials", help="対象の教材ID（カンマ区切り）。省略時は規則のある全教材")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="並列プロセス数")
+    parser.add_argument("--dry-run", action="store_true", help="JSONを書き込まずに結果だけ表示")
+    parser.add_argument("--no-cache", action="store_true", help="タイトルキャッシュを使わない")
+    parser.add_argument("--shard", action="store_true", help="入試系教材を索引と科目ごとのファイルに分割する")
+    parser.add_argument("--shard-only", action="store_true", help="走査せずに分割ファイルだけを作り直す")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rules = load_rules()
+    manifest = load_manifest()
+
+    if args.shard_only:
+        shard_all(manifest)
+        return
+    selected: Optional[set] = set(args.materials.split(",")) if args.materials else None
+    entries = [
+        entry for entry in manifest
+        if entry.get("id") in rules and (selected is None or entry["id"] in selected)
+    ]
+
+    cache = TitleCache() if args.no_cache else TitleCache().load()
+
+    tasks = []
+    for entry in entries:
+        rule = rules[entry["id"]]
+        for folder in plan_tasks(entry["id"], rule):
+            prefix = str(folder).replace("\\", "/") + "/"
+            subset = {key: value for key, value in cache.entries.items() if key.startswith(prefix)}
+            tasks.append((entry["id"], str(folder), rule, subset))
+
+    results = run_tasks(tasks, args.jobs)
+    scan_seconds = time.perf_counter() - started
+
+    records_by_material: Dict[str, List[Dict]] = {}
+    task_seconds: Dict[str, float] = {}
+    for result in results:
+        material_id = result["material"]
+        records_by_material.setdefault(material_id, []).extend(result["records"])
+        task_seconds[material_id] = task_seconds.get(material_id, 0.0) + result["seconds"]
+        cache.entries.update(result["entries"])
+        cache.seen.update(result["seen"])
+        hits, rehashed, misses = result["stats"]
+        cache.hits += hits
+        cache.rehashed += rehashed
+        cache.misses += misses
+        if result["entries"]:
+            cache.dirty = True
+
+    rows = []
+    written = 0
+    store = MaterialStore()
+    for entry in entries:
+        material_id = entry["id"]
+        merge_started = time.perf_counter()
+        data = load_material(entry, store)
+        records = records_by_material.get(material_id, [])
+        added, linked = merge_records(data, rules[material_id], records)
+
+        changed = bool(store.save(Path(entry["path"]), dry_run=args.dry_run))
+        if changed and not args.dry_run:
+            written += 1
+        merge_seconds = time.perf_counter() - merge_started
+        rows.append((material_id, len(records), added, linked, changed,
+                     task_seconds.get(material_id, 0.0), merge_seconds))
+
+    if not args.no_cache:
+        if selected is None:
+            cache.evict_missing(str(EXPLANATIONS_ROOT).replace("\\", "/") + "/")
+        cache.save()
+
+    if args.shard and not args.dry_run:
+        shard_all(manifest)
+
+    if written:
+        index = build_index(manifest)
+        write_text_if_changed(INDEX_PATH, serialize_index(index))
+
+    print(f"{'教材':<18}{'解説':>6}{'追加':>6}{'リンク':>6}  {'走査(s)':>9}{'反映(s)':>9}  状態")
+    for material_id, count, added, linked, changed, scan_s, merge_s in rows:
+        state = ("変更あり（未書き込み）" if args.dry_run else "更新") if changed else "変更なし"
+        print(f"{material_id:<18}{count:>6}{added:>6}{linked:>6}  {scan_s:>9.3f}{merge_s:>9.3f}  {state}")
+    print(f"走査タスク数: {len(tasks)}（{args.jobs} プロセス, 走査 {scan_seconds:.3f}s）")
+    print(f"タイトルキャッシュ: ヒット {cache.hits + cache.rehashed} / ミス {cache.misses}")
+    if written:
+        print(f"{written} 件の教材JSONと {INDEX_PATH} を更新しました")
+    print(f"合計時間: {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
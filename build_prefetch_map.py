@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解説の先読みマップを生成するスクリプト
+data/manifest.json の全教材を走査し、解説ごとに「次に開かれそうな解説」を
+data/prefetch-map.json に書き出す。viewer.js は解説の表示後のアイドル時にこのマップを引き、
+sw.js に先読みを頼む（Service Worker がなければ <link rel="prefetch">）。
+
+次に開かれそうな解説は次の順で最大 MAX_NEXT 件:
+  1. 例題N の解説なら、同じ分野の 類題N（generate_textbook_basic_json.py の
+     ensure_example_before_related と同じく、類題は対応する例題の直後に解く想定）
+  2. 同じ分野で後に並んでいる問題（分野の最後なら、同じ科目の次の分野の最初の問題）
+  3. 大学別の入試（type が exam_univ）なら、同じ大学の次の年度の同じ大問
+
+解説ファイルがない問題と非公開（isPublic: false）の問題は先読みしない。
+
+使い方:
+  python3 build_prefetch_map.py           # マップを生成（内容が変わったときだけ書き込む）
+  python3 build_prefetch_map.py --verify  # 教材JSONと比べて古くないか確認（古ければ終了コード1）
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from generate_explanation_index import load_manifest, read_material
+from material_store import write_text_if_changed
+from problem_number import parse_problem_number
+
+PREFETCH_MAP_PATH = Path("data/prefetch-map.json")
+MAP_VERSION = 1
+# 1つの解説から先読みする解説の数
+MAX_NEXT = 3
+
+_YEAR_RE = re.compile(r'(\d{4})')
+
+
+def is_prefetchable(problem: Dict) -> bool:
+    path = problem.get("explanationPath")
+    return bool(path) and problem.get("isPublic") is not False and Path(path).is_file()
+
+
+def field_year(field: Dict) -> Optional[int]:
+    """分野（入試の年度）の西暦。folderId か fieldName の4桁の数字"""
+    for text in (field.get("folderId"), field.get("fieldName")):
+        match = _YEAR_RE.search(str(text or ""))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def question_key(problem: Dict, year: Optional[int]) -> str:
+    """年度をまたいで同じ大問を対応づけるキー（例: 2022_1 -> 1, 2024_sci_zenki -> sci_zenki）"""
+    problem_id = str(problem.get("id", ""))
+    if year is not None and problem_id.startswith(f"{year}_"):
+        return problem_id[len(str(year)) + 1:]
+    return problem_id
+
+
+def related_path(problem: Dict, problems: List[Dict]) -> Optional[str]:
+    """例題N に対応する同じ分野の 類題N の解説パス"""
+    example = parse_problem_number(problem.get("title", ""))
+    if example.kind != "例題" or example.number is None:
+        return None
+    for candidate in problems:
+        related = parse_problem_number(candidate.get("title", ""))
+        if related.kind == "類題" and related.number == example.number and is_prefetchable(candidate):
+            return candidate["explanationPath"]
+    return None
+
+
+def next_year_paths(material: Dict) -> Dict[str, str]:
+    """同じ大学の次の年度の同じ大問（なければ次の年度の最初の問題）: 解説パス -> 解説パス"""
+    links: Dict[str, str] = {}
+    for subject in material.get("subjects", []):
+        years: List[Tuple[int, int, Dict]] = sorted(
+            (field_year(f), i, f) for i, f in enumerate(subject.get("fields", [])) if field_year(f) is not None
+        )
+        for k, (year, _, field) in enumerate(years):
+            # 解説のある次の年度を探す
+            for next_year, _, next_field in years[k + 1:]:
+                targets = [p for p in next_field.get("problems", []) if is_prefetchable(p)]
+                if targets:
+                    break
+            else:
+                continue
+            by_key = {question_key(p, next_year): p["explanationPath"] for p in targets}
+            for problem in field.get("problems", []):
+                if is_prefetchable(problem):
+                    links[problem["explanationPath"]] = by_key.get(question_key(problem, year),
+                                                                   targets[0]["explanationPath"])
+    return links
+
+
+def material_links(material: Dict, exam_by_year: bool) -> Dict[str, List[str]]:
+    """1教材分の 解説パス -> 次に開かれそうな解説パス（優先順）"""
+    links: Dict[str, List[str]] = {}
+    next_year = next_year_paths(material) if exam_by_year else {}
+    for subject in material.get("subjects", []):
+        fields = subject.get("fields", [])
+        # 分野ごとの先読みできる問題（分野の最後から次の分野へつなぐため先に求める）
+        ordered = [[p for p in field.get("problems", []) if is_prefetchable(p)] for field in fields]
+        for f, field in enumerate(fields):
+            problems = field.get("problems", [])
+            for i, problem in enumerate(ordered[f]):
+                path = problem["explanationPath"]
+                candidates = [related_path(problem, problems)]
+                candidates += [p["explanationPath"] for p in ordered[f][i + 1:i + 1 + MAX_NEXT]]
+                if i == len(ordered[f]) - 1:
+                    following = next((rest for rest in ordered[f + 1:] if rest), [])
+                    candidates += [p["explanationPath"] for p in following[:1]]
+                candidates.append(next_year.get(path))
+
+                targets: List[str] = []
+                for candidate in candidates:
+                    if candidate and candidate != path and candidate not in targets:
+                        targets.append(candidate)
+                if targets and path not in links:
+                    links[path] = targets[:MAX_NEXT]
+    return links
+
+
+def build_map(manifest: List[Dict], reader: Callable[[Path], Tuple[bytes, Dict]] = read_material,
+              links_cache: Optional[Dict[str, Tuple[str, Dict[str, List[str]]]]] = None) -> Dict:
+    """全教材を走査して先読みマップを組み立てる
+
+    links_cache（教材JSONのパス -> (内容ハッシュ, 教材の先読み先)）を渡すと、内容が変わっていない教材は
+    前回の結果を使う。解説ファイルが追加・削除された場合は、それを参照する教材を呼び出し側で取り除くこと。
+    """
+    digest = hashlib.sha256()
+    links: Dict[str, List[str]] = {}
+    for entry in manifest:
+        material_path = entry.get("path", "")
+        if not material_path:
+            continue
+        try:
+            raw, data = reader(Path(material_path))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {material_path}: {e}")
+            continue
+        source_hash = hashlib.sha256(raw).hexdigest()[:16]
+        digest.update(f"{entry.get('id', '')}:{material_path}:{source_hash}\n".encode('utf-8'))
+        cached = links_cache.get(material_path) if links_cache is not None else None
+        if cached is not None and cached[0] == source_hash:
+            material = cached[1]
+        else:
+            material = material_links(data, entry.get("type") == "exam_univ")
+            if links_cache is not None:
+                links_cache[material_path] = (source_hash, material)
+        for path, targets in material.items():
+            # 同じ解説を複数の教材が参照する場合は manifest 順で最初のものを採用
+            links.setdefault(path, targets)
+
+    return {
+        "version": MAP_VERSION,
+        "hash": digest.hexdigest()[:16],
+        "next": links,
+    }
+
+
+def serialize_map(prefetch_map: Dict) -> str:
+    return json.dumps(prefetch_map, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def verify(manifest: List[Dict], map_path: Path = PREFETCH_MAP_PATH) -> int:
+    """マップが教材JSON・解説ファイルと一致しているか確認し、終了コードを返す"""
+    try:
+        existing = map_path.read_text(encoding='utf-8')
+    except OSError:
+        print(f"NG: {map_path} がありません。python3 build_prefetch_map.py を実行してください。")
+        return 1
+    if existing != serialize_map(build_map(manifest)):
+        print(f"NG: {map_path} が古くなっています。python3 build_prefetch_map.py を実行してください。")
+        return 1
+    print(f"OK: {map_path} は最新です")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説の先読みマップを生成")
+    parser.add_argument("--verify", action="store_true", help="マップが最新か確認のみ行う")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+
+    if args.verify:
+        sys.exit(verify(manifest))
+
+    prefetch_map = build_map(manifest)
+    text = serialize_map(prefetch_map)
+    changed = write_text_if_changed(PREFETCH_MAP_PATH, text)
+    edges = sum(len(targets) for targets in prefetch_map["next"].values())
+    print(f"先読みマップを{'更新しました' if changed else '確認しました（変更なし）'}: {PREFETCH_MAP_PATH}")
+    print(f"解説数: {len(prefetch_map['next'])} / 先読み先: {edges}")
+    print(f"サイズ: {len(text.encode('utf-8'))} bytes（hash: {prefetch_map['hash']}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+データ生成スクリプトの計測（段階ごとの時間とカウンタ）をまとめるモジュール
+generate_textbook_basic_json.py・fix_html_fragments.py・scripts/update_textbook_basic_from_sheet.py から使う。
+
+- stage("名前") で囲んだ区間の時間を、入れ子の段階ごとに（合計・自身のみ・回数）記録する
+- count("名前") でカウンタを増やす。read_bytes / read_text はファイル数・バイト数も数える
+- 計測は常に有効（1回あたり数マイクロ秒）。--profile を付けたときだけ、終了時に
+  cProfile を有効にした実行の結果を書き出し、段階・カウンタ・時間のかかった関数の表を表示する
+
+--profile の出力（既定: .build-cache/profile/<スクリプト名>.*）:
+  .prof    cProfile の結果（python3 -m pstats / snakeviz / flameprof などで開ける）
+  .folded  段階の入れ子を「a;b;c マイクロ秒」の形にしたもの（flamegraph.pl・speedscope で読める）
+  .json    段階・カウンタの集計（実行ごとに比べる用）
+
+使い方（各スクリプトの main で）:
+  add_profile_argument(parser)
+  args = parser.parse_args()
+  with profiling(args.profile, "generate_textbook_basic_json"):
+      with stage("scan"):
+          ...
+          count("cache_hit")
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PROFILE_DIR = Path(".build-cache/profile")
+# 要約の表に出す関数の数
+TOP_FUNCTIONS = 15
+
+
+class Profiler:
+    """入れ子の段階ごとの時間とカウンタ"""
+
+    def __init__(self):
+        # 段階の入れ子（外側から順の名前）-> [合計秒, 自身のみの秒, 回数]
+        self.timings: Dict[Tuple[str, ...], List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._stack: List[str] = []
+        # 入れ子の各段階の中で、子の段階にかかった秒
+        self._children: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._stack.append(name)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            key = tuple(self._stack)
+            self._stack.pop()
+            entry = self.timings.setdefault(key, [0.0, 0.0, 0])
+            entry[0] += elapsed
+            entry[1] += elapsed - children
+            entry[2] += 1
+            if self._children:
+                self._children[-1] += elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def by_stage(self) -> List[Tuple[str, float, float, int]]:
+        """段階名ごとの (名前, 合計秒, 自身のみの秒, 回数)。同じ名前の段階が入れ子になっている場合は外側だけ合計に数える"""
+        totals: Dict[str, List[float]] = {}
+        for key, (total, self_time, calls) in self.timings.items():
+            entry = totals.setdefault(key[-1], [0.0, 0.0, 0])
+            if key[-1] not in key[:-1]:
+                entry[0] += total
+            entry[1] += self_time
+            entry[2] += calls
+        return sorted(((name, *values) for name, values in totals.items()), key=lambda row: -row[1])
+
+    def folded(self) -> str:
+        """段階の入れ子を flamegraph の folded 形式（自身のみの時間、マイクロ秒）にする"""
+        lines = [f"{';'.join(key)} {round(self_time * 1e6)}"
+                 for key, (_, self_time, _) in sorted(self.timings.items()) if self_time > 0]
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> Dict:
+        return {
+            "stages": [{"name": name, "seconds": round(total, 6), "selfSeconds": round(self_time, 6), "calls": calls}
+                       for name, total, self_time, calls in self.by_stage()],
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def summary(self) -> str:
+        rows = [f"{'段階':<32}{'回数':>8}{'合計(s)':>11}{'自身(s)':>11}"]
+        for name, total, self_time, calls in self.by_stage():
+            rows.append(f"{name:<32}{calls:>8}{total:>11.4f}{self_time:>11.4f}")
+        if self.counters:
+            rows.append("")
+            rows.append(f"{'カウンタ':<32}{'値':>8}")
+            for name, value in sorted(self.counters.items()):
+                rows.append(f"{name:<32}{value:>8}")
+        return "\n".join(rows)
+
+
+# スクリプト全体で共有する計測
+PROFILER = Profiler()
+stage = PROFILER.stage
+count = PROFILER.count
+
+
+def read_bytes(path: Path) -> bytes:
+    """ファイルを読み、files_read / bytes_read を数える"""
+    data = Path(path).read_bytes()
+    PROFILER.count("files_read")
+    PROFILER.count("bytes_read", len(data))
+    return data
+
+
+def read_text(path: Path) -> str:
+    return read_bytes(path).decode('utf-8')
+
+
+def add_profile_argument(parser) -> None:
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, type=Path, metavar="DIR",
+                        help=f"cProfile の結果と段階ごとの集計を書き出す（既定: {DEFAULT_PROFILE_DIR}）")
+
+
+def _top_functions(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+    # pstats の見出し（合計の行と列名）から下だけを使う
+    text = out.getvalue()
+    start = text.find("   ncalls")
+    return text[start:].rstrip() if start >= 0 else text.rstrip()
+
+
+@contextmanager
+def profiling(output_dir: Optional[Path], name: str) -> Iterator[None]:
+    """output_dir が指定されていれば、囲んだ処理を cProfile で計測して結果を書き出す"""
+    if output_dir is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        with stage(name):
+            yield
+    finally:
+        profiler.disable()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        base = output_dir / name
+        profiler.dump_stats(str(base.with_suffix(".prof")))
+        base.with_suffix(".folded").write_text(PROFILER.folded(), encoding='utf-8')
+        with open(base.with_suffix(".json"), 'w', encoding='utf-8') as f:
+            json.dump(PROFILER.to_json(), f, ensure_ascii=False, indent=2)
+        print(f"\n--- profile: {name} ---", file=sys.stderr)
+        print(PROFILER.summary(), file=sys.stderr)
+        print(f"\n時間のかかった関数（自身の時間順、上位 {TOP_FUNCTIONS}）:", file=sys.stderr)
+        print(_top_functions(profiler), file=sys.stderr)
+        print(f"\n出力: {base}.prof / .folded / .json", file=sys.stderr)
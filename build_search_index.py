@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問題検索用の全文検索インデックスを生成するスクリプト
+全教材JSONの問題タイトル・説明（title / desc）と、解説HTMLの表示テキストを単語分割し、
+転置インデックスを data/search/ 以下に分割して書き出す。
+
+- 日本語は分かち書きしないため、かな・漢字の連続部分は文字バイグラム（2文字ずつ）にする。
+  1文字の検索語（「波」「力」など）でも引けるよう、索引には1文字ずつの語（ユニグラム）も入れる
+- 英数字の連続部分は小文字化した単語として扱う
+- ポスティング（語を含む問題番号の列）は昇順に並べて差分で符号化する
+- 語は先頭2文字のコードポイントから求めたシャード番号のファイルに入り、
+  クライアント（js/search-index.js）は検索語に必要なシャードだけを読み込む
+- meta.json の hash はシャード・文書表の内容から求め、クライアントはファイル名に ?v=<hash> を付けて読む
+  （索引を作り直すと古いシャードがブラウザのキャッシュから使われない）
+
+使い方:
+  python3 build_search_index.py               # data/search/ を生成
+  python3 build_search_index.py --shards 32   # シャード数を変更
+  python3 build_search_index.py --benchmark   # サイズと検索時間を従来の部分一致検索と比較
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from generate_explanation_index import load_manifest
+
+SEARCH_DIR = Path("data/search")
+DEFAULT_SHARDS = 16
+INDEX_VERSION = 2
+
+# かな・カナ・漢字（と長音記号・々）の連続
+_CJK_RUN_RE = re.compile(r'[ぁ-ゟ゠-ヿ㐀-鿿豈-﫿々ー]+')
+_WORD_RE = re.compile(r'[0-9a-z]+')
+
+
+class VisibleTextExtractor(HTMLParser):
+    """解説HTMLから画面に表示されるテキストだけを取り出す（script / style は除く）"""
+
+    SKIP_TAGS = {"script", "style", "head", "title", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth > 0:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        return " ".join(self.parts)
+
+
+def extract_visible_text(html: str) -> str:
+    parser = VisibleTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def tokenize(text: str) -> List[str]:
+    """検索用の語に分割する（js/search-index.js の tokenize と同じ規則）"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = []
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD_RE.findall(_CJK_RUN_RE.sub(' ', text)))
+    return tokens
+
+
+def index_terms(text: str) -> Set[str]:
+    """文書を索引に入れるときの語（tokenize の語に、かな・漢字1文字ずつのユニグラムを加える）"""
+    terms = set(tokenize(text))
+    for run in _CJK_RUN_RE.findall(unicodedata.normalize('NFKC', text).lower()):
+        terms.update(run)
+    return terms
+
+
+def shard_of(term: str, shards: int) -> int:
+    """語のシャード番号（js/search-index.js の shardOf と同じ計算）"""
+    first = ord(term[0])
+    second = ord(term[1]) if len(term) > 1 else 0
+    return (first * 31 + second) % shards
+
+
+def delta_encode(doc_ids: Iterable[int]) -> List[int]:
+    out = []
+    prev = 0
+    for doc_id in doc_ids:
+        out.append(doc_id - prev)
+        prev = doc_id
+    return out
+
+
+def delta_decode(deltas: Iterable[int]) -> List[int]:
+    out = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        out.append(total)
+    return out
+
+
+def collect_documents(manifest: List[Dict]) -> List[Dict]:
+    """全教材の問題を検索対象の文書として列挙する"""
+    docs = []
+    html_cache: Dict[str, str] = {}
+    for m, entry in enumerate(manifest):
+        path = entry.get("path")
+        if not path or not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for subject in data.get("subjects", []):
+            for field in subject.get("fields", []):
+                for problem in field.get("problems", []):
+                    if problem.get("isPublic") is False:
+                        continue
+                    explanation_path = problem.get("explanationPath") or ""
+                    body = ""
+                    if explanation_path.endswith(".html") and Path(explanation_path).exists():
+                        if explanation_path not in html_cache:
+                            html_cache[explanation_path] = extract_visible_text(
+                                Path(explanation_path).read_text(encoding='utf-8'))
+                        body = html_cache[explanation_path]
+                    docs.append({
+                        "material": m,
+                        "subject": subject.get("subjectName", ""),
+                        "field": field.get("fieldName", ""),
+                        "title": problem.get("title", ""),
+                        "desc": problem.get("desc", ""),
+                        "path": explanation_path,
+                        "youtube": problem.get("youtubeUrl", ""),
+                        "body": body,
+                    })
+    return docs
+
+
+def build_postings(docs: List[Dict]) -> Dict[str, List[int]]:
+    postings: Dict[str, List[int]] = {}
+    for doc_id, doc in enumerate(docs):
+        text = " ".join((doc["subject"], doc["field"], doc["title"], doc["desc"], doc["body"]))
+        for term in index_terms(text):
+            postings.setdefault(term, []).append(doc_id)
+    return postings
+
+
+def write_index(docs: List[Dict], postings: Dict[str, List[int]], shards: int, out_dir: Path = SEARCH_DIR) -> Dict[str, int]:
+    """シャード・文書表・メタ情報を書き出し、ファイルごとのバイト数を返す"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+
+    buckets: List[Dict[str, List[int]]] = [{} for _ in range(shards)]
+    for term in sorted(postings):
+        buckets[shard_of(term, shards)][term] = delta_encode(postings[term])
+
+    digest = hashlib.sha256()
+    written = set()
+    for i, bucket in enumerate(buckets):
+        name = f"terms-{i:02d}.json"
+        text = json.dumps(bucket, ensure_ascii=False, separators=(",", ":"))
+        (out_dir / name).write_text(text, encoding='utf-8')
+        digest.update(text.encode('utf-8'))
+        sizes[name] = len(text.encode('utf-8'))
+        written.add(name)
+
+    # 検索結果の表示に使う項目だけ（本文は含めない）
+    doc_rows = [[d["material"], d["title"], d["desc"], d["path"], d["youtube"]] for d in docs]
+    text = json.dumps(doc_rows, ensure_ascii=False, separators=(",", ":"))
+    (out_dir / "docs.json").write_text(text, encoding='utf-8')
+    digest.update(text.encode('utf-8'))
+    sizes["docs.json"] = len(text.encode('utf-8'))
+    written.add("docs.json")
+
+    meta = {"version": INDEX_VERSION, "hash": digest.hexdigest()[:16], "shards": shards,
+            "docs": len(docs), "terms": len(postings)}
+    text = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))
+    (out_dir / "meta.json").write_text(text, encoding='utf-8')
+    sizes["meta.json"] = len(text.encode('utf-8'))
+    written.add("meta.json")
+
+    for stale in out_dir.glob("*.json"):
+        if stale.name not in written:
+            stale.unlink()
+    return sizes
+
+
+def search(query: str, shard_loader, shards: int) -> List[int]:
+    """インデックスを使って全語を含む文書番号を返す（クライアントと同じ手順）"""
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    result: Optional[Set[int]] = None
+    for term in sorted(terms, key=len, reverse=True):
+        deltas = shard_loader(shard_of(term, shards)).get(term)
+        if not deltas:
+            return []
+        ids = set(delta_decode(deltas))
+        result = ids if result is None else result & ids
+        if not result:
+            return []
+    return sorted(result)
+
+
+def run_benchmark(docs: List[Dict], sizes: Dict[str, int], shards: int, out_dir: Path = SEARCH_DIR) -> None:
+    """インデックスのサイズと検索時間を、従来の data-search-text（パス＋タイトル）への部分一致と比較"""
+    loaded: Dict[int, Dict] = {}
+
+    def shard_loader(i: int) -> Dict:
+        if i not in loaded:
+            loaded[i] = json.loads((out_dir / f"terms-{i:02d}.json").read_text(encoding='utf-8'))
+        return loaded[i]
+
+    linear_texts = [f"{d['path']} {d['title']}".lower() for d in docs]
+    queries = ["波", "正弦波", "運動量", "コンデンサー", "気柱の共鳴", "エネルギー保存", "ばね", "doppler"]
+    repeats = 200
+
+    print(f"インデックス: {sum(v for k, v in sizes.items() if k.startswith('terms-'))} bytes（{shards} シャード）"
+          f" + 文書表 {sizes['docs.json']} bytes / 文書数 {len(docs)}")
+    print(f"{'検索語':<14}{'索引(件)':>8}{'索引(ms)':>10}{'従来(件)':>8}{'従来(ms)':>10}")
+    for query in queries:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            indexed = search(query, shard_loader, shards)
+        indexed_ms = (time.perf_counter() - started) / repeats * 1e3
+
+        lower = query.lower()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            linear = [i for i, text in enumerate(linear_texts) if lower in text]
+        linear_ms = (time.perf_counter() - started) / repeats * 1e3
+        print(f"{query:<14}{len(indexed):>8}{indexed_ms:>10.3f}{len(linear):>8}{linear_ms:>10.3f}")
+    print("※ 索引の件数は説明・解説本文の一致を含むため、従来（パス＋タイトルのみ）より多くなる")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="問題検索用の全文検索インデックスを生成")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="シャード数")
+    parser.add_argument("--benchmark", action="store_true", help="生成後にサイズと検索時間を表示")
+    args = parser.parse_args()
+
+    docs = collect_documents(load_manifest())
+    postings = build_postings(docs)
+    sizes = write_index(docs, postings, args.shards)
+
+    print(f"検索インデックスを更新しました: {SEARCH_DIR}/")
+    print(f"文書数: {len(docs)} / 語数: {len(postings)} / 合計 {sum(sizes.values())} bytes")
+    if args.benchmark:
+        run_benchmark(docs, sizes, args.shards)
+
+
+if __name__ == "__main__":
+    main()
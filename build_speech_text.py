@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+読み上げ機能用のテキスト（サイドカー）を事前に生成するスクリプト
+音声ボタンと同じ js/audio-enhancer.js の enhanceExplanationForAudio の規則で、解説HTMLの .card ごとに
+導入文付きの見出し・本文（<p>）・注目点・答え（.box-note）を、最後に .box-alert ごとのまとめを
+読み上げ用テキストにし、data/speech/<解説のパス>.json に書き出す。
+viewer.js の音声ボタンは js/text-extractor.js の loadSpeechSections でこれを読み、ページを解析せずに読み上げを始める。
+
+サイドカーの形式:
+  {"version": 2, "source": 元HTMLのハッシュ, "cards": .card の数, "alerts": .box-alert の数,
+   "text": 全セクションをつなげた文字列,
+   "sections": [[要素の番号, 開始位置, 終了位置, 見出し, 種類], ...]}
+  種類は detectSectionType の値。"summary" の要素の番号は .box-alert の番号、それ以外は .card の番号。
+  位置は JavaScript の文字列と同じ UTF-16 単位。
+
+- 元HTMLの内容ハッシュが変わっていない解説は読み込み直さない（差分生成）
+- --check はサイドカーが最新か、セクションのカード番号が現在の .card 構造と合っているかを確認する
+
+使い方:
+  python3 build_speech_text.py           # 変更された解説のサイドカーだけ更新
+  python3 build_speech_text.py --force   # 全件作り直す
+  python3 build_speech_text.py --check   # 古い・ずれたサイドカーがあれば終了コード1
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from prerender_math import MATH_RE
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+SPEECH_ROOT = Path("data/speech")
+SIDECAR_VERSION = 2
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_SKIP_TAGS = {"script", "style", "template"}
+_WS_RE = re.compile(r'\s+')
+
+# js/text-extractor.js の convertMathToText と同じ置き換え（順序も同じ）
+_MATH_REPLACEMENTS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r'\\frac\{([^}]+)\}\{([^}]+)\}'), r'\1分の\2'),
+    (re.compile(r'\\frac'), '分数'),
+    (re.compile(r'\^(\d+)'), r'\1乗'),
+    (re.compile(r'\^\{([^}]+)\}'), r'\1乗'),
+    (re.compile(r'_(\d+)'), r'下付き\1'),
+    (re.compile(r'_\{([^}]+)\}'), r'下付き\1'),
+    (re.compile(r'\\sqrt\{([^}]+)\}'), r'ルート\1'),
+    (re.compile(r'\\sqrt'), 'ルート'),
+    (re.compile(r'\\pi'), 'パイ'),
+    (re.compile(r'\\theta'), 'シータ'),
+    (re.compile(r'\\alpha'), 'アルファ'),
+    (re.compile(r'\\beta'), 'ベータ'),
+    (re.compile(r'\\gamma'), 'ガンマ'),
+    (re.compile(r'\\Delta'), 'デルタ'),
+    (re.compile(r'\\lambda'), 'ラムダ'),
+    (re.compile(r'\\mu'), 'ミュー'),
+    (re.compile(r'\\sigma'), 'シグマ'),
+    (re.compile(r'='), 'イコール'),
+    (re.compile(r'\+'), 'プラス'),
+    (re.compile(r'-'), 'マイナス'),
+    (re.compile(r'\*'), 'かける'),
+    (re.compile(r'/'), 'わる'),
+    (re.compile(r'<'), '小なり'),
+    (re.compile(r'>'), '大なり'),
+    (re.compile(r'≤'), '以下'),
+    (re.compile(r'≥'), '以上'),
+    (re.compile(r'≠'), '等しくない'),
+    (re.compile(r'≈'), '約'),
+    (re.compile(r'∞'), '無限大'),
+    (re.compile(r'∑'), 'シグマ'),
+    (re.compile(r'∫'), '積分'),
+    (re.compile(r'∂'), '偏微分'),
+    (re.compile(r'∇'), 'ナブラ'),
+    (re.compile(r'\{'), ''),
+    (re.compile(r'\}'), ''),
+    (re.compile(r'\\'), ''),
+]
+
+
+class Element:
+    """解析用の最小限の要素（タグ名・クラス・子要素）"""
+
+    __slots__ = ("tag", "classes", "children")
+
+    def __init__(self, tag: str, classes: List[str]):
+        self.tag = tag
+        self.classes = classes
+        self.children: List = []  # Element または str
+
+    def text_content(self) -> str:
+        parts: List[str] = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def iter_descendants(self):
+        """文書順の子孫要素（querySelectorAll と同じ順序）"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Element):
+                yield node
+                stack.extend(reversed(node.children))
+
+    def select(self, tags=(), classes=()) -> List["Element"]:
+        return [el for el in self.iter_descendants()
+                if el.tag in tags or any(c in el.classes for c in classes)]
+
+
+class TreeBuilder(HTMLParser):
+    """HTML を Element の木にする（script / style の中身は捨てる）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#root", [])
+        self.stack = [self.root]
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        el = Element(tag, classes)
+        self.stack[-1].children.append(el)
+        if tag not in _VOID_TAGS:
+            self.stack.append(el)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _SKIP_TAGS or self.skip_depth:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        self.stack[-1].children.append(Element(tag, classes))
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth or tag in _VOID_TAGS:
+            return
+        # 閉じ忘れがあっても対応する開始タグまで戻る
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.stack[-1].children.append(data)
+
+
+def parse_html(source: str) -> Element:
+    builder = TreeBuilder()
+    builder.feed(source)
+    builder.close()
+    return builder.root
+
+
+def convert_math_to_text(tex: str) -> str:
+    text = tex
+    for pattern, repl in _MATH_REPLACEMENTS:
+        text = pattern.sub(repl, text)
+    return text.strip() or "数式"
+
+
+def speakable(text: str) -> str:
+    """TeX の数式を読み上げ用に置き換え、空白をまとめる"""
+    text = MATH_RE.sub(lambda m: convert_math_to_text(next(g for g in m.group("d1", "d2", "i1", "i2") if g is not None)), text)
+    return _WS_RE.sub(' ', text).strip()
+
+
+def _text_without(el: Element, skip_tag: str) -> str:
+    """skip_tag の要素を除いた textContent（enhanceBoxNote の strong を消した複製と同じ）"""
+    parts: List[str] = []
+    stack = [el]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        elif node is el or node.tag != skip_tag:
+            stack.extend(reversed(node.children))
+    return "".join(parts)
+
+
+def _convert_math(text: str, before: str = "", after: str = "") -> str:
+    """数式を convertMathToText の読みに置き換える（before / after は enhanceParagraph の前後の補足）"""
+    return MATH_RE.sub(lambda m: before + convert_math_to_text(
+        next(g for g in m.group("d1", "d2", "i1", "i2") if g is not None)) + after, text)
+
+
+def detect_section_type(card: Element, heading_text: str) -> str:
+    """audio-enhancer.js の detectSectionType"""
+    if "指針" in heading_text or "方針" in heading_text:
+        return "guidance"
+    if "考え方" in heading_text or "解法" in heading_text:
+        return "explanation"
+    if re.match(r'\(\d+\)', heading_text):
+        return "question"
+    if card.select(classes=("box-note",)):
+        return "answer"
+    return "general"
+
+
+def section_introduction(heading_text: str, section_type: str) -> str:
+    """audio-enhancer.js の addSectionIntroduction"""
+    if section_type == "guidance":
+        return "解法の指針について説明します。" + heading_text + "。"
+    if section_type == "explanation":
+        return "考え方について詳しく解説します。" + heading_text + "。"
+    if section_type == "question":
+        return heading_text + "について解説します。"
+    if section_type == "answer":
+        return "答えについて説明します。" + heading_text + "。"
+    return heading_text + "。"
+
+
+def enhance_paragraph(p: Element) -> str:
+    """audio-enhancer.js の enhanceParagraph"""
+    text = _convert_math(p.text_content(), "この数式、", "を確認してください。")
+    for highlight in p.select(classes=("highlight",)):
+        raw = highlight.text_content()
+        text = text.replace(raw, "特に重要な「" + raw.strip() + "」という概念に注目してください。", 1)
+    for strong in p.select(tags=("strong",)):
+        raw = strong.text_content()
+        text = text.replace(raw, "重要な「" + raw.strip() + "」です。", 1)
+    return _WS_RE.sub(' ', text).strip()
+
+
+def enhance_card_text(card: Element, section_type: str, heading_text: str) -> str:
+    """audio-enhancer.js の enhanceCardText"""
+    # 画面では MathJax が描画した後の文字を読むので、TeX のままの数式は読みに直す
+    text = section_introduction(_convert_math(heading_text), section_type) if heading_text else ""
+    paragraphs = card.select(tags=("p",))
+    for p in paragraphs:
+        paragraph_text = enhance_paragraph(p)
+        if paragraph_text:
+            text += paragraph_text + "。"
+
+    highlights = card.select(classes=("highlight",))
+    if highlights:
+        text += "特に注目すべき点として、"
+        for highlight in highlights:
+            text += _convert_math(highlight.text_content().strip()) + "があります。"
+
+    strongs = card.select(tags=("strong",))
+    if strongs:
+        text += "重要なポイントとして、"
+        # <p> の中の太字は段落で読んでいるので飛ばす
+        in_paragraph = {id(strong) for p in paragraphs for strong in p.select(tags=("strong",))}
+        for strong in strongs:
+            if id(strong) not in in_paragraph:
+                text += _convert_math(strong.text_content().strip()) + "。"
+
+    if card.select(classes=("sim-embed",)):
+        text += "画面のシミュレーションをご覧ください。動きを確認しながら理解を深めましょう。"
+
+    for box in card.select(classes=("box-note",)):
+        text += "答えは、" + _convert_math(_text_without(box, "strong").strip()) + "となります。"
+    return text
+
+
+def enhance_alert_box(box: Element) -> str:
+    """audio-enhancer.js の enhanceAlertBox"""
+    text = "最後に、重要なポイントをまとめます。"
+    headings = box.select(tags=("h3",))
+    if headings:
+        text += _convert_math(headings[0].text_content().strip()) + "。"
+    items = box.select(tags=("li",))
+    if items:
+        text += "ポイントは以下の通りです。"
+        for item in items:
+            text += "第一に、" + _convert_math(item.text_content().strip()) + "。"
+    return text
+
+
+def extract_sections(root: Element) -> Tuple[int, int, List[Tuple[int, str, str, str]]]:
+    """(.card の数, .box-alert の数, [(要素の番号, 見出し, 本文, 種類), ...]) を返す
+
+    enhanceExplanationForAudio と同じ規則・順序（カードごとのセクションの後に .box-alert のまとめ）。
+    """
+    cards = root.select(classes=("card",))
+    sections = []
+    for i, card in enumerate(cards):
+        headings = card.select(tags=("h3", "h4"))
+        heading_text = headings[0].text_content().strip() if headings else ""
+        section_type = detect_section_type(card, heading_text)
+        text = enhance_card_text(card, section_type, heading_text)
+        if text.strip():
+            sections.append((i, heading_text, text.strip(), section_type))
+
+    alerts = root.select(classes=("box-alert",))
+    for j, box in enumerate(alerts):
+        sections.append((j, "まとめ", enhance_alert_box(box), "summary"))
+    return len(cards), len(alerts), sections
+
+
+def utf16_len(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def build_sidecar(source: str, source_hash: str) -> Dict:
+    card_count, alert_count, sections = extract_sections(parse_html(source))
+    parts = []
+    rows = []
+    offset = 0
+    for index, heading, text, section_type in sections:
+        length = utf16_len(text)
+        rows.append([index, offset, offset + length, heading, section_type])
+        parts.append(text)
+        offset += length
+    return {
+        "version": SIDECAR_VERSION,
+        "source": source_hash,
+        "cards": card_count,
+        "alerts": alert_count,
+        "text": "".join(parts),
+        "sections": rows,
+    }
+
+
+def sidecar_path(html_path: Path) -> Path:
+    return SPEECH_ROOT / html_path.relative_to(EXPLANATIONS_ROOT).with_suffix(".json")
+
+
+def load_sidecar(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_alignment(sidecar: Dict, source: str) -> List[str]:
+    """サイドカーのセクションが現在の .card 構造と合っているかを確認し、問題点を返す"""
+    root = parse_html(source)
+    cards = root.select(classes=("card",))
+    alerts = root.select(classes=("box-alert",))
+    problems = []
+    if sidecar.get("cards") != len(cards):
+        problems.append(f".card の数が違います（サイドカー {sidecar.get('cards')} / HTML {len(cards)}）")
+    if sidecar.get("alerts") != len(alerts):
+        problems.append(f".box-alert の数が違います（サイドカー {sidecar.get('alerts')} / HTML {len(alerts)}）")
+    for index, _, _, heading, section_type in sidecar.get("sections", []):
+        if section_type == "summary":
+            if index >= len(alerts):
+                problems.append(f".box-alert {index} が存在しません")
+            continue
+        if index >= len(cards):
+            problems.append(f"カード {index} が存在しません")
+            continue
+        headings = cards[index].select(tags=("h3", "h4"))
+        actual = headings[0].text_content().strip() if headings else ""
+        if actual != heading:
+            problems.append(f"カード {index} の見出しが違います（{heading!r} / {actual!r}）")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="読み上げ用テキストのサイドカーを生成")
+    parser.add_argument("--force", action="store_true", help="内容ハッシュに関係なく全件作り直す")
+    parser.add_argument("--check", action="store_true", help="書き込まずに、古い・ずれたサイドカーがあれば終了コード1")
+    args = parser.parse_args()
+
+    html_files = sorted(EXPLANATIONS_ROOT.rglob("*.html"))
+    expected = set()
+    written = skipped = 0
+    stale: List[str] = []
+
+    for html_path in html_files:
+        raw = html_path.read_bytes()
+        source_hash = hashlib.sha256(raw).hexdigest()[:16]
+        out_path = sidecar_path(html_path)
+        expected.add(out_path)
+        existing = load_sidecar(out_path)
+        fresh = (existing is not None and existing.get("version") == SIDECAR_VERSION
+                 and existing.get("source") == source_hash)
+
+        if args.check:
+            if not fresh:
+                stale.append(f"{out_path}: 元の解説が更新されています")
+            else:
+                stale.extend(f"{out_path}: {p}" for p in check_alignment(existing, raw.decode('utf-8')))
+            continue
+        if fresh and not args.force:
+            skipped += 1
+            continue
+
+        sidecar = build_sidecar(raw.decode('utf-8'), source_hash)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(sidecar, ensure_ascii=False, separators=(",", ":")) + "\n", encoding='utf-8')
+        written += 1
+
+    orphans = [p for p in SPEECH_ROOT.rglob("*.json") if p not in expected] if SPEECH_ROOT.exists() else []
+    if args.check:
+        stale.extend(f"{p}: 元の解説がありません" for p in orphans)
+        for line in stale:
+            print(f"  {line}")
+        if stale:
+            print(f"読み上げテキストが古くなっています（{len(stale)} 件）。python3 build_speech_text.py を実行してください")
+            sys.exit(1)
+        print(f"読み上げテキストは最新です（{len(html_files)} ファイル）")
+        return
+
+    for path in orphans:
+        path.unlink()
+    print(f"読み上げテキスト: 更新 {written} / 変更なし {skipped} / 削除 {len(orphans)}（出力先: {SPEECH_ROOT}/）")
+
+
+if __name__ == "__main__":
+    main()
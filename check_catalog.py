@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教材カタログ全体の整合性チェック
+data/manifest.json と全教材JSONを1回ずつ読み、問題ID・解説パスの集合を作ってから、
+参照されている解説HTMLを並列に1回ずつ走査して、viewer.js で実行時に初めて
+表面化していた問題をデプロイ前に検出する。
+
+検出する内容（error は終了コード1、warning は --strict のときだけ1）:
+  error    material-missing / material-invalid   教材JSONがない・読めない
+  error    explanation-missing                   explanationPath のファイルがない（公開されている問題）
+  error    duplicate-id-in-field                 同じ分野に同じ問題IDがある
+  error    youtube-url                           youtubeUrl が YouTube の動画URLでない
+  error    full-document                         完全なHTML文書のまま（fix_html_fragments.py で修正できる）
+  warning  explanation-pending                   非公開（isPublic: false）の問題の explanationPath のファイルがまだない
+  warning  duplicate-id                          教材内の別の分野に同じ問題IDがある（?id= での検索が曖昧。教材ごとに1行にまとめる）
+  warning  shared-explanation                    複数の問題が同じ解説を参照している
+  warning  no-card                               解説に .card がない（目次・読み上げ・リアクションが動かない）
+  warning  unbalanced-div                        <div> の開始と終了の数が合わない
+  warning  orphan                                どの教材からも参照されていない解説HTML
+
+使い方:
+  python3 check_catalog.py            # 結果を表示（error があれば終了コード1）
+  python3 check_catalog.py --json     # 機械可読な JSON で出力
+  python3 check_catalog.py --strict   # warning でも終了コード1
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from generate_explanation_index import load_manifest
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+# duplicate-id の行に挙げる問題IDの数
+DUPLICATE_ID_EXAMPLES = 5
+READ_CHUNK = 65536
+# youtu.be/<ID> と youtube.com/watch?v=<ID>（プレイリスト等のパラメータ付き可）・/embed/・/shorts/
+YOUTUBE_RE = re.compile(
+    r'^https://(?:youtu\.be/[\w-]{11}(?:\?[^\s]*)?'
+    r'|(?:www\.|m\.)?youtube\.com/(?:watch\?(?:[^\s]*&)?v=[\w-]{11}(?:&[^\s]*)?|embed/[\w-]{11}|shorts/[\w-]{11}))$'
+)
+
+
+class StructureScanner(HTMLParser):
+    """解説HTMLを少しずつ読み込みながら、文書の形と .card・<div> の数を数える"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.cards = 0
+        self.div_open = 0
+        self.div_close = 0
+        self.full_document = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("html", "body", "head"):
+            self.full_document = True
+        elif tag == "div":
+            self.div_open += 1
+        if "card" in (dict(attrs).get("class") or "").split():
+            self.cards += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if "card" in (dict(attrs).get("class") or "").split():
+            self.cards += 1
+
+    def handle_endtag(self, tag):
+        if tag == "div":
+            self.div_close += 1
+
+    def handle_decl(self, decl):
+        if decl.lower().startswith("doctype"):
+            self.full_document = True
+
+
+def scan_explanation(path: str) -> Tuple[str, Optional[Dict]]:
+    """解説HTML1ファイルを走査する（ワーカープロセスで実行）"""
+    scanner = StructureScanner()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK), ""):
+                scanner.feed(chunk)
+        scanner.close()
+    except (OSError, UnicodeDecodeError) as e:
+        return path, {"error": str(e)}
+    return path, {
+        "cards": scanner.cards,
+        "divOpen": scanner.div_open,
+        "divClose": scanner.div_close,
+        "fullDocument": scanner.full_document,
+    }
+
+
+class Report:
+    def __init__(self):
+        self.issues: List[Dict] = []
+
+    def add(self, severity: str, code: str, path: str, message: str, material: Optional[str] = None) -> None:
+        issue = {"severity": severity, "code": code, "path": path, "message": message}
+        if material:
+            issue["material"] = material
+        self.issues.append(issue)
+
+    def count(self, severity: str) -> int:
+        return sum(1 for issue in self.issues if issue["severity"] == severity)
+
+
+def check_materials(manifest: List[Dict], report: Report) -> Dict[str, List[Tuple[str, str, bool]]]:
+    """全教材JSONを検査し、explanationPath -> [(教材ID, 問題ID, 公開されているか), …] を返す"""
+    references: Dict[str, List[Tuple[str, str, bool]]] = defaultdict(list)
+    for entry in manifest:
+        material_id = entry.get("id", "")
+        material_path = entry.get("path", "")
+        try:
+            with open(material_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            report.add("error", "material-missing", material_path, "教材JSONがありません", material_id)
+            continue
+        except (OSError, ValueError) as e:
+            report.add("error", "material-invalid", material_path, f"教材JSONを読めません: {e}", material_id)
+            continue
+
+        fields_by_id: Dict[str, List[str]] = defaultdict(list)
+        for subject in data.get("subjects", []):
+            for field in subject.get("fields", []):
+                field_name = field.get("fieldName", "")
+                seen_in_field = set()
+                for problem in field.get("problems", []):
+                    problem_id = str(problem.get("id", ""))
+                    if problem_id in seen_in_field:
+                        report.add("error", "duplicate-id-in-field", material_path,
+                                   f"分野「{field_name}」に問題ID {problem_id!r} が重複しています", material_id)
+                    seen_in_field.add(problem_id)
+                    fields_by_id[problem_id].append(field_name)
+
+                    url = problem.get("youtubeUrl")
+                    if url and not YOUTUBE_RE.match(url):
+                        report.add("error", "youtube-url", material_path,
+                                   f"問題 {problem_id!r} の youtubeUrl が不正です: {url}", material_id)
+
+                    explanation_path = problem.get("explanationPath")
+                    if explanation_path:
+                        references[explanation_path].append((material_id, problem_id, problem.get("isPublic") is not False))
+
+        # 教科書の「問1」のように分野ごとに番号が振り直される教材では多数になるので、教材ごとに1行にまとめる
+        repeated = [(problem_id, len(set(fields))) for problem_id, fields in fields_by_id.items() if len(set(fields)) > 1]
+        if repeated:
+            examples = ", ".join(f"{problem_id!r}（{count} 分野）" for problem_id, count in repeated[:DUPLICATE_ID_EXAMPLES])
+            more = f" ほか {len(repeated) - DUPLICATE_ID_EXAMPLES} 件" if len(repeated) > DUPLICATE_ID_EXAMPLES else ""
+            report.add("warning", "duplicate-id", material_path,
+                       f"{len(repeated)} 個の問題IDが複数の分野にあります: {examples}{more}（?id= では最初の分野が表示されます）",
+                       material_id)
+    return references
+
+
+def check_explanations(references: Dict[str, List[Tuple[str, str, bool]]], jobs: int, report: Report) -> int:
+    """参照されている解説HTMLと、参照されていない解説HTMLを検査し、走査したファイル数を返す"""
+    existing = {str(p).replace("\\", "/") for p in EXPLANATIONS_ROOT.rglob("*.html")}
+    targets = []
+    for explanation_path, owners in sorted(references.items()):
+        if len(owners) > 1:
+            names = ", ".join(f"{m}:{p}" for m, p, _ in owners)
+            report.add("warning", "shared-explanation", explanation_path, f"{len(owners)} 問から参照されています（{names}）")
+        if explanation_path in existing or Path(explanation_path).is_file():
+            targets.append(explanation_path)
+        else:
+            for material_id, problem_id, is_public in owners:
+                if is_public:
+                    report.add("error", "explanation-missing", explanation_path,
+                               f"問題 {problem_id!r} の解説ファイルがありません", material_id)
+                else:
+                    report.add("warning", "explanation-pending", explanation_path,
+                               f"非公開の問題 {problem_id!r} の解説ファイルはまだありません", material_id)
+
+    for orphan in sorted(existing - set(references)):
+        report.add("warning", "orphan", orphan, "どの教材からも参照されていません")
+
+    if jobs <= 1 or len(targets) <= 1:
+        results = [scan_explanation(path) for path in targets]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(scan_explanation, targets, chunksize=max(1, len(targets) // (jobs * 4))))
+
+    for path, info in results:
+        if "error" in info:
+            report.add("error", "explanation-unreadable", path, f"読み込めません: {info['error']}")
+            continue
+        if info["fullDocument"]:
+            report.add("error", "full-document", path,
+                       "完全なHTML文書です（python3 fix_html_fragments.py で断片に変換してください）")
+        if info["cards"] == 0:
+            report.add("warning", "no-card", path, ".card がありません")
+        if info["divOpen"] != info["divClose"]:
+            report.add("warning", "unbalanced-div", path,
+                       f"<div> の開始 {info['divOpen']} / 終了 {info['divClose']} が一致しません")
+    return len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="教材カタログ全体の整合性チェック")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力")
+    parser.add_argument("--strict", action="store_true", help="warning があっても終了コード1にする")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="並列プロセス数")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = Report()
+    manifest = load_manifest()
+    references = check_materials(manifest, report)
+    scanned = check_explanations(references, args.jobs, report)
+    elapsed = time.perf_counter() - started
+
+    errors = report.count("error")
+    warnings = report.count("warning")
+    failed = errors > 0 or (args.strict and warnings > 0)
+
+    if args.json:
+        json.dump({
+            "ok": not failed,
+            "materials": len(manifest),
+            "explanations": scanned,
+            "errors": errors,
+            "warnings": warnings,
+            "elapsed": round(elapsed, 3),
+            "issues": report.issues,
+        }, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for issue in report.issues:
+            where = f"[{issue['material']}] " if "material" in issue else ""
+            print(f"{issue['severity']:<7} {issue['code']:<22} {where}{issue['path']}: {issue['message']}")
+        print(f"教材 {len(manifest)} / 解説 {scanned} ファイルを検査: error {errors} 件 / warning {warnings} 件（{elapsed:.2f} 秒）")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
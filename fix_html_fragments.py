@@ -1,64 +1,238 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""Fix HTML files that are full documents to HTML fragments"""
+"""Fix HTML files that are full documents to HTML fragments
 
-import re
+Walks data/explanations (or the given files/directories), finds explanation
+files saved as full HTML documents and rewrites them as fragments: the body
+with only the viewer-container / explanation-area wrapper tags removed.
+Everything else in the body, including <script> blocks after the wrapper,
+is kept byte for byte; <head> is dropped, as viewer.js does.
+
+The document is tokenized once with html.parser; only <div> nesting and the
+<body> boundaries are tracked, so there is no backtracking regex over the body
+and a wrapper's closing tag is the </div> that actually matches it.
+
+Only the first bytes of each file are read to decide whether it is a full
+document, so running this over the whole tree on every deploy is cheap.
+Full documents without an explanation-area or viewer-container wrapper are
+treated as standalone pages (e.g. pv-graph.html, embedded via <iframe>) and
+left untouched.
+
+Usage:
+  python3 fix_html_fragments.py                 # fix every full document under data/explanations
+  python3 fix_html_fragments.py --dry-run       # show a unified diff, write nothing
+  python3 fix_html_fragments.py --check         # exit 1 if any file still needs fixing
+  python3 fix_html_fragments.py path/to/a.html  # only the given files/directories
+  python3 fix_html_fragments.py --profile       # time each stage (runs in one process)
+"""
+
+import argparse
+import difflib
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from build_profile import add_profile_argument, count, profiling, read_text, stage
+from material_store import atomic_write_text
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+HEAD_BYTES = 512
+FULL_DOCUMENT_RE = re.compile(r'^\s*(<!DOCTYPE\s+html|<html)', re.IGNORECASE)
+
+
+WRAPPER_CLASSES = ("viewer-container", "explanation-area")
+
+
+class FragmentLocator(HTMLParser):
+    """Single-pass tokenizer that records the body range and the wrapper tags to drop."""
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=False)
+        self.text = text
+        self._line_starts = [0] + [m.end() for m in re.finditer(r'\n', text)]
+        self.depth = 0
+        # div depths of the wrappers that are still open
+        self.open_wrappers: List[int] = []
+        # (start, end) offsets of the wrapper start/end tags to remove
+        self.cuts: List[Tuple[int, int]] = []
+        self.html_start: Optional[int] = None
+        self.head_end: Optional[int] = None
+        self.body_start: Optional[int] = None
+        self.end: Optional[int] = None
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def _starttag_end(self) -> int:
+        return self._offset() + len(self.get_starttag_text() or "")
+
+    def _endtag_end(self) -> int:
+        return self.text.index(">", self._offset()) + 1
+
+    def handle_starttag(self, tag, attrs):
+        count("tags")
+        if tag == "html" and self.html_start is None:
+            self.html_start = self._starttag_end()
+        elif tag == "body" and self.body_start is None:
+            self.body_start = self._starttag_end()
+        elif tag == "div":
+            self.depth += 1
+            classes = (dict(attrs).get("class") or "").split()
+            if any(name in classes for name in WRAPPER_CLASSES):
+                self.open_wrappers.append(self.depth)
+                self.cuts.append((self._offset(), self._starttag_end()))
+
+    def handle_endtag(self, tag):
+        count("tags")
+        if tag == "head" and self.head_end is None:
+            self.head_end = self._endtag_end()
+        elif tag in ("body", "html") and self.end is None:
+            self.end = self._offset()
+        elif tag == "div":
+            if self.open_wrappers and self.open_wrappers[-1] == self.depth:
+                self.open_wrappers.pop()
+                self.cuts.append((self._offset(), self._endtag_end()))
+            self.depth = max(self.depth - 1, 0)
+
+    def _whole_line(self, start: int, end: int) -> Tuple[int, int]:
+        """Widen a cut to its whole line when the tag is alone on that line."""
+        line_start = self.text.rfind("\n", 0, start) + 1
+        line_end = self.text.find("\n", end)
+        line_end = len(self.text) if line_end < 0 else line_end + 1
+        if self.text[line_start:start].strip() or self.text[end:line_end].strip():
+            return start, end
+        return line_start, line_end
+
+    def locate(self) -> Optional[str]:
+        """Return the fragment, or None when the document has no explanation wrapper."""
+        self.feed(self.text)
+        self.close()
+        if not self.cuts:
+            return None
+        # Without <body>, everything after </head> (or <html>) is content
+        start = next((pos for pos in (self.body_start, self.head_end, self.html_start) if pos is not None), 0)
+        end = len(self.text) if self.end is None else self.end
+        parts = []
+        pos = start
+        for cut in sorted(self.cuts):
+            cut_start, cut_end = self._whole_line(*cut)
+            cut_start = max(cut_start, pos)
+            if cut_end > end:
+                continue
+            parts.append(self.text[pos:cut_start])
+            pos = cut_end
+        parts.append(self.text[pos:end])
+        return "".join(parts).strip()
 
-files_to_fix = [
-    'data/explanations/exam_private/ritsumei/2026/2026_ritsumei_3.html',
-    'data/explanations/exam_private/doshisha/2026/pv-graph.html',
-    'data/explanations/exam_private/doshisha/2026/2026_doshisha_3.html',
-    'data/explanations/exam_private/doshisha/2026/2026_doshisha_2.html',
-    'data/explanations/exam_national/tsukuba/2024/2024_3.html',
-    'data/explanations/exam_private/doshisha/2026/2026_doshisha_1.html',
-    'data/explanations/exam_private/ritsumei/2026/2026_ritsumei_1.html',
-    'data/explanations/exam_private/ritsumei/2026/2026_ritsumei_2.html',
-    'data/explanations/exam_national/kyushu/2018/2018_zenki_1.html',
-    'data/explanations/exam_private/tokyo_rika/2025/2025_souzou_1.html',
-    'data/explanations/exam_national/chiba/2021/2021_zenki_1.html',
-    'data/explanations/exam_private/tokyo_rika/2023/2023_kou_1.html',
-    'data/explanations/exam_national/tohoku/2017/2017_zenki_1.html',
-]
-
-for filepath in files_to_fix:
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found, skipping")
-        continue
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Check if it's a full HTML document
-    if not content.strip().startswith('<!DOCTYPE html>') and not content.strip().startswith('<html'):
-        print(f"Skipping {filepath} - not a full HTML document")
-        continue
-    
-    # Extract content from <div class="explanation-area">
-    # Pattern: find <div class="explanation-area"> and extract its content until </div>
-    match = re.search(r'<div\s+class=["\']explanation-area["\'][^>]*>([\s\S]*?)</div>\s*</div>\s*</body>', content, re.DOTALL)
-    
-    if match:
-        fragment = match.group(1).strip()
-        # Write the fragment back
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(fragment)
-        print(f"Fixed: {filepath}")
+
+def extract_fragment(text: str) -> Optional[str]:
+    """Return the fragment for a full document, or None for standalone pages."""
+    return FragmentLocator(text).locate()
+
+
+def is_full_document(path: Path) -> bool:
+    """Check the first bytes of a file for <!DOCTYPE html> / <html>."""
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+    count("files_read")
+    count("bytes_read", len(head))
+    count("regex")
+    return bool(FULL_DOCUMENT_RE.match(head.decode('utf-8', errors='ignore')))
+
+
+def discover(targets: Iterable[Path]) -> List[Path]:
+    """List the HTML files under the targets that are full documents."""
+    found = []
+    for target in targets:
+        files = [target] if target.is_file() else sorted(target.rglob("*.html"))
+        count("html_files", len(files))
+        for path in files:
+            try:
+                if is_full_document(path):
+                    found.append(path)
+            except OSError as e:
+                print(f"Warning: {path}: {e}")
+    return found
+
+
+def process_file(filepath: str, dry_run: bool) -> Tuple[str, str, str]:
+    """Normalize one file. Returns (status, path, diff)."""
+    path = Path(filepath)
+    with stage("read"):
+        content = read_text(path)
+
+    with stage("locate"):
+        fragment = extract_fragment(content)
+    if fragment is None:
+        return "standalone", filepath, ""
+    # Keep the file's line ending at the end
+    if content.endswith("\n"):
+        fragment += "\r\n" if content.endswith("\r\n") else "\n"
+
+    diff = ""
+    if dry_run:
+        with stage("diff"):
+            diff = "".join(difflib.unified_diff(
+                content.splitlines(keepends=True),
+                fragment.splitlines(keepends=True),
+                fromfile=f"a/{filepath}", tofile=f"b/{filepath}",
+            ))
     else:
-        # Fallback: try to extract from <body> tag
-        match = re.search(r'<body[^>]*>([\s\S]*?)</body>', content, re.DOTALL)
-        if match:
-            body_content = match.group(1).strip()
-            # Remove viewer-container and explanation-area wrappers
-            body_content = re.sub(r'^\s*<div\s+class=["\']viewer-container["\'][^>]*>\s*', '', body_content, flags=re.MULTILINE)
-            body_content = re.sub(r'^\s*<div\s+class=["\']explanation-area["\'][^>]*>\s*', '', body_content, flags=re.MULTILINE)
-            body_content = re.sub(r'\s*</div>\s*</div>\s*$', '', body_content, flags=re.MULTILINE)
-            body_content = body_content.strip()
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(body_content)
-            print(f"Fixed (fallback): {filepath}")
+        with stage("write"):
+            # Keeps the original file mode (a bare mkstemp file would be 0600)
+            atomic_write_text(path, fragment)
+    return "fixed", filepath, diff
+
+
+def run(args) -> None:
+    with stage("discover"):
+        candidates = discover(args.paths or [EXPLANATIONS_ROOT])
+    dry_run = args.dry_run or args.check
+
+    if args.jobs <= 1 or len(candidates) <= 1:
+        results = [process_file(str(p), dry_run) for p in candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(process_file, [str(p) for p in candidates], [dry_run] * len(candidates)))
+
+    pending = 0
+    for status, filepath, diff in results:
+        if status == "standalone":
+            print(f"Skipping {filepath} - standalone page (no explanation-area)")
+            continue
+        pending += 1
+        if args.check:
+            print(f"Needs fixing: {filepath}")
+        elif args.dry_run:
+            sys.stdout.write(diff)
         else:
-            print(f"Warning: Could not extract content from {filepath}")
+            print(f"Fixed: {filepath}")
+
+    if args.check:
+        sys.exit(1 if pending else 0)
+    print(f"Done! ({pending} file(s){' would be' if dry_run else ''} fixed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert full-document explanation HTML into fragments")
+    parser.add_argument("paths", nargs="*", type=Path, help="files or directories (default: data/explanations)")
+    parser.add_argument("--dry-run", action="store_true", help="print a unified diff instead of writing")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any file needs fixing; write nothing")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        # Worker processes are invisible to cProfile and to the stage timers
+        args.jobs = 1
+
+    with profiling(args.profile, "fix_html_fragments"):
+        run(args)
+
 
-print("Done!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service Worker 用のアセットマニフェストを生成するスクリプト
+data/explanations・data/materials・data/speech の全ファイルの内容ハッシュとサイズを
+data/asset-manifest.json に書き出す。sw.js は前回キャッシュしたマニフェストと比較し、
+ハッシュが変わったファイルだけをキャッシュから削除・再取得する。
+ハッシュとサイズは publish_assets.py が dist/ に書き出す中身（縮小後など、実際に配信するもの）から求める。
+
+使い方:
+  python3 generate_asset_manifest.py            # マニフェストを更新し、前回からの変更を表示
+  python3 generate_asset_manifest.py --dry-run  # 書き込まずに変更だけ表示
+  python3 generate_asset_manifest.py --verify   # データを追加・変更したのにマニフェストが古ければ終了コード1
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from publish_assets import Publisher
+
+ASSET_ROOTS = [Path("data/explanations"), Path("data/materials"), Path("data/speech")]
+MANIFEST_PATH = Path("data/asset-manifest.json")
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    """内容の SHA-256（先頭16桁）"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def collect_assets(roots: List[Path] = ASSET_ROOTS, publisher: Optional[Publisher] = None) -> Dict[str, List]:
+    """対象ディレクトリ配下の全ファイルを {パス: [配信する中身のハッシュ, サイズ]} にまとめる"""
+    publisher = publisher or Publisher()
+    assets = {}
+    for root in roots:
+        if not root.exists():
+            continue
+        for path in sorted(root.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            key = str(path).replace("\\", "/")
+            data = publisher.render(path)
+            assets[key] = [hash_bytes(data), len(data)]
+    return assets
+
+
+def build_manifest(assets: Dict[str, List]) -> Dict:
+    """アセット一覧から版（全体のハッシュ）付きのマニフェストを作る"""
+    digest = hashlib.sha256()
+    for key, (file_hash, _) in assets.items():
+        digest.update(f"{key}:{file_hash}\n".encode('utf-8'))
+    return {
+        "version": MANIFEST_VERSION,
+        "hash": digest.hexdigest()[:16],
+        "assets": assets,
+    }
+
+
+def serialize_manifest(manifest: Dict) -> str:
+    return json.dumps(manifest, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def diff_manifests(old: Optional[Dict], new: Dict) -> Dict[str, List[str]]:
+    """前回のマニフェストからの追加・変更・削除パスを求める"""
+    old_assets = (old or {}).get("assets", {})
+    new_assets = new["assets"]
+    return {
+        "added": [p for p in new_assets if p not in old_assets],
+        "changed": [p for p in new_assets if p in old_assets and old_assets[p][0] != new_assets[p][0]],
+        "removed": [p for p in old_assets if p not in new_assets],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service Worker 用のアセットマニフェストを生成")
+    parser.add_argument("--dry-run", action="store_true", help="書き込まずに前回からの変更だけ表示")
+    parser.add_argument("--verify", action="store_true", help="マニフェストが最新か確認のみ行う（古ければ終了コード1）")
+    args = parser.parse_args()
+
+    previous = load_manifest()
+    publisher = Publisher()
+    manifest = build_manifest(collect_assets(publisher=publisher))
+    publisher.save()
+    changes = diff_manifests(previous, manifest)
+
+    labels = {"added": "追加", "changed": "変更", "removed": "削除"}
+    for kind, paths in changes.items():
+        for path in paths:
+            print(f"  {labels[kind]}: {path}")
+    total = sum(len(paths) for paths in changes.values())
+    print(f"前回からの変更: {total} 件（追加 {len(changes['added'])} / 変更 {len(changes['changed'])} / 削除 {len(changes['removed'])}）")
+
+    if args.verify:
+        if previous != manifest:
+            print(f"NG: {MANIFEST_PATH} が古くなっています。python3 generate_asset_manifest.py を実行してください。")
+            sys.exit(1)
+        print(f"OK: {MANIFEST_PATH} は最新です（hash: {manifest['hash']}）")
+        return
+    if args.dry_run:
+        return
+    if previous == manifest:
+        print(f"{MANIFEST_PATH} は最新です（hash: {manifest['hash']}）")
+        return
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        f.write(serialize_manifest(manifest))
+    print(f"マニフェストを更新しました: {MANIFEST_PATH}（{len(manifest['assets'])} ファイル, hash: {manifest['hash']}）")
+
+
+if __name__ == "__main__":
+    main()
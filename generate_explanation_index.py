@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解説パス→問題の逆引きインデックスを生成するスクリプト
+data/manifest.json に載っている全教材を走査し、explanationPath から
+(教材, 科目, 分野, 問題番号) の位置を引ける data/explanation-index.json を出力する。
+viewer.js はこのファイルを1回取得すれば、該当する教材JSONだけを読み込めばよい。
+配信するファイルなので、viewer.js が使わない対応（問題ID→位置など）は含めない。
+
+使い方:
+  python3 generate_explanation_index.py           # インデックスを生成
+  python3 generate_explanation_index.py --verify  # 教材JSONと比べて古くないか確認（古ければ終了コード1）
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+MANIFEST_PATH = Path("data/manifest.json")
+INDEX_PATH = Path("data/explanation-index.json")
+INDEX_VERSION = 2
+
+
+def load_manifest(manifest_path: Path = MANIFEST_PATH) -> List[Dict]:
+    """manifest.json を読み込む"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, list):
+        raise ValueError(f"{manifest_path} の形式が不正です（配列ではありません）")
+    return manifest
+
+
+def read_material(material_path: Path) -> Tuple[bytes, Dict]:
+    """教材JSONを読み込み、ハッシュ計算用の生バイト列とパース結果を返す"""
+    raw = material_path.read_bytes()
+    return raw, json.loads(raw.decode('utf-8'))
+
+
+def build_index(manifest: List[Dict], reader: Callable[[Path], Tuple[bytes, Dict]] = read_material) -> Dict:
+    """全教材を走査して逆引きインデックスを組み立てる（reader は読み込み済みの教材を返すキャッシュに差し替えられる）"""
+    materials: List[List[str]] = []
+    sources: Dict[str, str] = {}
+    paths: Dict[str, List[int]] = {}
+
+    for entry in manifest:
+        material_id = entry.get("id", "")
+        material_path = entry.get("path", "")
+        if not material_path:
+            continue
+        try:
+            raw, data = reader(Path(material_path))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {material_path}: {e}")
+            continue
+
+        m = len(materials)
+        materials.append([material_id, material_path])
+        sources[material_id] = hashlib.sha256(raw).hexdigest()[:16]
+
+        for s, subject in enumerate(data.get("subjects", [])):
+            for f, field in enumerate(subject.get("fields", [])):
+                for p, problem in enumerate(field.get("problems", [])):
+                    path = problem.get("explanationPath")
+                    if path and path not in paths:
+                        # 同じ解説を複数の教材が参照する場合は manifest 順で最初のものを採用
+                        paths[path] = [m, s, f, p]
+
+    digest = hashlib.sha256()
+    for material_id, material_path in materials:
+        digest.update(f"{material_id}:{material_path}:{sources[material_id]}\n".encode('utf-8'))
+
+    return {
+        "version": INDEX_VERSION,
+        "hash": digest.hexdigest()[:16],
+        "sources": sources,
+        "materials": materials,
+        "paths": paths,
+    }
+
+
+def serialize_index(index: Dict) -> str:
+    """インデックスをコンパクトなJSON文字列にする"""
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def load_existing_index(index_path: Path = INDEX_PATH) -> Optional[Dict]:
+    """既存のインデックスを読み込む（無い・壊れている場合は None）"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify(manifest: List[Dict], index_path: Path = INDEX_PATH) -> int:
+    """インデックスが教材JSONと一致しているか確認し、終了コードを返す"""
+    existing = load_existing_index(index_path)
+    if existing is None:
+        print(f"NG: {index_path} がありません。python3 generate_explanation_index.py を実行してください。")
+        return 1
+
+    expected = build_index(manifest)
+    if existing.get("version") != expected["version"] or existing.get("hash") != expected["hash"]:
+        old_sources = existing.get("sources", {})
+        changed = [
+            material_id for material_id, source_hash in expected["sources"].items()
+            if old_sources.get(material_id) != source_hash
+        ]
+        removed = [material_id for material_id in old_sources if material_id not in expected["sources"]]
+        print(f"NG: {index_path} が古くなっています。")
+        for material_id in changed:
+            print(f"  - 変更あり: {material_id}")
+        for material_id in removed:
+            print(f"  - 削除済み: {material_id}")
+        return 1
+
+    if existing != expected:
+        print(f"NG: {index_path} の内容が教材JSONと一致しません（手動編集された可能性があります）。")
+        return 1
+
+    print(f"OK: {index_path} は最新です（hash: {expected['hash']}）")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説パス→問題の逆引きインデックスを生成")
+    parser.add_argument("--verify", action="store_true", help="インデックスが最新か確認のみ行う")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+
+    if args.verify:
+        sys.exit(verify(manifest))
+
+    index = build_index(manifest)
+    text = serialize_index(index)
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+    print(f"インデックスを更新しました: {INDEX_PATH}")
+    print(f"教材数: {len(index['materials'])}")
+    print(f"解説パス数: {len(index['paths'])}")
+    print(f"サイズ: {len(text.encode('utf-8'))} bytes（hash: {index['hash']}）")
+
+
+if __name__ == "__main__":
+    main()
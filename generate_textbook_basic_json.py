@@ -5,11 +5,18 @@
 スプレッドシートのデータと既存の解説ファイルを参照して、完全な問題リストを作成
 """
 
+import argparse
+import hashlib
 import json
 import os
 import re
+import unicodedata
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_profile import add_profile_argument, count, profiling, read_bytes, read_text, stage
+from material_store import MaterialStore
+from problem_number import ProblemNumber, file_number, from_file_number, parse_problem_number, sort_key
 
 # 物理基礎の単元・章のマッピング（textbook_basic.jsonから）
 FIELD_MAPPING = {
@@ -21,24 +28,146 @@ FIELD_MAPPING = {
     "03/02": "第3編 波 / 第2章 音",
 }
 
+JSON_PATH = Path("data/materials/textbook_basic.json")
+EXPLANATIONS_BASE = Path("data/explanations/textbook_basic")
+# textbook_basic.json がないときの初期値
+DEFAULT_MATERIAL = {
+    "materialName": "物理基礎",
+    "subjects": [
+        {
+            "subjectName": "物理基礎",
+            "folderName": "",
+            "fields": []
+        }
+    ]
+}
+
+# タイトル抽出結果のキャッシュ（リポジトリには含めない）
+CACHE_PATH = Path(".build-cache/titles.json")
+CACHE_VERSION = 1
+
 # スプレッドシートのデータ構造（物理基礎のデータを想定）
 # 実際のデータはスプレッドシートから取得する必要があるが、
 # ここでは既存の解説ファイルから推測する
 
-def extract_problem_info_from_html(file_path: Path) -> Optional[Dict]:
-    """HTMLファイルから問題情報を抽出"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+class TitleCache:
+    """解説HTMLから抽出したタイトルをパス・サイズ・mtime・内容ハッシュで記録するキャッシュ
+
+    サイズと mtime が一致すればファイルを開かずに結果を返し、
+    mtime だけが変わった場合は内容ハッシュが一致すれば正規表現の処理を省く。
+    """
+
+    def __init__(self, cache_path: Path = CACHE_PATH):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict] = {}
+        self.seen: Set[str] = set()
+        self.hits = 0
+        self.rehashed = 0
+        self.misses = 0
+        self.evicted = 0
+        self.dirty = False
+
+    def load(self) -> "TitleCache":
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def lookup(self, file_path: Path) -> Optional[Dict]:
+        """キャッシュを使ってHTMLファイルの問題情報を返す"""
+        key = str(file_path).replace("\\", "/")
+        self.seen.add(key)
+        try:
+            count("stat")
+            st = file_path.stat()
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+            return None
+
+        cached = self.entries.get(key)
+        if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime_ns:
+            self.hits += 1
+            count("cache_hit")
+            return cached["info"]
+
+        try:
+            raw = read_bytes(file_path)
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+            return None
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if cached and cached["hash"] == digest:
+            # 内容は同じ（touch されただけ）なので抽出結果を再利用
+            self.rehashed += 1
+            count("cache_rehash")
+            info = cached["info"]
+        else:
+            self.misses += 1
+            count("cache_miss")
+            info = parse_problem_info(raw.decode('utf-8', errors='replace'))
+
+        self.entries[key] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": digest, "info": info}
+        self.dirty = True
+        return info
+
+    def evict_missing(self, prefix: str) -> None:
+        """今回の走査で見つからなかった prefix 配下のエントリ（削除されたファイル）を除去"""
+        for key in list(self.entries):
+            if key.startswith(prefix) and key not in self.seen:
+                del self.entries[key]
+                self.evicted += 1
+                self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    def print_stats(self) -> None:
+        total = self.hits + self.rehashed + self.misses
+        print("キャッシュ統計:")
+        print(f"  対象ファイル数: {total}")
+        print(f"  ヒット（stat一致・読み込みなし）: {self.hits}")
+        print(f"  ヒット（内容ハッシュ一致）: {self.rehashed}")
+        print(f"  ミス（再抽出）: {self.misses}")
+        print(f"  削除済みファイルの除去: {self.evicted}")
+
+
+# 実行中に使うキャッシュ（main() で設定。None のときは毎回ファイルを読む）
+_title_cache: Optional[TitleCache] = None
+
+def parse_problem_info(content: str) -> Optional[Dict]:
+    """HTML文字列から問題情報を抽出"""
+    with stage("extract_title"):
         # タイトルを抽出
+        count("regex")
         title_match = re.search(r'<h2[^>]*class=["\']prob-title-sub["\'][^>]*>(.*?)</h2>', content, re.DOTALL)
         if not title_match:
+            count("regex")
             title_match = re.search(r'<h3[^>]*>(.*?)</h3>', content, re.DOTALL)
-        
+
         if title_match:
+            count("regex")
             title = re.sub(r'<[^>]+>', '', title_match.group(1)).strip()
             return {"title": title}
+        return None
+
+def extract_problem_info_from_html(file_path: Path) -> Optional[Dict]:
+    """HTMLファイルから問題情報を抽出"""
+    if _title_cache is not None:
+        return _title_cache.lookup(file_path)
+    try:
+        return parse_problem_info(read_text(file_path))
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
     return None
@@ -52,6 +181,7 @@ def find_existing_explanations() -> Dict[str, Dict]:
         return explanations
     
     for html_file in base_path.rglob("*.html"):
+        count("html_files")
         # パスからfolderIdを抽出 (例: 03/01/11.html -> 03/01)
         parts = html_file.parts
         if len(parts) >= 3:
@@ -71,50 +201,82 @@ def find_existing_explanations() -> Dict[str, Dict]:
     
     return explanations
 
-def parse_problem_number(problem_num: str) -> Tuple[str, Optional[int]]:
-    """問題番号を解析（例題1 -> ('例題', 1), 問3 -> ('問', 3)）"""
-    if problem_num.startswith("例題"):
-        num = re.search(r'\d+', problem_num)
-        return ("例題", int(num.group()) if num else None)
-    elif problem_num.startswith("類題"):
-        num = re.search(r'\d+', problem_num)
-        return ("類題", int(num.group()) if num else None)
-    elif problem_num.startswith("問"):
-        num = re.search(r'\d+', problem_num)
-        return ("問", int(num.group()) if num else None)
-    elif problem_num.startswith("演習問題"):
-        num = re.search(r'\d+', problem_num)
-        return ("演習問題", int(num.group()) if num else None)
-    elif problem_num.startswith("思考学習"):
-        return ("思考学習", None)
-    else:
-        # 問a, 問b, 問abc などの場合
-        return ("問", problem_num.replace("問", "").strip())
-
 def generate_problem_id(folder_id: str, chapter: int, section: int, page: int, problem_num: str) -> str:
     """問題IDを生成"""
     # 既存のID形式に合わせる: basic_03_01_11
     folder_parts = folder_id.split("/")
-    problem_type, problem_index = parse_problem_number(problem_num)
+    number = file_number(parse_problem_number(problem_num))
     
-    if problem_index is not None:
-        # 例題1 -> 11, 類題1 -> 12, 問3 -> 03 など
-        if problem_type == "例題":
-            id_suffix = f"{problem_index:02d}"
-        elif problem_type == "類題":
-            id_suffix = f"{problem_index + 10:02d}"  # 類題1 -> 11, 類題2 -> 12
-        elif problem_type == "問":
-            id_suffix = f"{problem_index:02d}"
-        elif problem_type == "演習問題":
-            id_suffix = f"{problem_index + 20:02d}"  # 演習問題1 -> 21
-        else:
-            id_suffix = f"{problem_index:02d}"
+    if number is not None:
+        # 例題1 -> 01, 類題1 -> 11, 問3 -> 03, 演習問題1 -> 21
+        id_suffix = f"{number:02d}"
     else:
         # 問a, 問b などの場合
         id_suffix = problem_num.replace("問", "").replace(" ", "_")
     
     return f"basic_{folder_parts[0]}_{folder_parts[1]}_{id_suffix}"
 
+def explanation_file_name(parsed: ProblemNumber) -> Optional[str]:
+    """問題番号から解説ファイル名を推測（例題1 -> 01.html, 類題1 -> 11.html, 演習問題1 -> 21.html）"""
+    number = file_number(parsed)
+    return f"{number:02d}.html" if number is not None else None
+
+def normalize_title_token(text: str) -> str:
+    """タイトル照合用の正規化（全角半角の統一・小文字化・空白除去）"""
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', text)).lower()
+
+class ExplanationLookup:
+    """既存の解説ファイルを問題番号・タイトルから O(1) で引くための索引
+
+    find_existing_explanations() の結果から1回だけ構築し、
+    create_problem_entry() の呼び出しごとに全件走査やファイル存在確認をしないようにする。
+    """
+
+    def __init__(self, existing_explanations: Dict[str, Dict]):
+        # (folderId, 問題番号) -> パス（解説タイトルの「：」より前を解析したもの）
+        self.by_number: Dict[Tuple[str, ProblemNumber], str] = {}
+        # (folderId, 正規化したタイトル) -> パス（「：」の前後それぞれを登録）
+        self.by_title: Dict[Tuple[str, str], str] = {}
+        # (folderId, ファイル名) -> パス
+        self.by_file: Dict[Tuple[str, str], str] = {}
+
+        for key, exp_info in existing_explanations.items():
+            folder_id, _, file_name = key.rpartition("/")
+            path = exp_info["path"]
+            self.by_file.setdefault((folder_id, file_name), path)
+
+            exp_title = exp_info.get("title", "")
+            number_part, _, title_part = exp_title.partition("：")
+            if number_part:
+                parsed = parse_problem_number(number_part.strip())
+                if parsed.index is not None:
+                    self.by_number.setdefault((folder_id, parsed), path)
+            for token in (number_part, title_part):
+                token = normalize_title_token(token)
+                if token:
+                    self.by_title.setdefault((folder_id, token), path)
+
+    def find(self, folder_id: str, problem_num: str, title: str) -> Optional[str]:
+        """問題に対応する解説ファイルのパスを返す（なければ None）"""
+        parsed = parse_problem_number(problem_num)
+        if parsed.index is not None:
+            path = self.by_number.get((folder_id, parsed))
+            if path:
+                return path
+
+        for token in (problem_num, title):
+            token = normalize_title_token(token or "")
+            if token:
+                path = self.by_title.get((folder_id, token))
+                if path:
+                    return path
+
+        # 見つからない場合は、ファイル名パターンで検索
+        file_name = explanation_file_name(parsed)
+        if file_name:
+            return self.by_file.get((folder_id, file_name))
+        return None
+
 def create_problem_entry(
     folder_id: str,
     chapter: int,
@@ -122,41 +284,13 @@ def create_problem_entry(
     page: int,
     problem_num: str,
     title: str,
-    existing_explanations: Dict[str, Dict]
+    explanation_lookup: ExplanationLookup
 ) -> Dict:
     """問題エントリを作成"""
     problem_id = generate_problem_id(folder_id, chapter, section or 0, page, problem_num)
     
     # 既存の解説ファイルを検索
-    explanation_path = None
-    for key, exp_info in existing_explanations.items():
-        if folder_id in key:
-            # タイトルや問題番号でマッチングを試みる
-            exp_title = exp_info.get("title", "").lower()
-            if problem_num.lower() in exp_title or title.lower() in exp_title:
-                explanation_path = exp_info["path"]
-                break
-    
-    # 見つからない場合は、ファイル名パターンで検索
-    if not explanation_path:
-        folder_parts = folder_id.split("/")
-        base_path = Path(f"data/explanations/textbook_basic/{folder_parts[0]}/{folder_parts[1]}")
-        if base_path.exists():
-            # ファイル名パターンで検索
-            problem_type, problem_index = parse_problem_number(problem_num)
-            if problem_index is not None:
-                if problem_type == "例題":
-                    file_pattern = f"{problem_index:02d}.html"
-                elif problem_type == "類題":
-                    file_pattern = f"{problem_index + 10:02d}.html"
-                elif problem_type == "演習問題":
-                    file_pattern = f"{problem_index + 20:02d}.html"
-                else:
-                    file_pattern = f"{problem_index:02d}.html"
-                
-                potential_file = base_path / file_pattern
-                if potential_file.exists():
-                    explanation_path = str(potential_file).replace("\\", "/")
+    explanation_path = explanation_lookup.find(folder_id, problem_num, title)
     
     entry = {
         "id": problem_id,
@@ -177,15 +311,14 @@ def ensure_example_before_related(problems: List[Dict], current_index: int) -> b
     current_title = current.get("title", "")
     
     # 類題の場合は、直前が対応する例題か確認
-    if "類題" in current_title:
-        # 類題の番号を抽出
-        match = re.search(r'類題(\d+)', current_title)
-        if match:
-            example_num = int(match.group(1))
+    parsed = parse_problem_number(current_title)
+    if parsed.kind == "類題":
+        example_num = parsed.number
+        if example_num is not None:
             # 直前の問題を確認
             prev = problems[current_index - 1]
-            prev_title = prev.get("title", "")
-            if f"例題{example_num}" not in prev_title:
+            previous = parse_problem_number(prev.get("title", ""))
+            if (previous.kind, previous.number) != ("例題", example_num):
                 # 例題が抜けているので追加
                 example_entry = {
                     "id": prev["id"].replace("類題", "例題").replace("rui", "rei"),
@@ -195,26 +328,95 @@ def ensure_example_before_related(problems: List[Dict], current_index: int) -> b
                 return True
     return False
 
-def main():
-    # 既存の解説ファイルを検索
-    existing_explanations = find_existing_explanations()
+def problem_sort_key(p: Dict) -> Tuple[int, int]:
+    """問題の並び順キー（例題・基本例題 -> 類題 -> 問 -> 演習問題の順、詳しくは problem_number.sort_key。解析結果はタイトルごとにメモ化される）"""
+    return sort_key(p.get("title", ""))
+
+def sort_problems(problems: List[Dict]) -> None:
+    """問題をソートし、類題の前に対応する例題があるようにする"""
+    problems.sort(key=problem_sort_key)
     
-    # 既存のJSONを読み込み
-    json_path = Path("data/materials/textbook_basic.json")
-    if json_path.exists():
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        data = {
-            "materialName": "物理基礎",
-            "subjects": [
-                {
-                    "subjectName": "物理基礎",
-                    "folderName": "",
-                    "fields": []
-                }
-            ]
+    # 類題の前に例題があるか確認
+    i = 0
+    while i < len(problems):
+        if ensure_example_before_related(problems, i):
+            i += 1  # 追加されたので次へ
+        i += 1
+
+def ensure_field(subject: Dict, fields_dict: Dict[str, Dict], folder_id: str) -> Dict:
+    """分野がなければ追加して返す"""
+    if folder_id not in fields_dict:
+        folder, _, section = folder_id.partition("/")
+        field_name = FIELD_MAPPING.get(folder_id, f"第{folder}編 / 第{section}章")
+        fields_dict[folder_id] = {
+            "fieldName": field_name,
+            "folderId": folder_id,
+            "problems": []
         }
+        subject["fields"].append(fields_dict[folder_id])
+    return fields_dict[folder_id]
+
+def problem_from_file(html_file: Path) -> Dict:
+    """解説HTML（data/explanations/textbook_basic/<編>/<章>/<ファイル>.html）から問題エントリを作る"""
+    file_name = html_file.stem
+    rel_path = str(html_file).replace("\\", "/")
+    
+    # ファイル名から問題情報を推測
+    # 例: 11.html -> 例題1, 12.html -> 類題1
+    if file_name.isdigit():
+        problem_num = from_file_number(int(file_name))
+    elif file_name.startswith("001_"):
+        # 001_p12_ex1.html 形式
+        match = re.search(r'ex(\d+)', file_name)
+        if match:
+            problem_num = f"例題{match.group(1)}"
+        else:
+            problem_num = "例題1"
+    else:
+        problem_num = file_name
+    
+    # 問題情報を抽出
+    problem_info = extract_problem_info_from_html(html_file)
+    title = problem_info.get("title", "") if problem_info else ""
+    
+    return {
+        "id": f"basic_{html_file.parent.parent.name}_{html_file.parent.name}_{file_name}",
+        "title": title or f"{problem_num}",
+        "explanationPath": rel_path
+    }
+
+def add_problem_file(data: Dict, html_file: Path) -> bool:
+    """1つの解説HTMLの問題を教材に追加する（同じIDか同じ解説パスの問題がすでにあれば何もせず False）
+
+    watch_explanations.py が保存された解説ごとに呼ぶ。ほかの問題は動かさず、並び順の位置に1件だけ差し込む
+    （sort_problems のような分野全体の並べ替え・例題の補完は generate() に任せる）。
+    """
+    subject = data["subjects"][0]
+    fields_dict = {field["folderId"]: field for field in subject["fields"]}
+    folder_id = f"{html_file.parent.parent.name}/{html_file.parent.name}"
+    problems = ensure_field(subject, fields_dict, folder_id)["problems"]
+    entry = problem_from_file(html_file)
+    if any(p["id"] == entry["id"] or p.get("explanationPath") == entry["explanationPath"] for p in problems):
+        return False
+    key = problem_sort_key(entry)
+    position = len(problems)
+    while position > 0 and problem_sort_key(problems[position - 1]) > key:
+        position -= 1
+    problems.insert(position, entry)
+    return True
+
+def generate(args) -> None:
+    global _title_cache
+
+    if not args.no_cache:
+        with stage("load_cache"):
+            _title_cache = TitleCache().load()
+
+    # 既存のJSONを読み込み
+    json_path = JSON_PATH
+    store = MaterialStore()
+    with stage("load_json"):
+        data = store.load(json_path, default=DEFAULT_MATERIAL)
     
     # 各フィールドに対して問題を追加
     # スプレッドシートのデータは直接取得できないため、
@@ -225,7 +427,7 @@ def main():
     fields_dict = {field["folderId"]: field for field in subject["fields"]}
     
     # 各フォルダの解説ファイルをスキャン
-    base_path = Path("data/explanations/textbook_basic")
+    base_path = EXPLANATIONS_BASE
     if base_path.exists():
         for folder_dir in base_path.iterdir():
             if not folder_dir.is_dir():
@@ -237,101 +439,56 @@ def main():
                 
                 folder_id = f"{folder_dir.name}/{section_dir.name}"
                 
-                if folder_id not in fields_dict:
-                    # フィールドが存在しない場合は追加
-                    field_name = FIELD_MAPPING.get(folder_id, f"第{folder_dir.name}編 / 第{section_dir.name}章")
-                    fields_dict[folder_id] = {
-                        "fieldName": field_name,
-                        "folderId": folder_id,
-                        "problems": []
-                    }
-                    subject["fields"].append(fields_dict[folder_id])
-                
-                # このフォルダの既存の問題を取得
-                problems = fields_dict[folder_id]["problems"]
+                # このフォルダの既存の問題を取得（フィールドが存在しない場合は追加）
+                problems = ensure_field(subject, fields_dict, folder_id)["problems"]
                 existing_ids = {p["id"] for p in problems}
                 
                 # HTMLファイルをスキャンして問題を追加
                 for html_file in sorted(section_dir.glob("*.html")):
-                    file_name = html_file.stem
-                    rel_path = str(html_file).replace("\\", "/")
-                    
-                    # ファイル名から問題情報を推測
-                    # 例: 11.html -> 例題1, 12.html -> 類題1
-                    if file_name.isdigit():
-                        file_num = int(file_name)
-                        if 1 <= file_num <= 10:
-                            problem_num = f"例題{file_num}"
-                        elif 11 <= file_num <= 20:
-                            problem_num = f"類題{file_num - 10}"
-                        elif 21 <= file_num <= 30:
-                            problem_num = f"演習問題{file_num - 20}"
-                        else:
-                            problem_num = f"問{file_num}"
-                    elif file_name.startswith("001_"):
-                        # 001_p12_ex1.html 形式
-                        match = re.search(r'ex(\d+)', file_name)
-                        if match:
-                            problem_num = f"例題{match.group(1)}"
-                        else:
-                            problem_num = "例題1"
-                    else:
-                        problem_num = file_name
-                    
-                    # 問題情報を抽出
-                    problem_info = extract_problem_info_from_html(html_file)
-                    title = problem_info.get("title", "") if problem_info else ""
-                    
-                    # 問題IDを生成
-                    problem_id = f"basic_{folder_dir.name}_{section_dir.name}_{file_name}"
+                    entry = problem_from_file(html_file)
                     
                     # 既に存在する場合はスキップ
-                    if problem_id in existing_ids:
+                    if entry["id"] in existing_ids:
                         continue
                     
-                    # 問題エントリを作成
-                    entry = {
-                        "id": problem_id,
-                        "title": title or f"{problem_num}",
-                        "explanationPath": rel_path
-                    }
-                    
                     problems.append(entry)
                 
-                # 問題をソート（例題 -> 類題 -> 問 -> 演習問題の順）
-                def sort_key(p):
-                    title = p.get("title", "")
-                    if "例題" in title:
-                        match = re.search(r'例題(\d+)', title)
-                        return (0, int(match.group(1)) if match else 999)
-                    elif "類題" in title:
-                        match = re.search(r'類題(\d+)', title)
-                        return (1, int(match.group(1)) if match else 999)
-                    elif "問" in title:
-                        match = re.search(r'問(\d+)', title)
-                        return (2, int(match.group(1)) if match else 999)
-                    elif "演習問題" in title:
-                        match = re.search(r'演習問題(\d+)', title)
-                        return (3, int(match.group(1)) if match else 999)
-                    return (4, 0)
-                
-                problems.sort(key=sort_key)
-                
-                # 類題の前に例題があるか確認
-                i = 0
-                while i < len(problems):
-                    if ensure_example_before_related(problems, i):
-                        i += 1  # 追加されたので次へ
-                    i += 1
+                with stage("sort_problems"):
+                    sort_problems(problems)
+    # 問題番号の解析はタイトルごとにメモ化しているので、正規表現を走らせたのは異なるタイトルの数だけ
+    count("problem_number_parsed", parse_problem_number.cache_info().currsize)
     
-    # JSONを保存
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"JSONファイルを更新しました: {json_path}")
+    # JSONを保存（内容が変わったときだけ）
+    with stage("save_json"):
+        diff = store.save(json_path, dry_run=args.dry_run)
+    if diff:
+        print(f"JSONファイルを{'更新します（--dry-run のため未保存）' if args.dry_run else '更新しました'}: {json_path}（{diff.summary()}）")
+        for line in diff.lines():
+            print(line)
+    else:
+        print(f"変更なし: {json_path}")
     print(f"総フィールド数: {len(subject['fields'])}")
     total_problems = sum(len(f["problems"]) for f in subject["fields"])
     print(f"総問題数: {total_problems}")
 
+    if _title_cache is not None:
+        _title_cache.evict_missing("data/explanations/textbook_basic/")
+        with stage("save_cache"):
+            _title_cache.save()
+        if args.stats:
+            _title_cache.print_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="物理基礎教科書の問題番号JSONを生成")
+    parser.add_argument("--stats", action="store_true", help="タイトルキャッシュのヒット・ミス数を表示")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに全ファイルを読み直す")
+    parser.add_argument("--dry-run", action="store_true", help="JSONを書き込まずに差分だけ表示")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling(args.profile, "generate_textbook_basic_json"):
+        generate(args)
+
 if __name__ == "__main__":
     main()
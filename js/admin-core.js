@@ -227,6 +227,71 @@ function showToast(msg, err) {
  * 集計データを取得する関数
  * Firestoreが有効な場合は本番データを、無効な場合はダミーデータを返す
  */
+// aggregate_student_logs.py が書き出す教材ごとの事前集計（教材IDごとに1回だけ取得）
+// 生徒のメモを含むため公開サイトには載せない（hosting.ignore）。取得できなければ student_logs を問い合わせる
+const analyticsSummaryCache = {};
+
+/**
+ * 反応ログをカードごとに集計する
+ * @returns {Object} cardIndex -> { good, hmm, users, memos: [{user, text, time}] }
+ */
+function aggregateLogsByCard(logs) {
+  const cardsMap = {};
+  const usersByCard = {};
+  logs.forEach(log => {
+    const idx = log.cardIndex;
+    if (!cardsMap[idx]) {
+      cardsMap[idx] = { good: 0, hmm: 0, users: 0, memos: [] };
+      usersByCard[idx] = new Set();
+    }
+    if (log.reaction === 'good') cardsMap[idx].good++;
+    if (log.reaction === 'hmm') cardsMap[idx].hmm++;
+    if (log.reaction || (log.memo && log.memo.trim() !== "")) usersByCard[idx].add(log.userId);
+    if (log.memo && log.memo.trim() !== "") {
+      cardsMap[idx].memos.push({ user: log.userId, text: log.memo, time: log.timestamp });
+    }
+  });
+  Object.keys(cardsMap).forEach(idx => {
+    cardsMap[idx].users = usersByCard[idx].size;
+  });
+  return cardsMap;
+}
+
+function loadAnalyticsSummary(materialId) {
+  if (!analyticsSummaryCache[materialId]) {
+    analyticsSummaryCache[materialId] = fetch(`data/analytics/${encodeURIComponent(materialId)}.json`, { cache: "no-cache" })
+      .then(res => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return analyticsSummaryCache[materialId];
+}
+
+/**
+ * 問題のカードごとの反応集計を取得する
+ * 事前集計（data/analytics/<教材ID>.json）に問題があればそれを使い、
+ * なければ従来どおり student_logs を問い合わせて集計する。
+ * @returns {Promise<{cards: Object, source: string, updatedAt: (string|null)}>} source は "summary" / "firestore" / "demo"
+ */
+async function fetchCardStats(problemId) {
+  const material = manifestData[activeMaterialIndex];
+  if (material && material.id) {
+    const summary = await loadAnalyticsSummary(material.id);
+    const rows = summary && summary.contents && summary.contents[problemId];
+    if (rows) {
+      const cards = {};
+      rows.forEach(([cardIndex, good, hmm, users, memos]) => {
+        cards[cardIndex] = {
+          good, hmm, users,
+          memos: memos.map(([user, text, time]) => ({ user, text, time })),
+        };
+      });
+      return { cards, source: "summary", updatedAt: summary.highWaterMark };
+    }
+  }
+  const logs = await fetchAnalysisData(problemId);
+  return { cards: aggregateLogsByCard(logs), source: window.db ? "firestore" : "demo", updatedAt: null };
+}
+
 async function fetchAnalysisData(problemId) {
   // 1. Firestore接続確認
   if (window.db && window.firebase) {
@@ -2381,27 +2381,16 @@ function setupTabSwitching() {
 
     // ★追加: プレビュー画面へのリアクション集計オーバーレイ表示
     if (currentProblem) {
-      const logs = await fetchAnalysisData(currentProblem.id);
-      renderPreviewOverlays(win.document, logs);
+      const stats = await fetchCardStats(currentProblem.id);
+      renderPreviewOverlays(win.document, stats.cards);
     }
   };
 
   // プレビューのオーバーレイ描画処理
-  function renderPreviewOverlays(doc, logs) {
+  function renderPreviewOverlays(doc, cardsMap) {
     const cards = doc.querySelectorAll(".card");
     if (cards.length === 0) return;
 
-    const cardsMap = {};
-    logs.forEach(log => {
-      const idx = log.cardIndex;
-      if (!cardsMap[idx]) cardsMap[idx] = { good: 0, hmm: 0, memos: [] };
-      if (log.reaction === 'good') cardsMap[idx].good++;
-      if (log.reaction === 'hmm') cardsMap[idx].hmm++;
-      if (log.memo && log.memo.trim() !== "") {
-        cardsMap[idx].memos.push({ user: log.userId, text: log.memo });
-      }
-    });
-
     cards.forEach((card, idx) => {
       // 既存削除
       const existing = card.querySelector(".admin-preview-footer");
@@ -2637,9 +2626,10 @@ async function renderAnalysis() {
   ui.analyzeContainer.innerHTML = '<p>データを読み込み中...</p>';
   
   // admin-core.js で定義した fetchAnalysisData を呼び出す
-  const logs = await fetchAnalysisData(currentProblem.id);
+  const stats = await fetchCardStats(currentProblem.id);
+  const cardsMap = stats.cards;
   
-  if (!logs || logs.length === 0) {
+  if (Object.keys(cardsMap).length === 0) {
     let msg = "データがありません。";
     let subMsg = "";
 
@@ -2671,32 +2661,17 @@ async function renderAnalysis() {
   
   ui.analyzeContainer.innerHTML = "";
   
-  if(!window.db) {
+  if (stats.source === "demo") {
     const notice = document.createElement('div');
     notice.style.cssText = "background:#fff7ed; padding:10px; border-left:4px solid #f97316; margin-bottom:20px; color:#c2410c;";
     notice.textContent = "⚠ 現在はFirestoreに接続されていないため、ダミーデータを表示しています。";
     ui.analyzeContainer.appendChild(notice);
+  } else if (stats.source === "summary") {
+    const notice = document.createElement('div');
+    notice.style.cssText = "background:#f1f5f9; padding:10px; border-left:4px solid #64748b; margin-bottom:20px; color:#334155;";
+    notice.textContent = `事前集計（${stats.updatedAt || "日時不明"} までのログ）を表示しています。`;
+    ui.analyzeContainer.appendChild(notice);
   }
-
-  // カードごとに集計
-  const cardsMap = {};
-  logs.forEach(log => {
-    const idx = log.cardIndex;
-    if (!cardsMap[idx]) {
-      cardsMap[idx] = { good: 0, hmm: 0, memos: [] };
-    }
-    
-    if (log.reaction === 'good') cardsMap[idx].good++;
-    if (log.reaction === 'hmm') cardsMap[idx].hmm++;
-    
-    if (log.memo && log.memo.trim() !== "") {
-      cardsMap[idx].memos.push({
-        user: log.userId,
-        text: log.memo,
-        time: log.timestamp
-      });
-    }
-  });
   
   // カード順に表示
   Object.keys(cardsMap).sort().forEach(idx => {
@@ -2721,6 +2696,9 @@ async function renderAnalysis() {
       <div class="analyze-stat-item analyze-stat-hmm">
         🤔 ${data.hmm} <span style="font-size:0.8rem; color:#64748b; font-weight:normal;">(疑問)</span>
       </div>
+      <div class="analyze-stat-item">
+        👥 ${data.users} <span style="font-size:0.8rem; color:#64748b; font-weight:normal;">(人)</span>
+      </div>
     `;
     cardDiv.appendChild(statsRow);
     
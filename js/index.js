@@ -25,6 +25,13 @@ document.addEventListener("DOMContentLoaded", () => {
     tabContainer.after(subTabContainer);
   }
   const contentArea = document.getElementById("content-area");
+  // オフライン保存（setOfflineMaterial）の状態。prerender の一覧を使うときは最初から参照するので先に宣言する
+  const offlineButton = document.getElementById("offline-save");
+  const offlineSupported =
+    !!offlineButton && "serviceWorker" in navigator && typeof DecompressionStream !== "undefined";
+  const OFFLINE_LABEL = "📥 この教材をオフライン保存";
+  let offlineMaterialId = "";
+  let offlineJob = null;
 
   if (isTeacherMode) {
     var footerInner = document.querySelector(".site-footer .site-footer-inner");
@@ -103,7 +110,7 @@ document.addEventListener("DOMContentLoaded", () => {
           }
           loadMaterial(0);
         }
-        // initSearch(); // 問題検索機能は一時無効
+        initSearch();
         initBookmarksSection();
       });
   }
@@ -126,13 +133,44 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
-  const loader = showLoading("教材リストを読み込み中...");
-  loadManifestAndInit()
-    .catch((err) => {
-      ErrorHandler.handle(err, "manifest");
-      showManifestErrorAndBindRetry();
-    })
-    .finally(() => hideLoading(loader));
+  /**
+   * prerender_index.py が index.html に埋め込んだタブ・最初の教材の一覧・manifest を使う（生徒用の表示のみ）。
+   * 一覧はそのまま表示されているので、クリック時の処理を付けるだけ。埋め込みがなければ false を返す。
+   */
+  function hydratePrerendered() {
+    const embedded = document.getElementById("prerendered-manifest");
+    if (isTeacherMode || !embedded || !tabContainer.querySelector(".tab-btn")) return false;
+    try {
+      manifest = JSON.parse(embedded.textContent);
+    } catch (e) {
+      return false;
+    }
+    tabContainer.querySelectorAll(".tab-btn").forEach((btn) => {
+      if (btn.dataset.isExam) {
+        btn.onclick = () => showExamTabs(btn);
+      } else {
+        bindMainTab(btn, parseInt(btn.dataset.index, 10));
+      }
+    });
+    applyRequestedStateToButtons();
+    initSearch();
+    initBookmarksSection();
+    // 埋め込まれている一覧は最初の教材
+    if (manifest.length > 0) setOfflineMaterial(manifest[0].id);
+    return true;
+  }
+
+  if (!hydratePrerendered()) {
+    // 先生用の表示では埋め込まれた生徒用の一覧を使わない
+    contentArea.innerHTML = "";
+    const loader = showLoading("教材リストを読み込み中...");
+    loadManifestAndInit()
+      .catch((err) => {
+        ErrorHandler.handle(err, "manifest");
+        showManifestErrorAndBindRetry();
+      })
+      .finally(() => hideLoading(loader));
+  }
 
   function initTabs() {
     tabContainer.innerHTML = "";
@@ -169,6 +207,11 @@ document.addEventListener("DOMContentLoaded", () => {
     btn.type = "button";
     btn.textContent = name;
     btn.setAttribute("aria-label", name + "を選択");
+    bindMainTab(btn, index);
+    tabContainer.appendChild(btn);
+  }
+
+  function bindMainTab(btn, index) {
     btn.onclick = () => {
       resetTabs();
       btn.classList.add("active");
@@ -176,7 +219,6 @@ document.addEventListener("DOMContentLoaded", () => {
       subTabContainer.style.display = "none";
       loadMaterial(index);
     };
-    tabContainer.appendChild(btn);
   }
 
   function showExamTabs(parentBtn) {
@@ -228,19 +270,23 @@ document.addEventListener("DOMContentLoaded", () => {
 
   function loadMaterial(index) {
     const item = manifest[index];
-    const jsonPath = item.path;
+    // 教材を切り替えたら検索結果を閉じて一覧を表示する
+    clearSearch();
+    setOfflineMaterial(item.id);
+    // 分割された教材（build_materials.py --shard）は科目・件数だけの索引を先に読む
+    const jsonPath = item.index || item.path;
     const loadingEl = showLoading("教材を読み込み中...");
     contentArea.innerHTML = "";
 
-    fetchWithRetry(jsonPath)
-      .then((res) => res.json())
-      .then((materialData) => {
-        renderContent(materialData);
-        // 問題検索は一時無効
-        // if (document.getElementById("problem-search") && document.getElementById("problem-search").value.trim()) {
-        //   filterProblems(document.getElementById("problem-search").value.trim());
-        // }
-      })
+    // 生徒用の表示は prerender_index.py で書き出した一覧をそのまま使う（なければ教材データから組み立てる）
+    (isTeacherMode ? Promise.reject() : loadPartial(item))
+      .then(
+        (html) => {
+          contentArea.innerHTML = html;
+          applyRequestedStateToButtons();
+        },
+        () => loadMaterialData(item, jsonPath).then((materialData) => renderContent(materialData))
+      )
       .catch((err) => {
         ErrorHandler.handle(err, "loadMaterial");
         contentArea.innerHTML =
@@ -258,6 +304,22 @@ document.addEventListener("DOMContentLoaded", () => {
       .finally(() => hideLoading(loadingEl));
   }
 
+  /** 事前に書き出した教材の一覧（data/partials/<教材ID>.html）を取得（なければ教材データから組み立てるのでリトライしない） */
+  function loadPartial(item) {
+    return fetch("data/partials/" + encodeURIComponent(item.id) + ".html").then((res) => {
+      if (!res.ok) throw new Error("HTTP " + res.status);
+      return res.text();
+    });
+  }
+
+  /**
+   * 教材データを取得
+   * 分割された教材は小さい索引（item.index）を読み、科目の中身は開いたときに読む
+   */
+  function loadMaterialData(item, jsonPath) {
+    return fetchWithRetry(jsonPath).then((res) => res.json());
+  }
+
   /** HTML用・動画用のボタンまたは作成済み表示を1つ組み立て */
   function buildSlot(type, hasContent, dataAttrs) {
     var label = type === "html" ? "📖" : "📹";
@@ -321,17 +383,128 @@ document.addEventListener("DOMContentLoaded", () => {
       '<a href="' + targetUrl + '" class="prob-link"><span>' + title + '</span></a>' + btns + '</div>';
   }
 
+  /** 分野の件数（分割された教材の索引では problems の代わりに件数だけが入っている） */
+  function fieldCounts(field) {
+    if (!field.problems && typeof field.count === "number") {
+      return {
+        total: field.count,
+        publicCount: field.publicCount,
+        explCount: field.explanationCount,
+        videoCount: field.videoCount,
+      };
+    }
+    var problems = field.problems || [];
+    return {
+      total: problems.length,
+      publicCount: problems.filter(function (p) { return p.isPublic !== false; }).length,
+      explCount: problems.filter(function (p) {
+        var path = p.explanationPath || "";
+        var isPDF = /\.pdf$/i.test(path) || path.includes("pdfs/") || path.includes("\\pdfs\\");
+        return path && !isPDF;
+      }).length,
+      videoCount: problems.filter(function (p) { return p.youtubeUrl && p.youtubeUrl.trim(); }).length,
+    };
+  }
+
+  /** 公開されている問題の一覧HTML */
+  function buildProblemGrid(problems, opts) {
+    var html = '<div class="prob-grid">';
+    problems.forEach(function (p) {
+      if (p.isPublic === false) return;
+      html += buildProblemRow(p, opts);
+    });
+    return html + "</div>";
+  }
+
+  /** 分野1つ分（件数付きの開閉リスト）のHTML */
+  function buildFieldItem(field, displayName, opts) {
+    var esc = opts.esc;
+    var counts = fieldCounts(field);
+    var isEmpty = counts.publicCount === 0;
+    var countText = counts.total + "件";
+    if (counts.explCount > 0 || counts.videoCount > 0) countText += "（解説" + counts.explCount + " / 動画" + counts.videoCount + "）";
+    var html = '<li class="field-item" data-empty="' + isEmpty + '">';
+    html += '<details class="field-details">';
+    html += '<summary class="field-summary"><span class="field-name">' + esc(displayName) + '</span><span class="field-count">' + countText + '</span></summary>';
+    if (isEmpty) {
+      html += '<div class="field-body"><p class="prob-empty">問題はまだ登録されていません</p>';
+    } else if (!field.problems) {
+      // 分割された教材: 問題一覧は分野を開いたときに科目ファイルから読み込む
+      html += '<div class="field-body" data-folder-id="' + esc(field.folderId) + '" data-field-name="' + esc(displayName) + '">';
+      html += '<p class="prob-empty">読み込み中...</p>';
+    } else {
+      html += '<div class="field-body">' + buildProblemGrid(field.problems, opts);
+    }
+    html += "</div></details></li>";
+    return html;
+  }
+
+  /**
+   * 科目ファイルを読み込み、その科目の分野に問題一覧を入れる
+   * data-subject-index があるときは data-shard は教材JSONで、その番号の科目を使う（prerender_index.py の一覧）
+   */
+  function loadSubjectShard(card) {
+    var esc = (s) => (s == null ? "" : escapeHtml(String(s)));
+    var subjectIndex = card.getAttribute("data-subject-index");
+    var grid = card.closest(".subject-grid");
+    var materialName = (grid && grid.getAttribute("data-material-name")) || currentMaterialName;
+    card.setAttribute("data-shard-state", "loading");
+    fetchWithRetry(card.getAttribute("data-shard"))
+      .then((res) => res.json())
+      .then((data) => {
+        var subject = subjectIndex !== null ? (data.subjects || [])[parseInt(subjectIndex, 10)] || {} : data;
+        var fieldsById = {};
+        (subject.fields || []).forEach(function (f) { fieldsById[f.folderId] = f; });
+        card.querySelectorAll(".field-body[data-folder-id]").forEach(function (body) {
+          var field = fieldsById[body.getAttribute("data-folder-id")];
+          var opts = {
+            esc: esc,
+            isTeacherMode: isTeacherMode,
+            materialName: materialName,
+            subjectName: card.getAttribute("data-subject-name") || "",
+            fieldName: body.getAttribute("data-field-name") || "",
+          };
+          body.innerHTML = field ? buildProblemGrid(field.problems || [], opts) : '<p class="prob-empty">問題はまだ登録されていません</p>';
+          body.removeAttribute("data-folder-id");
+        });
+        card.setAttribute("data-shard-state", "loaded");
+        applyRequestedStateToButtons();
+      })
+      .catch((err) => {
+        ErrorHandler.handle(err, "loadSubjectShard");
+        card.removeAttribute("data-shard-state");
+        card.querySelectorAll(".field-body[data-folder-id]").forEach(function (body) {
+          body.innerHTML = '<p class="prob-empty">問題一覧の読み込みに失敗しました。開き直すと再試行します。</p>';
+        });
+      });
+  }
+
+  // 分割された教材・事前に書き出した一覧: 分野を開いたときに、その科目のファイルをまだ読んでいなければ読み込む
+  // （toggle はバブリングしないためキャプチャで受け取る）
+  contentArea.addEventListener("toggle", function (e) {
+    var details = e.target;
+    if (!details.open || !details.classList || !details.classList.contains("field-details")) return;
+    var card = details.closest(".subject-card[data-shard]");
+    if (!card || card.getAttribute("data-shard-state")) return;
+    loadSubjectShard(card);
+  }, true);
+
+  let currentMaterialName = "";
+
   function renderContent(material) {
     const esc = (s) => (s == null ? "" : escapeHtml(String(s)));
     const isTextbook = material.materialName === "物理基礎" || material.materialName === "物理" || material.materialName === "リードLight" || material.materialName === "リードα";
     const materialName = material.materialName || "";
-    let html = '<div class="subject-grid">';
+    currentMaterialName = materialName;
+    let html = '<div class="subject-grid" data-material-name="' + esc(materialName) + '">';
     if (material.subjects) {
       material.subjects.forEach((subject) => {
         const hasFields = subject.fields && subject.fields.length > 0;
         if (!hasFields) return;
 
-        html += '<div class="subject-card">';
+        html += subject.shard
+          ? '<div class="subject-card" data-shard="' + esc(subject.shard) + '" data-subject-name="' + esc(subject.subjectName) + '">'
+          : '<div class="subject-card">';
         html += '<div class="subject-header"><h3 class="subject-name">' + esc(subject.subjectName) + '</h3><span class="index-legend" aria-hidden="true">📖：解説ページ　📹：解説動画</span></div>';
 
         if (isTextbook) {
@@ -354,67 +527,16 @@ document.addEventListener("DOMContentLoaded", () => {
             if (partName) html += '<h4 class="part-name">' + esc(partName) + '</h4>';
             html += '<ul class="field-list">';
             items.forEach(function (item) {
-              var field = item.field;
-              var problems = field.problems || [];
-              var publicProblems = problems.filter(function (p) { return p.isPublic !== false; });
-              var isEmpty = publicProblems.length === 0;
-              var explCount = problems.filter(function (p) {
-                var path = p.explanationPath || "";
-                var isPDF = /\.pdf$/i.test(path) || path.includes("pdfs/") || path.includes("\\pdfs\\");
-                return path && !isPDF;
-              }).length;
-              var videoCount = problems.filter(function (p) { return p.youtubeUrl && p.youtubeUrl.trim(); }).length;
-              var countText = problems.length + "件";
-              if (explCount > 0 || videoCount > 0) countText += "（解説" + explCount + " / 動画" + videoCount + "）";
-              html += '<li class="field-item" data-empty="' + isEmpty + '">';
-              html += '<details class="field-details">';
-              html += '<summary class="field-summary"><span class="field-name">' + esc(item.chapterName) + '</span><span class="field-count">' + countText + '</span></summary>';
-              html += '<div class="field-body">';
-              if (isEmpty) {
-                html += '<p class="prob-empty">問題はまだ登録されていません</p>';
-              } else {
-                html += '<div class="prob-grid">';
-                var opts = { esc: esc, isTeacherMode: isTeacherMode, materialName: materialName, subjectName: subject.subjectName, fieldName: item.chapterName };
-                problems.forEach(function (p) {
-                  if (p.isPublic === false) return;
-                  html += buildProblemRow(p, opts);
-                });
-                html += "</div>";
-              }
-              html += "</div></details></li>";
+              var opts = { esc: esc, isTeacherMode: isTeacherMode, materialName: materialName, subjectName: subject.subjectName, fieldName: item.chapterName };
+              html += buildFieldItem(item.field, item.chapterName, opts);
             });
             html += "</ul>";
           });
         } else {
           html += '<ul class="field-list">';
           subject.fields.forEach(function (field) {
-            var problems = field.problems || [];
-            var publicProblems = problems.filter(function (p) { return p.isPublic !== false; });
-            var isEmpty = publicProblems.length === 0;
-            var explCount = problems.filter(function (p) {
-              var path = p.explanationPath || "";
-              var isPDF = /\.pdf$/i.test(path) || path.includes("pdfs/") || path.includes("\\pdfs\\");
-              return path && !isPDF;
-            }).length;
-            var videoCount = problems.filter(function (p) { return p.youtubeUrl && p.youtubeUrl.trim(); }).length;
-            var countText = problems.length + "件";
-            if (explCount > 0 || videoCount > 0) countText += "（解説" + explCount + " / 動画" + videoCount + "）";
-            html += '<li class="field-item" data-empty="' + isEmpty + '">';
-            html += '<details class="field-details">';
-            html += '<summary class="field-summary"><span class="field-name">' + esc(field.fieldName) + '</span><span class="field-count">' + countText + '</span></summary>';
-            html += '<div class="field-body">';
-            if (isEmpty) {
-              html += '<p class="prob-empty">問題はまだ登録されていません</p>';
-            } else {
-              html += '<div class="prob-grid">';
-              var opts = { esc: esc, isTeacherMode: isTeacherMode, materialName: materialName, subjectName: subject.subjectName, fieldName: field.fieldName };
-              problems.forEach(function (p) {
-                if (p.isPublic === false) return;
-                html += buildProblemRow(p, opts);
-              });
-              html += "</div>";
-            }
-            html += "</div></details></li>";
+            var opts = { esc: esc, isTeacherMode: isTeacherMode, materialName: materialName, subjectName: subject.subjectName, fieldName: field.fieldName };
+            html += buildFieldItem(field, field.fieldName, opts);
           });
           html += "</ul>";
         }
@@ -441,29 +563,114 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
-  // 問題検索機能は一時無効
-  // function initSearch() {
-  //   const searchInput = document.getElementById("problem-search");
-  //   const clearBtn = document.getElementById("clear-search");
-  //   if (!searchInput) return;
-  //   searchInput.addEventListener("input", (e) => {
-  //     const query = e.target.value.trim().toLowerCase();
-  //     filterProblems(query);
-  //     if (clearBtn) clearBtn.style.visibility = query ? "visible" : "hidden";
-  //   });
-  //   if (clearBtn) {
-  //     clearBtn.style.visibility = searchInput.value.trim() ? "visible" : "hidden";
-  //     clearBtn.addEventListener("click", () => {
-  //       searchInput.value = "";
-  //       searchInput.focus();
-  //       filterProblems("");
-  //       clearBtn.style.visibility = "hidden";
-  //     });
-  //   }
-  // }
-
-  // function filterProblems(query) {
-  function _filterProblemsUnused(query) {
+  // 検索結果として一度に表示する問題数の上限
+  const SEARCH_RESULT_LIMIT = 200;
+  const SEARCH_DEBOUNCE_MS = 150;
+
+  /**
+   * 問題検索
+   * 全教材のタイトル・説明・解説本文を build_search_index.py の索引（js/search-index.js）で検索し、
+   * 一覧の代わりに結果を表示する。索引を読めないときは表示中の一覧をタイトルの部分一致で絞り込む。
+   */
+  function initSearch() {
+    const searchInput = document.getElementById("problem-search");
+    const clearBtn = document.getElementById("clear-search");
+    if (!searchInput) return;
+    let timer = null;
+    let seq = 0;
+
+    function run() {
+      const query = searchInput.value.trim();
+      const current = ++seq;
+      if (clearBtn) clearBtn.style.visibility = query ? "visible" : "hidden";
+      if (!query || typeof SearchIndex === "undefined") {
+        showSearchResults(null);
+        filterProblems(query);
+        return;
+      }
+      SearchIndex.search(query)
+        .then((results) => {
+          // 入力が変わった・教材を切り替えて検索を閉じた後に届いた結果は捨てる
+          if (current === seq && searchInput.value.trim() === query) showSearchResults(results);
+        })
+        .catch((err) => {
+          if (current !== seq) return;
+          ErrorHandler.handle(err, "search");
+          showSearchResults(null);
+          filterProblems(query);
+        });
+    }
+
+    searchInput.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(run, SEARCH_DEBOUNCE_MS);
+    });
+    if (clearBtn) {
+      clearBtn.style.visibility = searchInput.value.trim() ? "visible" : "hidden";
+      clearBtn.addEventListener("click", () => {
+        searchInput.value = "";
+        searchInput.focus();
+        clearTimeout(timer);
+        run();
+      });
+    }
+  }
+
+  function clearSearch() {
+    const searchInput = document.getElementById("problem-search");
+    if (!searchInput || !searchInput.value) return;
+    searchInput.value = "";
+    const clearBtn = document.getElementById("clear-search");
+    if (clearBtn) clearBtn.style.visibility = "hidden";
+    showSearchResults(null);
+    filterProblems("");
+  }
+
+  /** 索引の検索結果を教材ごとに表示する（null なら結果を閉じて一覧に戻す） */
+  function showSearchResults(results) {
+    const resultsEl = document.getElementById("search-results");
+    const countEl = document.getElementById("search-result-count");
+    if (!resultsEl) return;
+    if (results === null) {
+      resultsEl.hidden = true;
+      resultsEl.innerHTML = "";
+      contentArea.hidden = false;
+      if (countEl) countEl.textContent = "";
+      return;
+    }
+    const adminSuffix = isTeacherMode ? "&admin=1" : "";
+    let html = "";
+    let lastMaterial = -1;
+    results.slice(0, SEARCH_RESULT_LIMIT).forEach((r) => {
+      if (r.material !== lastMaterial) {
+        if (lastMaterial !== -1) html += "</div>";
+        const item = manifest[r.material];
+        html += '<h4 class="part-name">' + escapeHtml(item ? item.name : "") + '</h4><div class="prob-grid">';
+        lastMaterial = r.material;
+      }
+      const isPDF = /\.pdf$/i.test(r.path) || r.path.includes("pdfs/");
+      let href = "";
+      if (r.path && !isPDF) {
+        href = "viewer.html?path=" + encodeURIComponent(r.path) + adminSuffix;
+      } else if (r.youtubeUrl) {
+        href = "viewer.html?path=" + encodeURIComponent(r.path || "") + "&youtube=" + encodeURIComponent(r.youtubeUrl) + "&title=" + encodeURIComponent(r.title) + adminSuffix;
+      }
+      const label = "<span>" + escapeHtml(r.title) + "</span>";
+      html += href
+        ? '<div class="prob-item"><a href="' + href + '" class="prob-link">' + label + "</a></div>"
+        : '<div class="prob-item prob-item-no-content"><span class="prob-link prob-link-no-content">' + label + "</span></div>";
+    });
+    if (lastMaterial !== -1) html += "</div>";
+    if (!results.length) html = '<p class="empty-msg">該当する問題はありません。</p>';
+    else if (results.length > SEARCH_RESULT_LIMIT) html += '<p class="empty-msg">先頭の ' + SEARCH_RESULT_LIMIT + " 件を表示しています。検索語を増やすと絞り込めます。</p>";
+    resultsEl.innerHTML = html;
+    resultsEl.hidden = false;
+    contentArea.hidden = true;
+    if (countEl) countEl.textContent = results.length + " 件";
+  }
+
+  /** 表示中の一覧をパス＋タイトルの部分一致で絞り込む（索引を読めないときの代わり） */
+  function filterProblems(query) {
     const links = document.querySelectorAll("#content-area .prob-link");
     const lower = query.trim().toLowerCase();
 
@@ -487,13 +694,77 @@ document.addEventListener("DOMContentLoaded", () => {
       card.style.display = visible ? "" : "none";
     });
 
-    // 検索件数表示は一時無効
-    // var countEl = document.getElementById("search-result-count");
-    // if (countEl) {
-    //   var visibleCount = 0;
-    //   links.forEach(function (link) { if (link.style.display !== "none") visibleCount++; });
-    //   countEl.textContent = lower ? visibleCount + " 件" : "";
-    // }
+    var countEl = document.getElementById("search-result-count");
+    if (countEl) {
+      var visibleCount = 0;
+      links.forEach(function (link) { if (link.style.display !== "none") visibleCount++; });
+      countEl.textContent = lower ? visibleCount + " 件" : "";
+    }
+  }
+
+  /**
+   * 「この教材をオフライン保存」: 教材のバンドル（build_bundles.py、入試系は大学・年度ごと）を
+   * sw.js に precache-bundle で1つずつ依頼し、返ってきた結果を集計して表示する。
+   * Service Worker か DecompressionStream が使えないブラウザではボタンを出さない。
+   */
+  function setOfflineMaterial(materialId) {
+    offlineMaterialId = materialId;
+    if (!offlineSupported || offlineJob) return;
+    offlineButton.hidden = false;
+    offlineButton.disabled = false;
+    offlineButton.textContent = OFFLINE_LABEL;
+  }
+
+  if (offlineSupported) {
+    navigator.serviceWorker.addEventListener("message", (e) => {
+      const data = e.data || {};
+      if (data.type !== "precache-bundle" || !offlineJob || !offlineJob.pending.has(data.bundle)) return;
+      offlineJob.pending.delete(data.bundle);
+      if (data.ok) {
+        offlineJob.cached += data.cached + data.skipped;
+        offlineJob.failed += data.failed;
+      } else {
+        offlineJob.failed++;
+      }
+      const done = offlineJob.total - offlineJob.pending.size;
+      if (offlineJob.pending.size > 0) {
+        offlineButton.textContent = "保存中... (" + done + "/" + offlineJob.total + ")";
+        return;
+      }
+      offlineButton.textContent = offlineJob.failed
+        ? "⚠️ 一部を保存できませんでした（解説 " + offlineJob.cached + " 件を保存）"
+        : "✅ 保存しました（解説 " + offlineJob.cached + " 件）";
+      offlineButton.disabled = offlineJob.materialId === offlineMaterialId;
+      offlineJob = null;
+      if (!offlineButton.disabled) offlineButton.textContent = OFFLINE_LABEL;
+    });
+
+    offlineButton.addEventListener("click", () => {
+      if (offlineJob || !offlineMaterialId) return;
+      const materialId = offlineMaterialId;
+      offlineButton.disabled = true;
+      offlineButton.textContent = "保存中...";
+      Promise.all([
+        fetch("data/bundles/index.json", { cache: "no-cache" }).then((res) => (res.ok ? res.json() : null)),
+        navigator.serviceWorker.ready,
+      ])
+        .then(([index, registration]) => {
+          const names = Object.keys((index && index.bundles) || {}).filter(
+            (name) => name === materialId || name.indexOf(materialId + "/") === 0
+          );
+          if (!names.length || !registration.active) {
+            offlineButton.textContent = "この教材には保存できる解説がありません";
+            return;
+          }
+          offlineJob = { materialId: materialId, pending: new Set(names), total: names.length, cached: 0, failed: 0 };
+          names.forEach((name) => registration.active.postMessage({ type: "precache-bundle", bundle: name }));
+        })
+        .catch((err) => {
+          ErrorHandler.handle(err, "offlineSave");
+          offlineButton.disabled = false;
+          offlineButton.textContent = OFFLINE_LABEL;
+        });
+    });
   }
 
   function initBookmarksSection() {
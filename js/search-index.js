@@ -0,0 +1,135 @@
+/* js/search-index.js */
+
+/**
+ * 全文検索インデックス（build_search_index.py で生成した data/search/）の読み込みと検索
+ * 語の分割とシャード番号の計算は build_search_index.py の tokenize / shard_of と同じ規則。
+ * シャードは検索語に必要なものだけを初回検索時に読み込み、以降はメモリに保持する。
+ * meta.json は毎回サーバーに確認し、シャード・文書表は ?v=<meta.hash> 付きで読む
+ * （索引を作り直した後に、ブラウザのキャッシュに残った古いシャードを使わないため）。
+ */
+var SearchIndex = (function() {
+  var BASE = "data/search/";
+  // build_search_index.py の INDEX_VERSION（形式が違う索引は使わない）
+  var INDEX_VERSION = 2;
+  var CJK_RUN_RE = /[ぁ-ゟ゠-ヿ㐀-鿿豈-﫿々ー]+/g;
+  var WORD_RE = /[0-9a-z]+/g;
+
+  var metaPromise = null;
+  var docsPromise = null;
+  var shardPromises = {};
+
+  function fetchJson(path, init) {
+    return fetch(BASE + path, init).then(function(res) {
+      if (!res.ok) throw new Error("HTTP " + res.status + ": " + BASE + path);
+      return res.json();
+    });
+  }
+
+  function loadMeta() {
+    if (!metaPromise) {
+      metaPromise = fetchJson("meta.json", { cache: "no-cache" }).then(function(meta) {
+        if (meta.version !== INDEX_VERSION) throw new Error("search index version " + meta.version);
+        return meta;
+      });
+      // 失敗したら次の検索で読み直す
+      metaPromise.catch(function() { metaPromise = null; });
+    }
+    return metaPromise;
+  }
+
+  function loadDocs(meta) {
+    if (!docsPromise) docsPromise = fetchJson("docs.json?v=" + meta.hash);
+    return docsPromise;
+  }
+
+  function loadShard(index, meta) {
+    if (!shardPromises[index]) {
+      shardPromises[index] = fetchJson("terms-" + (index < 10 ? "0" : "") + index + ".json?v=" + meta.hash);
+    }
+    return shardPromises[index];
+  }
+
+  /** 検索語を分割する（かな・漢字は文字バイグラム、1文字だけならその文字、英数字は単語） */
+  function tokenize(text) {
+    text = String(text || "").normalize("NFKC").toLowerCase();
+    var tokens = [];
+    var runs = text.match(CJK_RUN_RE) || [];
+    for (var i = 0; i < runs.length; i++) {
+      var run = Array.from(runs[i]);
+      if (run.length === 1) {
+        tokens.push(run[0]);
+      } else {
+        for (var j = 0; j < run.length - 1; j++) tokens.push(run[j] + run[j + 1]);
+      }
+    }
+    var words = text.replace(CJK_RUN_RE, " ").match(WORD_RE) || [];
+    return tokens.concat(words);
+  }
+
+  function shardOf(term, shards) {
+    var chars = Array.from(term);
+    var first = chars[0].codePointAt(0);
+    var second = chars.length > 1 ? chars[1].codePointAt(0) : 0;
+    return (first * 31 + second) % shards;
+  }
+
+  function decodePostings(deltas) {
+    var ids = new Array(deltas.length);
+    var total = 0;
+    for (var i = 0; i < deltas.length; i++) {
+      total += deltas[i];
+      ids[i] = total;
+    }
+    return ids;
+  }
+
+  /** 昇順の2つの配列の共通部分 */
+  function intersect(a, b) {
+    var out = [];
+    var i = 0;
+    var j = 0;
+    while (i < a.length && j < b.length) {
+      if (a[i] === b[j]) {
+        out.push(a[i]);
+        i++;
+        j++;
+      } else if (a[i] < b[j]) {
+        i++;
+      } else {
+        j++;
+      }
+    }
+    return out;
+  }
+
+  /**
+   * 全ての語を含む問題を返す
+   * @param {string} query - 検索文字列
+   * @returns {Promise<Array<{material: number, title: string, desc: string, path: string, youtubeUrl: string}>>}
+   */
+  function search(query) {
+    var terms = Array.from(new Set(tokenize(query)));
+    if (!terms.length) return Promise.resolve([]);
+    return loadMeta().then(function(meta) {
+      return Promise.all(terms.map(function(term) {
+        return loadShard(shardOf(term, meta.shards), meta).then(function(shard) {
+          return shard[term] ? decodePostings(shard[term]) : [];
+        });
+      })).then(function(lists) {
+        // 短いポスティングから順に絞り込む
+        lists.sort(function(a, b) { return a.length - b.length; });
+        var ids = lists[0];
+        for (var i = 1; i < lists.length && ids.length; i++) ids = intersect(ids, lists[i]);
+        if (!ids.length) return [];
+        return loadDocs(meta).then(function(docs) {
+          return ids.map(function(id) {
+            var row = docs[id];
+            return { material: row[0], title: row[1], desc: row[2], path: row[3], youtubeUrl: row[4] };
+          });
+        });
+      });
+    });
+  }
+
+  return { search: search, tokenize: tokenize };
+})();
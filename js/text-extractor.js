@@ -136,3 +136,52 @@ function optimizeTextForSpeech(text) {
   
   return text;
 }
+
+// build_speech_text.py の SIDECAR_VERSION（形式が違うサイドカーは使わない）
+var SPEECH_SIDECAR_VERSION = 2;
+
+/**
+ * 事前生成した読み上げテキスト（build_speech_text.py の data/speech/*.json）からセクションを作る
+ * サイドカーは enhanceExplanationForAudio と同じ規則で作られている。サイドカーがない・版が違う・
+ * .card / .box-alert の数が合わない場合は、ページから enhanceExplanationForAudio（だめなら extractExplanationText）で抽出する。
+ * @param {HTMLElement} container - 解説コンテナ
+ * @param {string} explanationPath - 解説HTMLのパス（data/explanations/...）
+ * @returns {Promise<Array<{index: number, text: string, element: HTMLElement, heading: string, type: string}>>} テキストセクションの配列
+ */
+function loadSpeechSections(container, explanationPath) {
+  var fallback = function() {
+    var sections = typeof enhanceExplanationForAudio === 'function' ? enhanceExplanationForAudio(container) : [];
+    return sections.length ? sections : extractExplanationText(container);
+  };
+  if (!explanationPath || explanationPath.indexOf('data/explanations/') !== 0) {
+    return Promise.resolve(fallback());
+  }
+  var sidecarPath = 'data/speech/' + explanationPath.substring('data/explanations/'.length).replace(/\.html$/, '.json');
+
+  return fetch(sidecarPath).then(function(res) {
+    if (!res.ok) throw new Error('HTTP ' + res.status);
+    return res.json();
+  }).then(function(sidecar) {
+    var cards = container.querySelectorAll('.card');
+    var alerts = container.querySelectorAll('.box-alert');
+    if (sidecar.version !== SPEECH_SIDECAR_VERSION || sidecar.cards !== cards.length || sidecar.alerts !== alerts.length) {
+      return fallback();
+    }
+    var sections = [];
+    for (var i = 0; i < sidecar.sections.length; i++) {
+      var row = sidecar.sections[i];
+      var isSummary = row[4] === 'summary';
+      sections.push({
+        // まとめの index は enhanceExplanationForAudio と同じく追加した時点のセクション数
+        index: isSummary ? i : row[0],
+        text: sidecar.text.substring(row[1], row[2]),
+        element: isSummary ? alerts[row[0]] : cards[row[0]],
+        heading: row[3],
+        type: row[4]
+      });
+    }
+    return sections.length ? sections : fallback();
+  }).catch(function() {
+    return fallback();
+  });
+}
@@ -9,6 +9,8 @@ let currentPath = null;
 
 // 音声プレーヤーインスタンス
 let audioPlayer = null;
+// 表示中の解説HTMLのパス（音声ボタンが事前生成の読み上げテキストを探すのに使う）
+let renderedExplanationPath = null;
 
 document.addEventListener("DOMContentLoaded", () => {
   // スクロール時にタイトル行を隠す（滑らかなアニメーション）
@@ -356,10 +358,45 @@ function ensureFirebase() {
   return firebaseReady;
 }
 
+/**
+ * 逆引きインデックス（data/explanation-index.json）から問題データを検索する
+ * インデックスが無い・古い場合は null を返し、全教材の検索にフォールバックする
+ */
+async function findProblemByIndex(path) {
+  try {
+    // インデックスは存在しないこともあるため、リトライせずに1回だけ取得する
+    const indexRes = await fetch("data/explanation-index.json");
+    if (!indexRes.ok) return null;
+    const index = await indexRes.json();
+    const loc = index.paths && index.paths[path];
+    if (!loc) return null;
+
+    const material = index.materials[loc[0]];
+    if (!material) return null;
+    const materialRes = await fetchWithRetry(material[1]);
+    const materialData = await materialRes.json();
+
+    const subject = materialData.subjects && materialData.subjects[loc[1]];
+    const field = subject && subject.fields && subject.fields[loc[2]];
+    const problem = field && field.problems && field.problems[loc[3]];
+    // 教材JSONの更新後にインデックスが再生成されていない場合に備えて照合する
+    if (problem && problem.explanationPath === path) return problem;
+    return null;
+  } catch (e) {
+    console.warn("Failed to use explanation index:", e);
+    return null;
+  }
+}
+
 /**
  * パスから問題データを検索する
  */
 async function findProblemByPath(path) {
+  if (path) {
+    const indexed = await findProblemByIndex(path);
+    if (indexed) return indexed;
+  }
+
   try {
     // manifest.jsonを読み込む
     const manifestRes = await fetchWithRetry("data/manifest.json");
@@ -475,9 +512,11 @@ function loadExplanationByPath(path) {
           return new Promise((resolve) => {
             whenReadyToRender(html, () => {
               renderExplanation(textTarget, html, problem);
+              renderedExplanationPath = path;
               const heading = textTarget.querySelector("h2, h3");
               if (heading) updateTitle(heading.textContent);
               updateBookmarkButton(path);
+              prefetchLikelyNext(path);
               resolve();
             });
           });
@@ -494,6 +533,40 @@ function loadExplanationByPath(path) {
     .finally(() => hideLoading(loader));
 }
 
+/**
+ * 先読みマップ（build_prefetch_map.py で生成した data/prefetch-map.json）から
+ * 次に開かれそうな解説を引き、アイドル時に読み込んでおく。
+ * Service Worker が有効なら sw.js に頼んで DATA_CACHE に入れ、なければ <link rel="prefetch"> を使う。
+ * 通信量節約モード・低速回線では先読みしない。
+ */
+function prefetchLikelyNext(path) {
+  var connection = navigator.connection;
+  if (!path || (connection && (connection.saveData || /2g/.test(connection.effectiveType || "")))) return;
+  var schedule = window.requestIdleCallback || function(cb) {
+    return setTimeout(cb, 2000);
+  };
+  schedule(function() {
+    fetch("data/prefetch-map.json")
+      .then(function(res) { return res.ok ? res.json() : null; })
+      .then(function(map) {
+        var next = map && map.next && map.next[path];
+        if (!next || !next.length) return;
+        var worker = navigator.serviceWorker && navigator.serviceWorker.controller;
+        if (worker) {
+          worker.postMessage({ type: "prefetch", paths: next });
+          return;
+        }
+        next.forEach(function(nextPath) {
+          var link = document.createElement("link");
+          link.rel = "prefetch";
+          link.href = nextPath;
+          document.head.appendChild(link);
+        });
+      })
+      .catch(function() {});
+  }, { timeout: 5000 });
+}
+
 /**
  * IDからJSONを検索して読み込む (Legacy)
  */
@@ -560,6 +633,7 @@ function applyProblemData(target) {
         return new Promise((resolve) => {
           whenReadyToRender(html, () => {
             renderExplanation(textTarget, html);
+            renderedExplanationPath = target.explanationPath;
             updateBookmarkButton(target.explanationPath);
             resolve();
           });
@@ -657,6 +731,31 @@ function onFullscreenChange() {
   }
 }
 
+/**
+ * MathJax での組版が必要か（TeX が残っているか）
+ * 配信時に prerender_math.py で MathML に変換済みの数式は組版不要。
+ * 変換できなかった数式は .tex-fallback に TeX のまま残っている。
+ * script・style の中（シミュレーションのテンプレート文字列の ${…} など）と <math> の中は見ない（MathJax も組版しない）。
+ */
+var TEX_DELIMITER_RE = /\$|\\\(|\\\[/;
+var TEX_SKIP_TAGS = { SCRIPT: true, STYLE: true, TEXTAREA: true, PRE: true, CODE: true, MATH: true };
+function needsMathJax(el) {
+  if (el.querySelector && el.querySelector('.tex-fallback')) return true;
+  if (!document.createTreeWalker) return TEX_DELIMITER_RE.test(el.textContent || '');
+  var walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {
+    acceptNode: function(node) {
+      for (var parent = node.parentNode; parent && parent !== el; parent = parent.parentNode) {
+        if (TEX_SKIP_TAGS[(parent.nodeName || '').toUpperCase()]) return NodeFilter.FILTER_REJECT;
+      }
+      return NodeFilter.FILTER_ACCEPT;
+    }
+  });
+  while (walker.nextNode()) {
+    if (TEX_DELIMITER_RE.test(walker.currentNode.nodeValue)) return true;
+  }
+  return false;
+}
+
 function renderExplanation(container, html, problem) {
   // 1. HTML挿入（直接innerHTMLで高速化、DocumentFragmentは不要）
   // 完全なHTMLドキュメントの場合は<div class="explanation-area">の中身だけを抽出
@@ -705,7 +804,13 @@ function renderExplanation(container, html, problem) {
   var mathChunks = [];
   var cards = container.querySelectorAll('.card');
   for (var i = 0; i < cards.length; i++) {
-    mathChunks.push(cards[i]);
+    if (needsMathJax(cards[i])) mathChunks.push(cards[i]);
+  }
+  // 数式がすべて変換済みなら MathJax 自体を読み込まない（viewer.html の tryLoadMathJax）
+  window.mathJaxNeeded = mathChunks.length > 0 || (cards.length === 0 && needsMathJax(container));
+  if (window.mathJaxNeeded && !window.MathJax && typeof window.loadMathJax === 'function') {
+    // 先に別の解説で読み込みを見送っていた場合に備えて読み込む（loadMathJax は二重に読み込まない）
+    setTimeout(window.loadMathJax, 1500);
   }
   
   var processMath = function(card) {
@@ -1073,25 +1178,22 @@ function initAudioControls() {
   // 音声生成ボタン
   if (generateBtn) {
     generateBtn.addEventListener('click', function() {
-      // 強化されたテキストを取得（補足説明付き）
-      var sections = enhanceExplanationForAudio(textTarget);
-      if (sections.length === 0) {
-        // フォールバック: 通常の抽出を試す
-        sections = extractExplanationText(textTarget);
+      // 強化されたテキスト（補足説明付き）を、事前生成のサイドカーがあればそこから、なければページから取得
+      loadSpeechSections(textTarget, renderedExplanationPath).then(function(sections) {
         if (sections.length === 0) {
           alert('読み上げる内容が見つかりませんでした');
           return;
         }
-      }
-      
-      // コントロールパネルを表示
-      if (controlsPanel) {
-        controlsPanel.style.display = 'block';
-      }
-      
-      // 音声プレーヤーを初期化
-      audioPlayer = new ExplanationAudioPlayer(textTarget);
-      audioPlayer.play(sections);
+        
+        // コントロールパネルを表示
+        if (controlsPanel) {
+          controlsPanel.style.display = 'block';
+        }
+        
+        // 音声プレーヤーを初期化
+        audioPlayer = new ExplanationAudioPlayer(textTarget);
+        audioPlayer.play(sections);
+      });
     });
   }
   
@@ -1193,7 +1295,7 @@ function setupCardTabs(container, problem) {
 
   // --- MathJax を処理（先に定義） ---
   function processMathInItem(item) {
-    if (!item) return;
+    if (!item || !needsMathJax(item)) return;
     
     // アイテムが表示されていることを確認
     var computedStyle = window.getComputedStyle(item);
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教材JSON（data/materials/*.json）の読み込みと書き込みをまとめるモジュール
+generate_textbook_basic_json.py・scripts/update_textbook_basic_from_sheet.py・build_materials.py から使う。
+
+- 教材JSONは1回だけ読み込み、読み込んだ時点の内容を覚えておく
+- 保存時は正規の書式（インデント2・問題は1行に1問）で書き出した結果を読み込み時と比べ、
+  内容が変わったときだけ一時ファイル経由で置き換える（中断しても壊れたファイルが残らない）
+- 内容が変わっていなければ書き込まない。手で整えた書式も mtime もそのまま残るため、
+  sw.js のキャッシュやハッシュでの差分デプロイが無駄に無効にならない
+- 内容が変わったときはファイル全体を正規の書式で書き直す（元の書式は残さない）。
+  data/materials/*.json はすべて正規の書式にそろえてあるので、差分は変わった問題の行だけになる。
+  手で編集するときも同じ書式（インデント2・問題は1行）を保つこと
+- 変更内容は問題単位の差分（追加・削除・変更）として返す
+
+使い方:
+  store = MaterialStore()
+  data = store.load(path)
+  ... data を書き換える ...
+  diff = store.save(path)          # 変わっていなければ書き込まずに空の差分を返す
+  for line in diff.lines():
+      print(line)
+"""
+
+import copy
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_profile import count, read_text
+
+# 問題のキーの表示順（差分の「変更」に並べる順）
+_PROBLEM_KEY_ORDER = ["id", "title", "desc", "youtubeUrl", "explanationPath", "isPublic"]
+
+
+def _inline(value) -> str:
+    """1行に収める JSON（教材JSONの問題と同じ { "id": …, "title": … } の形）"""
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        return "{ " + ", ".join(f"{json.dumps(k, ensure_ascii=False)}: {_inline(v)}" for k, v in value.items()) + " }"
+    if isinstance(value, list):
+        return "[" + ", ".join(_inline(v) for v in value) + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _block(value, depth: int, key: Optional[str] = None) -> str:
+    indent = "  " * (depth + 1)
+    closing = "  " * depth
+    if isinstance(value, dict) and value:
+        items = ",\n".join(f"{indent}{json.dumps(k, ensure_ascii=False)}: {_block(v, depth + 1, k)}"
+                           for k, v in value.items())
+        return "{\n" + items + "\n" + closing + "}"
+    if isinstance(value, list) and value:
+        render = _inline if key == "problems" else (lambda v: _block(v, depth + 1))
+        return "[\n" + ",\n".join(indent + render(v) for v in value) + "\n" + closing + "]"
+    return _inline(value)
+
+
+def serialize_material(data: Dict) -> str:
+    """教材JSONの正規の書式（インデント2、problems の各問題は1行）"""
+    return _block(data, 0)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """同じディレクトリの一時ファイルに書いてから置き換える（元のファイルの権限を引き継ぐ）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        count("files_written")
+        count("bytes_written", len(data))
+        try:
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """atomic_write_bytes の UTF-8 テキスト版（改行は変換しない）"""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def write_text_if_changed(path: Path, text: str) -> bool:
+    """内容が変わったときだけ atomic_write_text で書き込み、書いたら True を返す"""
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    atomic_write_text(path, text)
+    return True
+
+
+def write_bytes_if_changed(path: Path, data: bytes) -> bool:
+    """内容が変わったときだけ atomic_write_bytes で書き込み、書いたら True を返す"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    atomic_write_bytes(path, data)
+    return True
+
+
+def _problem_locations(data: Dict) -> Dict[Tuple[str, str, str, int], Dict]:
+    """(科目, 分野, 問題ID, 同じIDの出現順) -> 問題"""
+    problems: Dict[Tuple[str, str, str, int], Dict] = {}
+    for subject in data.get("subjects", []):
+        subject_name = subject.get("folderName") or subject.get("subjectName", "")
+        for field in subject.get("fields", []):
+            field_name = field.get("folderId") or field.get("fieldName", "")
+            seen: Dict[str, int] = {}
+            for problem in field.get("problems", []):
+                problem_id = str(problem.get("id", ""))
+                occurrence = seen.get(problem_id, 0)
+                seen[problem_id] = occurrence + 1
+                problems[(subject_name, field_name, problem_id, occurrence)] = problem
+    return problems
+
+
+class MaterialDiff:
+    """教材JSONの問題単位の差分"""
+
+    def __init__(self):
+        self.added: List[Tuple[str, str, Dict]] = []
+        self.removed: List[Tuple[str, str, Dict]] = []
+        # (場所, 問題ID, [変わったキー], 変更後の問題)
+        self.changed: List[Tuple[str, str, List[str], Dict]] = []
+        # 問題以外の変更（教材名・分野名・並び順など）
+        self.other = False
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.other)
+
+    def summary(self) -> str:
+        text = f"追加 {len(self.added)} / 削除 {len(self.removed)} / 変更 {len(self.changed)}"
+        return text + ("（ほかに分野・並び順などの変更あり）" if self.other else "")
+
+    def lines(self) -> List[str]:
+        rows = [f"  + {where} {pid}: {p.get('title', '')}" for where, pid, p in self.added]
+        rows += [f"  - {where} {pid}: {p.get('title', '')}" for where, pid, p in self.removed]
+        rows += [f"  ~ {where} {pid}: {', '.join(keys)}" for where, pid, keys, _ in self.changed]
+        return rows
+
+    def to_json(self) -> Dict:
+        return {
+            "added": [{"field": where, "id": pid, "problem": p} for where, pid, p in self.added],
+            "removed": [{"field": where, "id": pid, "problem": p} for where, pid, p in self.removed],
+            "changed": [{"field": where, "id": pid, "keys": keys, "problem": p} for where, pid, keys, p in self.changed],
+            "other": self.other,
+        }
+
+
+def diff_materials(before: Dict, after: Dict) -> MaterialDiff:
+    """2つの教材JSONを問題単位で比べる"""
+    diff = MaterialDiff()
+    old = _problem_locations(before)
+    new = _problem_locations(after)
+
+    def where(key: Tuple[str, str, str, int]) -> str:
+        return "/".join(part for part in key[:2] if part) or "-"
+
+    for key, problem in new.items():
+        if key not in old:
+            diff.added.append((where(key), key[2], problem))
+        elif old[key] != problem:
+            keys = sorted(set(old[key]) | set(problem), key=lambda k: (
+                _PROBLEM_KEY_ORDER.index(k) if k in _PROBLEM_KEY_ORDER else len(_PROBLEM_KEY_ORDER), k))
+            diff.changed.append((where(key), key[2], [k for k in keys if old[key].get(k) != problem.get(k)], problem))
+    for key, problem in old.items():
+        if key not in new:
+            diff.removed.append((where(key), key[2], problem))
+
+    if not (diff.added or diff.removed or diff.changed):
+        diff.other = serialize_material(before) != serialize_material(after)
+    else:
+        # 問題の差分を戻した状態と比べ、それ以外の変更が残っていないかを見る
+        diff.other = (_strip_problems(before) != _strip_problems(after)
+                      or [k for k in old if k in new] != [k for k in new if k in old])
+    return diff
+
+
+def _strip_problems(data: Dict) -> str:
+    stripped = copy.deepcopy(data)
+    for subject in stripped.get("subjects", []):
+        for field in subject.get("fields", []):
+            field.pop("problems", None)
+    return serialize_material(stripped)
+
+
+class MaterialStore:
+    """教材JSONを1回だけ読み込み、変更があったものだけを書き戻す"""
+
+    def __init__(self):
+        self._data: Dict[Path, Dict] = {}
+        # 読み込んだ時点の内容（存在しなかったファイルは None）
+        self._original: Dict[Path, Optional[Dict]] = {}
+
+    def load(self, path: Path, default: Optional[Dict] = None) -> Dict:
+        """教材JSONを読み込む（2回目以降は同じオブジェクトを返す）。ファイルがなければ default の写し"""
+        path = Path(path)
+        if path not in self._data:
+            if path.exists():
+                data = json.loads(read_text(path))
+                self._original[path] = copy.deepcopy(data)
+            else:
+                data = copy.deepcopy(default) if default is not None else {"subjects": []}
+                self._original[path] = None
+            self._data[path] = data
+        return self._data[path]
+
+    def paths(self) -> List[Path]:
+        return list(self._data)
+
+    def is_changed(self, path: Path) -> bool:
+        path = Path(path)
+        original = self._original.get(path)
+        if original is None:
+            return path in self._data
+        return serialize_material(original) != serialize_material(self._data[path])
+
+    def diff(self, path: Path) -> MaterialDiff:
+        path = Path(path)
+        return diff_materials(self._original.get(path) or {}, self._data[path])
+
+    def save(self, path: Path, dry_run: bool = False) -> MaterialDiff:
+        """変更があれば正規の書式で置き換え、差分を返す（変更がなければ空の差分で、書き込まない）"""
+        path = Path(path)
+        if not self.is_changed(path):
+            return MaterialDiff()
+        diff = self.diff(path)
+        if not dry_run:
+            atomic_write_text(path, serialize_material(self._data[path]))
+            self._original[path] = copy.deepcopy(self._data[path])
+        return diff
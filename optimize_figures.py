@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解説HTMLの図（インラインSVG・<img>）をビルド時に最適化するスクリプト
+publish_assets.py が dist/ に配信用の解説を書き出すとき（とアセットマニフェスト・バンドルを作るとき）に、
+数式の変換・縮小の前に各解説HTMLへ適用する（元のファイルは変更しない）。
+
+インラインSVG:
+  - コメント・<metadata>・編集ソフトの属性（inkscape: / sodipodi: など）を取り除く
+  - 座標の属性（d・points・x・y・transform など）の数値を小数 PRECISION 桁に丸める
+  - 要素の間の改行・インデントを取り除く（<text> などの中身はそのまま）
+  - 同じ図形要素（<path> や <line> など、属性もすべて同じもの）が繰り返し出てくる場合、
+    短くなるときに限り <defs> に1つだけ置いて <use href="#…"> で参照する
+<img>:
+  - loading="lazy"・decoding="async" を付ける（viewer.js が表示後に付けていたものを前倒し）
+  - width / height がなく、src がローカルの画像（PNG・GIF・JPEG・WebP・SVG）なら
+    画像の大きさを読み取って付ける（読み込み前に領域を確保してレイアウトのずれを防ぐ）
+
+変換結果は解説HTML（と参照する画像の大きさ・更新日時）の内容ハッシュをキーにして
+.build-cache/figures.json に保存し、変わっていない解説は再処理しない。
+
+使い方:
+  python3 optimize_figures.py           # 全解説を処理し、ファイルごとの削減量を表示（ファイルは変更しない）
+  python3 optimize_figures.py --all     # 変化のなかったファイルも表示
+  python3 publish_assets.py             # dist/ への出力時に適用
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+CACHE_PATH = Path(".build-cache/figures.json")
+# 変換の内容を変えたら上げる（キャッシュを作り直す）
+CACHE_VERSION = 1
+PRECISION = 2
+
+# 中身を変更しない要素・SVG・img に分割する（SVG の中に SVG がある場合は外側ごと対象外）
+_TOKEN_RE = re.compile(
+    r'(?P<skip><!--.*?-->|<(?P<rawtag>script|style|pre|textarea|code|math)\b.*?</(?P=rawtag)\s*>)'
+    r'|(?P<svg><svg\b.*?</svg\s*>)'
+    r'|(?P<img><img\b[^>]*>)',
+    re.DOTALL | re.IGNORECASE,
+)
+# SVG の中で空白を残す要素
+_SVG_TEXT_RE = re.compile(r'(<(?P<tag>text|title|desc|style|script|foreignObject)\b.*?</(?P=tag)\s*>)', re.DOTALL)
+_SVG_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_SVG_METADATA_RE = re.compile(
+    r'<metadata\b.*?</metadata\s*>|<sodipodi:namedview\b[^>]*?(?:/>|>.*?</sodipodi:namedview\s*>)', re.DOTALL)
+_EDITOR_ATTR_RE = re.compile(
+    r'\s+(?:xmlns:(?:inkscape|sodipodi|sketch|serif|rdf|cc|dc)|(?:inkscape|sodipodi|sketch|serif):[\w.-]+)="[^"]*"')
+_GEOMETRY_ATTR_RE = re.compile(
+    r'(\s(?:d|points|x|y|x1|y1|x2|y2|cx|cy|r|rx|ry|dx|dy|width|height|transform|stroke-width|font-size)=")([^"]*)(")')
+_DECIMAL_RE = re.compile(r'-?\d*\.\d{%d,}(?![\d.eE])' % (PRECISION + 1))
+_BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+_SHAPE_RE = re.compile(r'<(?:path|line|polyline|polygon|circle|ellipse|rect)\b[^>]*/>')
+_SVG_OPEN_RE = re.compile(r'<svg\b[^>]*>')
+_ATTR_RE = re.compile(r'\s([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_ID_RE = re.compile(r'\sid\s*=')
+_LENGTH_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(?:px)?\s*$')
+
+
+def _round_number(m: re.Match) -> str:
+    text = f"{float(m.group(0)):.{PRECISION}f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def _round_geometry(tag: str) -> Tuple[str, int]:
+    count = 0
+
+    def attr(m: re.Match) -> str:
+        nonlocal count
+        value, n = _DECIMAL_RE.subn(_round_number, m.group(2))
+        count += n
+        return m.group(1) + value + m.group(3)
+
+    return _GEOMETRY_ATTR_RE.sub(attr, tag), count
+
+
+def _collapse_between_tags(svg: str) -> str:
+    """要素の間の空白を取り除く（テキストを持つ要素の中はそのまま）"""
+    parts = _SVG_TEXT_RE.split(svg)
+    out = []
+    # split はキャプチャした (要素全体, タグ名) を挟むので3つ組で進む
+    for i in range(0, len(parts), 3):
+        part = _BETWEEN_TAGS_RE.sub('><', parts[i])
+        if not part.strip() and 0 < i < len(parts) - 1:
+            part = ""
+        if i > 0 and part.lstrip().startswith("<"):
+            part = part.lstrip()
+        if i + 1 < len(parts) and part.rstrip().endswith(">"):
+            part = part.rstrip()
+        out.append(part)
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out)
+
+
+def _dedupe_shapes(svg: str, used_ids: set) -> Tuple[str, int]:
+    """同じ図形要素を <defs> に1つだけ置き、<use> で参照する（短くなる場合だけ）"""
+    counts: Dict[str, int] = {}
+    for m in _SHAPE_RE.finditer(svg):
+        if not _ID_RE.search(m.group(0)):
+            counts[m.group(0)] = counts.get(m.group(0), 0) + 1
+
+    defs: List[str] = []
+    replaced = 0
+    for element, count in counts.items():
+        if count < 2:
+            continue
+        n = len(used_ids) + 1
+        while f"fig{n}" in used_ids:
+            n += 1
+        ref_id = f"fig{n}"
+        use = f'<use href="#{ref_id}"/>'
+        definition = element.replace(" ", f' id="{ref_id}" ', 1)
+        saving = count * (len(element) - len(use)) - len(definition) - (0 if defs else len("<defs></defs>"))
+        if saving <= 0:
+            continue
+        used_ids.add(ref_id)
+        defs.append(definition)
+        svg = svg.replace(element, use)
+        replaced += count
+    if defs:
+        opening = _SVG_OPEN_RE.match(svg)
+        svg = svg[:opening.end()] + "<defs>" + "".join(defs) + "</defs>" + svg[opening.end():]
+    return svg, replaced
+
+
+def optimize_svg(svg: str, used_ids: set) -> Tuple[str, Dict[str, int]]:
+    """インラインSVG1つを縮小し、(縮小後のSVG, 統計) を返す"""
+    if svg.count("<svg") > 1:
+        return svg, {}
+    out = _SVG_COMMENT_RE.sub('', svg)
+    out = _SVG_METADATA_RE.sub('', out)
+    rounded = 0
+
+    def tag(m: re.Match) -> str:
+        nonlocal rounded
+        text, n = _round_geometry(_EDITOR_ATTR_RE.sub('', m.group(0)))
+        rounded += n
+        return text
+
+    out = re.sub(r'<[^!/][^>]*>', tag, out)
+    out = _collapse_between_tags(out)
+    out, deduped = _dedupe_shapes(out, used_ids)
+    return out, {"svg": 1, "rounded": rounded, "deduped": deduped}
+
+
+def image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """画像ファイルの (幅, 高さ)。形式がわからなければ None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(64 * 1024)
+    except OSError:
+        return None
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24:
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", head[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+        return None
+    if head.startswith(b"\xff\xd8"):
+        pos = 2
+        while pos + 9 < len(head):
+            if head[pos] != 0xFF:
+                return None
+            marker = head[pos + 1]
+            length = struct.unpack(">H", head[pos + 2:pos + 4])[0]
+            # SOF0〜SOF15（DHT・JPG・DAC を除く）に高さ・幅がある
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack(">HH", head[pos + 5:pos + 9])
+                return w, h
+            pos += 2 + length
+        return None
+    if path.suffix.lower() == ".svg":
+        opening = _SVG_OPEN_RE.search(head.decode('utf-8', 'replace'))
+        if not opening:
+            return None
+        attrs = _parse_attrs(opening.group(0))
+        w = _LENGTH_RE.match(attrs.get("width", ""))
+        h = _LENGTH_RE.match(attrs.get("height", ""))
+        if w and h:
+            return round(float(w.group(1))), round(float(h.group(1)))
+        box = attrs.get("viewBox", "").replace(",", " ").split()
+        if len(box) == 4:
+            try:
+                return round(float(box[2])), round(float(box[3]))
+            except ValueError:
+                return None
+    return None
+
+
+def _parse_attrs(tag: str) -> Dict[str, str]:
+    attrs = {}
+    for m in _ATTR_RE.finditer(re.sub(r'^<[\w:-]+', '', tag)):
+        value = next((g for g in m.group(2, 3, 4) if g is not None), "")
+        attrs[m.group(1)] = value
+    return attrs
+
+
+def resolve_image(src: str, html_path: Optional[Path]) -> Optional[Path]:
+    """<img> の src をローカルのファイルにする（viewer.html から見たパスを優先し、次に解説HTMLからの相対パス）"""
+    if not src or re.match(r'^(?:[a-z]+:|//)', src, re.IGNORECASE):
+        return None
+    src = src.split("#")[0].split("?")[0]
+    candidates = [Path(src.lstrip("/"))]
+    if html_path is not None and not src.startswith("/"):
+        candidates.append(html_path.parent / src)
+    return next((c for c in candidates if c.is_file()), None)
+
+
+def optimize_img(tag: str, html_path: Optional[Path]) -> Tuple[str, Dict[str, int]]:
+    attrs = _parse_attrs(tag)
+    extra = []
+    if "width" not in attrs and "height" not in attrs:
+        image = resolve_image(attrs.get("src", ""), html_path)
+        size = image_size(image) if image else None
+        if size:
+            extra.append(f'width="{size[0]}" height="{size[1]}"')
+    if "loading" not in attrs:
+        extra.append('loading="lazy"')
+    if "decoding" not in attrs:
+        extra.append('decoding="async"')
+    if not extra:
+        return tag, {"img": 1}
+    end = len(tag) - (2 if tag.endswith("/>") else 1)
+    body = tag[:end].rstrip()
+    return f"{body} {' '.join(extra)}{tag[end:]}", {"img": 1, "imgFixed": 1}
+
+
+def optimize_html(source: str, html_path: Optional[Path] = None) -> Tuple[str, Dict[str, int]]:
+    """解説HTMLのインラインSVG・<img> を最適化し、(変換後のHTML, 統計) を返す"""
+    stats: Dict[str, int] = {}
+    used_ids = set(re.findall(r'\sid="(fig\d+)"', source))
+    out: List[str] = []
+    pos = 0
+    for m in _TOKEN_RE.finditer(source):
+        if m.group("skip") is not None:
+            continue
+        out.append(source[pos:m.start()])
+        pos = m.end()
+        if m.group("svg") is not None:
+            text, part = optimize_svg(m.group("svg"), used_ids)
+        else:
+            text, part = optimize_img(m.group("img"), html_path)
+        out.append(text)
+        for key, value in part.items():
+            stats[key] = stats.get(key, 0) + value
+    out.append(source[pos:])
+    return "".join(out), stats
+
+
+def _image_stamps(source: str, html_path: Optional[Path]) -> str:
+    """参照しているローカル画像の大きさ・更新日時（画像だけが差し替わった場合もキャッシュを外すため）"""
+    stamps = []
+    for src in re.findall(r'<img\b[^>]*?\ssrc\s*=\s*["\']([^"\']+)', source, re.IGNORECASE):
+        image = resolve_image(src, html_path)
+        if image is not None:
+            stat = image.stat()
+            stamps.append(f"{src}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "\n".join(stamps)
+
+
+class FigureCache:
+    """解説HTMLの内容ハッシュ -> [変換後のHTML（変化がなければ None）, 統計] のキャッシュ"""
+
+    def __init__(self, cache_path: Optional[Path] = CACHE_PATH):
+        self.cache_path = cache_path
+        self.entries: Dict[str, List] = {}
+        self.used: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def load(self) -> "FigureCache":
+        if self.cache_path is None:
+            return self
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def optimize(self, source: str, html_path: Optional[Path] = None) -> Tuple[str, Dict[str, int]]:
+        """optimize_html と同じ。内容が前回と同じならキャッシュから返す"""
+        if "<svg" not in source and "<img" not in source:
+            return source, {}
+        stamp = _image_stamps(source, html_path) if "<img" in source else ""
+        key = hashlib.sha256(f"{source}\0{stamp}".encode('utf-8')).hexdigest()[:20]
+        self.used.add(key)
+        if key in self.entries:
+            self.hits += 1
+            optimized, stats = self.entries[key]
+            return (source if optimized is None else optimized), stats
+        self.misses += 1
+        optimized, stats = optimize_html(source, html_path)
+        self.entries[key] = [None if optimized == source else optimized, stats]
+        self.dirty = True
+        return optimized, stats
+
+    def save(self) -> None:
+        """今回使わなかった項目（更新・削除された解説の分）を捨てて保存する"""
+        if self.cache_path is None or not (self.dirty or set(self.entries) - self.used):
+            return
+        self.entries = {k: v for k, v in self.entries.items() if k in self.used}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説HTMLのインラインSVG・画像の最適化（削減量の確認）")
+    parser.add_argument("--all", action="store_true", help="変化のなかったファイルも表示する")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに全件処理する")
+    args = parser.parse_args()
+
+    cache = FigureCache(None if args.no_cache else CACHE_PATH).load()
+    files = sorted(EXPLANATIONS_ROOT.rglob("*.html"))
+    totals: Dict[str, int] = {}
+    before_total = after_total = 0
+    print(f"{'元':>9} {'最適化後':>9} {'削減':>8}  {'SVG':>4} {'丸め':>5} {'use化':>5} {'img':>4}  ファイル")
+    for path in files:
+        source = path.read_text(encoding='utf-8')
+        optimized, stats = cache.optimize(source, path)
+        before = len(source.encode('utf-8'))
+        after = len(optimized.encode('utf-8'))
+        before_total += before
+        after_total += after
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        if stats and (args.all or before != after or stats.get("imgFixed")):
+            print(f"{before:>9} {after:>9} {before - after:>8}  {stats.get('svg', 0):>4} {stats.get('rounded', 0):>5}"
+                  f" {stats.get('deduped', 0):>5} {stats.get('imgFixed', 0):>4}  {path}")
+    cache.save()
+
+    print(f"対象: {len(files)} ファイル / SVG {totals.get('svg', 0)} 個 / img {totals.get('img', 0)} 個"
+          f"（属性を追加 {totals.get('imgFixed', 0)} 個）")
+    saved = before_total - after_total
+    print(f"削減量: {saved} bytes（{saved / before_total * 100 if before_total else 0:.1f}%）")
+    print(f"キャッシュ: ヒット {cache.hits} / 処理 {cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
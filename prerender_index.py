@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+トップページ（index.html）の教材タブと問題一覧の枠を事前に HTML にするスクリプト
+data/manifest.json の教材ごとに、index.js の renderContent が生徒向けに組み立てるのと同じ科目・分野の枠
+（科目名・分野名・件数。エスケープ・data-* 属性も同じ）を data/partials/<教材ID>.html に書き出し、
+index.html の目印コメント（<!-- prerender:名前 --> 〜 <!-- /prerender:名前 -->）の間に
+タブ・最初の教材の枠・manifest を埋め込む。
+
+問題の行（分野を開くまで見えない部分）は書き出さず、分割された教材と同じ data-shard / data-folder-id の
+目印にする。分野を開くと index.js の loadSubjectShard が科目ファイル（分割されていない教材は教材JSONの
+data-subject-index 番目の科目）を読んで行を入れるので、index.html・部分HTMLは教材JSONより十分小さい。
+
+index.js は埋め込まれたタブと枠にクリック時の処理を付けるだけなので、manifest.json・教材データの取得や
+HTML の組み立てを待たずに一覧が表示される。タブを切り替えたときは data/partials/ の HTML をそのまま入れる。
+先生用の表示（?mode=teacher）と、埋め込み・部分HTMLがない場合は従来どおり教材データから組み立てる。
+
+index.js の問題一覧の組み立て（renderContent・buildFieldItem・fieldCounts など）を変えたときは、
+このスクリプトも同じように変えること（--verify では検出できない）。
+
+使い方:
+  python3 prerender_index.py           # 部分HTMLと index.html を更新（内容が変わったファイルだけ書き込む）
+  python3 prerender_index.py --verify  # 教材JSONと比べて古くないか確認（古ければ終了コード1）
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from generate_explanation_index import load_manifest, read_material
+from material_store import write_text_if_changed
+
+PARTIALS_ROOT = Path("data/partials")
+INDEX_HTML_PATH = Path("index.html")
+# index.js の EXAM_TYPES（「入試過去問」タブの下にまとめる教材）
+EXAM_TYPES = ("exam_year", "exam_univ")
+# index.js の renderContent で分野を「編 / 章」に分けて表示する教材名
+TEXTBOOK_NAMES = ("物理基礎", "物理", "リードLight", "リードα")
+
+# JS の undefined（キーがない値）。String() では "undefined"、esc() では空文字になる
+_UNDEFINED = object()
+
+
+def js_string(value) -> str:
+    """JS の String(value) と同じ文字列にする"""
+    if value is _UNDEFINED:
+        return "undefined"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def esc(value) -> str:
+    """index.js の esc（escapeHtml = textContent を innerHTML で読み出したもの。引用符はエスケープしない）"""
+    if value is None or value is _UNDEFINED:
+        return ""
+    text = js_string(value)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\xa0", "&nbsp;")
+
+
+def is_pdf(path: str) -> bool:
+    return path.lower().endswith(".pdf") or "pdfs/" in path or "\\pdfs\\" in path
+
+
+def has_youtube(problem: Dict) -> bool:
+    url = problem.get("youtubeUrl")
+    return bool(url and url.strip())
+
+
+def field_counts(field: Dict) -> Dict[str, int]:
+    """index.js の fieldCounts（分割された教材の索引では problems の代わりに件数だけが入っている）"""
+    if "problems" not in field and isinstance(field.get("count"), int):
+        return {"total": field["count"], "public": field.get("publicCount", 0),
+                "expl": field.get("explanationCount", 0), "video": field.get("videoCount", 0)}
+    problems = field.get("problems") or []
+    return {
+        "total": len(problems),
+        "public": sum(1 for p in problems if p.get("isPublic") is not False),
+        "expl": sum(1 for p in problems if p.get("explanationPath") and not is_pdf(p["explanationPath"])),
+        "video": sum(1 for p in problems if has_youtube(p)),
+    }
+
+
+def build_field_item(field: Dict, display_name) -> str:
+    """index.js の buildFieldItem（分野1つ分の開閉リスト。問題の行は分野を開いたときに読み込む）"""
+    counts = field_counts(field)
+    is_empty = counts["public"] == 0
+    count_text = f"{counts['total']}件"
+    if counts["expl"] > 0 or counts["video"] > 0:
+        count_text += f"（解説{counts['expl']} / 動画{counts['video']}）"
+    parts = [f'<li class="field-item" data-empty="{js_string(is_empty)}">', '<details class="field-details">',
+             f'<summary class="field-summary"><span class="field-name">{esc(display_name)}</span>'
+             f'<span class="field-count">{count_text}</span></summary>']
+    if is_empty:
+        parts.append('<div class="field-body"><p class="prob-empty">問題はまだ登録されていません</p>')
+    else:
+        parts.append(f'<div class="field-body" data-folder-id="{esc(field.get("folderId", _UNDEFINED))}" '
+                     f'data-field-name="{esc(display_name)}"><p class="prob-empty">読み込み中...</p>')
+    parts.append("</div></details></li>")
+    return "".join(parts)
+
+
+def render_material(material: Dict, material_path: str) -> str:
+    """index.js の renderContent（生徒用）が #content-area に入れる HTML の枠
+
+    material は分割された教材なら索引（科目ごとに shard がある）、そうでなければ教材JSON（material_path）。
+    """
+    material_name = material.get("materialName") or ""
+    is_textbook = material.get("materialName") in TEXTBOOK_NAMES
+    out = [f'<div class="subject-grid" data-material-name="{esc(material_name)}">']
+    for index, subject in enumerate(material.get("subjects") or []):
+        fields = subject.get("fields")
+        if not fields:
+            continue
+        subject_name = subject.get("subjectName", _UNDEFINED)
+        if subject.get("shard"):
+            out.append(f'<div class="subject-card" data-shard="{esc(subject["shard"])}" data-subject-name="{esc(subject_name)}">')
+        else:
+            out.append(f'<div class="subject-card" data-shard="{esc(material_path)}" data-subject-index="{index}" '
+                       f'data-subject-name="{esc(subject_name)}">')
+        out.append(f'<div class="subject-header"><h3 class="subject-name">{esc(subject_name)}</h3>'
+                   '<span class="index-legend" aria-hidden="true">📖：解説ページ　📹：解説動画</span></div>')
+        if is_textbook:
+            # 「第3編 波 / 第1章 波の性質」を編ごとにまとめる（編のない分野は最後）
+            groups: Dict[str, List] = {}
+            for field in fields:
+                name = field.get("fieldName") or ""
+                part, sep, chapter = name.partition(" / ")
+                if not sep:
+                    part, chapter = "", name
+                groups.setdefault(part, []).append((field, chapter))
+            order = [part for part in groups if part] + ([""] if "" in groups else [])
+            for part in order:
+                if part:
+                    out.append(f'<h4 class="part-name">{esc(part)}</h4>')
+                out.append('<ul class="field-list">')
+                for field, chapter in groups[part]:
+                    out.append(build_field_item(field, chapter))
+                out.append("</ul>")
+        else:
+            out.append('<ul class="field-list">')
+            for field in fields:
+                out.append(build_field_item(field, field.get("fieldName", _UNDEFINED)))
+            out.append("</ul>")
+        out.append("</div>")
+    out.append("</div>")
+    return "".join(out)
+
+
+def render_tabs(manifest: List[Dict]) -> str:
+    """index.js の initTabs と同じ並び（通常の教材 -> 入試過去問 -> その他）のタブ。最初の通常の教材を選択状態にする"""
+    buttons = []
+
+    def main_tab(index: int, name: str) -> str:
+        active = not buttons
+        label = html.escape(name)
+        state = ' aria-current="page"' if active else ""
+        return (f'<button class="tab-btn{" active" if active else ""}" type="button" aria-label="{label}を選択" '
+                f'data-index="{index}"{state}>{label}</button>')
+
+    for index, material in enumerate(manifest):
+        if material.get("type") in EXAM_TYPES or material.get("id") == "other":
+            continue
+        buttons.append(main_tab(index, material.get("name", "")))
+    exam = ""
+    if any(material.get("type") in EXAM_TYPES for material in manifest):
+        exam = '<button class="tab-btn" type="button" data-is-exam="true">入試過去問</button>'
+    other = next((i for i, material in enumerate(manifest) if material.get("id") == "other"), -1)
+    tail = main_tab(other, manifest[other].get("name", "")) if other >= 0 else ""
+    return "".join(buttons) + exam + tail
+
+
+def render_manifest_script(manifest: List[Dict]) -> str:
+    """index.js が manifest.json を取得せずに使う埋め込みの manifest"""
+    text = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return f'<script type="application/json" id="prerendered-manifest">{text}</script>'
+
+
+def partial_path(material_id: str) -> Path:
+    return PARTIALS_ROOT / f"{material_id}.html"
+
+
+def build_partials(manifest: List[Dict]) -> Dict[Path, str]:
+    """教材ごとの部分HTML（パス -> 内容）。分割された教材は index.js と同じく索引から組み立てる"""
+    partials: Dict[Path, str] = {}
+    for entry in manifest:
+        material_id = entry.get("id", "")
+        material_path = entry.get("path", "")
+        if not material_id or not material_path:
+            continue
+        source = entry.get("index") or material_path
+        try:
+            _, data = read_material(Path(source))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {source}: {e}")
+            continue
+        partials[partial_path(material_id)] = render_material(data, material_path)
+    return partials
+
+
+def embed(page: str, name: str, content: str) -> str:
+    """page の <!-- prerender:name --> 〜 <!-- /prerender:name --> の間を content にする"""
+    pattern = re.compile(f"(<!-- prerender:{name} -->).*?(<!-- /prerender:{name} -->)", re.DOTALL)
+    if not pattern.search(page):
+        raise ValueError(f"{INDEX_HTML_PATH} に <!-- prerender:{name} --> の目印がありません")
+    return pattern.sub(lambda m: m.group(1) + content + m.group(2), page, count=1)
+
+
+def render_index_page(page: str, manifest: List[Dict], partials: Dict[Path, str]) -> str:
+    """index.html にタブ・最初の教材（index.js の loadMaterial(0) と同じ）の一覧・manifest を埋め込む"""
+    first = partials.get(partial_path(manifest[0].get("id", ""))) if manifest else None
+    page = embed(page, "tabs", render_tabs(manifest))
+    page = embed(page, "content", first or "")
+    return embed(page, "manifest", render_manifest_script(manifest))
+
+
+def verify(manifest: List[Dict]) -> int:
+    """部分HTMLと index.html の埋め込みが教材JSONと一致しているか確認し、終了コードを返す"""
+    partials = build_partials(manifest)
+    stale = []
+    for path, text in partials.items():
+        try:
+            if path.read_text(encoding='utf-8') != text:
+                stale.append(path)
+        except OSError:
+            stale.append(path)
+    page = INDEX_HTML_PATH.read_text(encoding='utf-8')
+    if page != render_index_page(page, manifest, partials):
+        stale.append(INDEX_HTML_PATH)
+    if stale:
+        for path in stale:
+            print(f"  古い: {path.as_posix()}")
+        print("NG: python3 prerender_index.py を実行してください。")
+        return 1
+    print(f"OK: {len(partials)} 教材の部分HTMLと {INDEX_HTML_PATH} は最新です")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="トップページの教材タブと問題一覧を事前にHTMLにする")
+    parser.add_argument("--verify", action="store_true", help="部分HTMLと index.html が最新か確認のみ行う")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+
+    if args.verify:
+        sys.exit(verify(manifest))
+
+    partials = build_partials(manifest)
+    for path, text in partials.items():
+        changed = write_text_if_changed(path, text)
+        print(f"  {'更新' if changed else '変更なし'}: {path.as_posix()}（{len(text.encode('utf-8'))} bytes）")
+    if PARTIALS_ROOT.exists():
+        for path in sorted(PARTIALS_ROOT.glob("*.html")):
+            if path not in partials:
+                path.unlink()
+                print(f"  削除: {path.as_posix()}")
+
+    page = INDEX_HTML_PATH.read_text(encoding='utf-8')
+    changed = write_text_if_changed(INDEX_HTML_PATH, render_index_page(page, manifest, partials))
+    print(f"{INDEX_HTML_PATH} を{'更新しました' if changed else '確認しました（変更なし）'}（教材 {len(partials)}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解説HTMLの数式（$$…$$ / \\[…\\] / \\(…\\) / $…$）をビルド時に MathML へ変換するスクリプト
+ブラウザで MathJax が組版するまで生の TeX が表示される問題をなくすため、
+publish_assets.py が dist/ に配信用の解説を書き出すとき（とアセットマニフェスト・バンドルを作るとき）に
+各数式を静的な <math> 要素に置き換える。元の解説HTMLは TeX のまま。
+
+- 変換は TeX の部分集合（分数・根号・添字・ギリシャ文字・\\text・\\mathrm・\\left…\\right など）を
+  このスクリプト内で行う。latex2mathml がインストールされていれば --renderer latex2mathml も使える
+- 対応していない数式は TeX のまま <span class="tex-fallback"> で囲んで残し、viewer.js は
+  その数式を含むカードだけを MathJax で組版する
+- 変換結果は数式の内容ハッシュをキーにして .build-cache/math.json に保存し、
+  同じ数式（繰り返し出てくる単位や式）は一度だけ変換する
+
+使い方:
+  python3 prerender_math.py                     # 全解説の数式を変換し、対応状況を表示（ファイルは変更しない）
+  python3 prerender_math.py --list-unsupported  # 対応していない数式を一覧表示
+  python3 publish_assets.py                     # dist/ への出力時に数式を変換
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import latex2mathml.converter as latex2mathml
+except ImportError:  # pip install latex2mathml で --renderer latex2mathml が使える
+    latex2mathml = None
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+CACHE_PATH = Path(".build-cache/math.json")
+CACHE_VERSION = 1
+FALLBACK_CLASS = "tex-fallback"
+
+# タグ・コメント・生テキスト要素とテキストに分割する（生テキスト要素の中は数式として扱わない）。
+# ブラウザと同じく、英字・/・!・? が続かない「<」（$a < b$ など）はタグではなくテキストとして扱う
+_TOKEN_RE = re.compile(
+    r'(?P<skip><!--.*?-->|<(?P<rawtag>script|style|pre|textarea|code|math)\b.*?</(?P=rawtag)\s*>|<[A-Za-z/!?][^>]*>)'
+    r'|(?P<text>(?:[^<]|<(?![A-Za-z/!?]))+)',
+    re.DOTALL | re.IGNORECASE,
+)
+# viewer.html の MathJax 設定と同じ区切り（$$ を $ より先に判定する）
+MATH_RE = re.compile(
+    r'(?<!\\)\$\$(?P<d1>.+?)\$\$'
+    r'|\\\[(?P<d2>.+?)\\\]'
+    r'|\\\((?P<i1>.+?)\\\)'
+    r'|(?<![\\$])\$(?P<i2>[^$]+?)(?<!\\)\$',
+    re.DOTALL,
+)
+
+
+class UnsupportedTeX(Exception):
+    """組み込みの変換器が扱えない TeX"""
+
+
+# --- 組み込みの TeX → MathML 変換 ---
+
+_GREEK = {
+    "alpha": "α", "beta": "β", "gamma": "γ", "delta": "δ", "epsilon": "ϵ", "varepsilon": "ε",
+    "zeta": "ζ", "eta": "η", "theta": "θ", "vartheta": "ϑ", "iota": "ι", "kappa": "κ",
+    "lambda": "λ", "mu": "μ", "nu": "ν", "xi": "ξ", "pi": "π", "rho": "ρ", "sigma": "σ",
+    "tau": "τ", "upsilon": "υ", "phi": "ϕ", "varphi": "φ", "chi": "χ", "psi": "ψ", "omega": "ω",
+}
+_GREEK_UPPER = {
+    "Gamma": "Γ", "Delta": "Δ", "Theta": "Θ", "Lambda": "Λ", "Xi": "Ξ", "Pi": "Π",
+    "Sigma": "Σ", "Upsilon": "Υ", "Phi": "Φ", "Psi": "Ψ", "Omega": "Ω",
+}
+_SYMBOL_IDENTIFIERS = {
+    "infty": "∞", "partial": "∂", "ell": "ℓ", "hbar": "ℏ", "varDelta": "Δ", "varOmega": "Ω",
+    "varPhi": "Φ", "checkmark": "✓",
+}
+_OPERATORS = {
+    "times": "×", "cdot": "⋅", "cdots": "⋯", "ldots": "…", "dots": "…", "pm": "±", "mp": "∓",
+    "div": "÷", "to": "→", "rightarrow": "→", "leftarrow": "←", "Rightarrow": "⇒",
+    "Leftarrow": "⇐", "Longrightarrow": "⟹", "longrightarrow": "⟶", "iff": "⟺",
+    "leftrightarrow": "↔", "simeq": "≃", "approx": "≈", "sim": "∼", "equiv": "≡",
+    "leq": "≤", "le": "≤", "geq": "≥", "ge": "≥", "neq": "≠", "ne": "≠", "ll": "≪", "gg": "≫",
+    "propto": "∝", "parallel": "∥", "perp": "⊥", "therefore": "∴", "because": "∵",
+    "circ": "∘", "degree": "°", "{": "{", "}": "}", "lvert": "|", "rvert": "|",
+    "vert": "|", "|": "‖", "int": "∫", "sum": "∑", "prod": "∏", "oint": "∮",
+}
+_LARGE_OPERATORS = {"int", "sum", "prod", "oint"}
+_FUNCTIONS = {"sin", "cos", "tan", "exp", "log", "ln", "max", "min", "lim", "sec", "csc", "cot"}
+_LIMIT_FUNCTIONS = {"max", "min", "lim"}
+_SPACES = {",": "0.167em", ":": "0.222em", ";": "0.278em", " ": "0.25em", "quad": "1em", "qquad": "2em", "!": "-0.167em"}
+_ACCENTS = {"vec": "→", "dot": "˙", "ddot": "¨", "bar": "¯", "overline": "¯", "hat": "^", "tilde": "~"}
+_BIG = {"big": "1.2em", "bigl": "1.2em", "bigr": "1.2em", "Big": "1.623em", "Bigl": "1.623em", "Bigr": "1.623em"}
+_FONT_VARIANTS = {"mathrm": "normal", "mathbf": "bold", "mathit": "italic", "mathcal": "script", "boldsymbol": "bold-italic"}
+_TEXT_VARIANTS = {"text": None, "textrm": None, "textbf": "bold", "textit": "italic", "mbox": None}
+_DELIMITERS = {"(", ")", "[", "]", "|", ".", "/"}
+_APPLY_FUNCTION = "<mo>&#x2061;</mo>"
+_STYLE_FOR_VARIANT = {"bold": "font-weight:bold", "bold-italic": "font-weight:bold"}
+
+
+def _esc(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+class _Node:
+    """変換途中の MathML 断片（添字の付け方を決めるため種類を持つ）"""
+
+    __slots__ = ("xml", "limits")
+
+    def __init__(self, xml: str, limits: bool = False):
+        self.xml = xml
+        self.limits = limits
+
+
+class TeXToMathML:
+    """TeX の部分集合を MathML に変換する再帰下降パーサ"""
+
+    _TOKEN_RE = re.compile(r'\\([A-Za-z]+|.)|(\d+(?:\.\d+)?)|(\s+)|(.)', re.DOTALL)
+
+    def __init__(self, tex: str):
+        self.tokens: List[Tuple[str, str]] = []
+        for m in self._TOKEN_RE.finditer(tex):
+            if m.group(1) is not None:
+                self.tokens.append(("cmd", m.group(1)))
+            elif m.group(2) is not None:
+                self.tokens.append(("num", m.group(2)))
+            elif m.group(3) is not None:
+                self.tokens.append(("space", m.group(3)))
+            else:
+                self.tokens.append(("char", m.group(4)))
+        self.pos = 0
+
+    def convert(self) -> str:
+        nodes = self.parse_sequence(stop=None)
+        if self.pos < len(self.tokens):
+            raise UnsupportedTeX("unbalanced braces")
+        return _row(nodes)
+
+    # -- トークン操作 --
+
+    def peek(self, skip_space: bool = True) -> Optional[Tuple[str, str]]:
+        while skip_space and self.pos < len(self.tokens) and self.tokens[self.pos][0] == "space":
+            self.pos += 1
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise UnsupportedTeX("unexpected end")
+        self.pos += 1
+        return token
+
+    def read_group_tokens(self) -> List[Tuple[str, str]]:
+        """{…} の中身のトークン列（\\text の引数など、数式として解釈しないもの用）"""
+        if self.next() != ("char", "{"):
+            raise UnsupportedTeX("expected {")
+        depth = 1
+        start = self.pos
+        while self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos]
+            self.pos += 1
+            if kind == "char" and value == "{":
+                depth += 1
+            elif kind == "char" and value == "}":
+                depth -= 1
+                if depth == 0:
+                    return self.tokens[start:self.pos - 1]
+        raise UnsupportedTeX("unclosed group")
+
+    # -- 構文 --
+
+    def parse_sequence(self, stop: Optional[str], variant: Optional[str] = None) -> List[_Node]:
+        nodes: List[_Node] = []
+        while True:
+            token = self.peek()
+            if token is None:
+                if stop is not None:
+                    raise UnsupportedTeX("unclosed group")
+                return nodes
+            kind, value = token
+            if stop == "}" and token == ("char", "}"):
+                self.pos += 1
+                return nodes
+            if stop == "right" and token == ("cmd", "right"):
+                return nodes
+            if kind == "char" and value in "^_'":
+                self.attach_script(nodes)
+                continue
+            if token == ("cmd", "displaystyle"):
+                self.pos += 1
+                rest = self.parse_sequence(stop, variant)
+                nodes.append(_Node(f'<mstyle displaystyle="true">{_row(rest)}</mstyle>'))
+                return nodes
+            nodes.extend(self.parse_atom(variant))
+
+    def parse_argument(self, variant: Optional[str] = None) -> _Node:
+        """コマンドの引数・添字（{…} または1トークン）"""
+        token = self.peek()
+        if token == ("char", "{"):
+            self.pos += 1
+            return _Node(_row(self.parse_sequence("}", variant)))
+        if token is not None and token[0] == "num":
+            # x^23 のような添字は先頭の1文字だけが対象
+            self.pos += 1
+            digits = token[1]
+            if len(digits) > 1:
+                self.tokens.insert(self.pos, ("num", digits[1:]))
+            return _Node(f"<mn>{digits[0]}</mn>")
+        nodes = self.parse_atom(variant)
+        if len(nodes) != 1:
+            raise UnsupportedTeX("bad argument")
+        return nodes[0]
+
+    def attach_script(self, nodes: List[_Node]) -> None:
+        # \\max_{x} などの添字は関数名に付け、関数適用の記号はその後ろに残す
+        apply = nodes.pop() if nodes and nodes[-1].xml == _APPLY_FUNCTION else None
+        base = nodes.pop() if nodes else _Node("<mrow></mrow>")
+        sub = sup = None
+        while True:
+            token = self.peek()
+            if token == ("char", "_") and sub is None:
+                self.pos += 1
+                sub = self.parse_argument()
+            elif token == ("char", "^") and sup is None:
+                self.pos += 1
+                sup = self.parse_argument()
+            elif token == ("char", "'") and sup is None:
+                self.pos += 1
+                primes = "′"
+                while self.peek(skip_space=False) == ("char", "'"):
+                    self.pos += 1
+                    primes += "′"
+                sup = _Node(f"<mo>{primes}</mo>")
+            else:
+                break
+        if sub is None and sup is None:
+            raise UnsupportedTeX("double script")
+        under, over = ("munder", "mover") if base.limits else ("msub", "msup")
+        if sub is not None and sup is not None:
+            tag = "munderover" if base.limits else "msubsup"
+            nodes.append(_Node(f"<{tag}>{base.xml}{sub.xml}{sup.xml}</{tag}>"))
+        elif sub is not None:
+            nodes.append(_Node(f"<{under}>{base.xml}{sub.xml}</{under}>"))
+        else:
+            nodes.append(_Node(f"<{over}>{base.xml}{sup.xml}</{over}>"))
+        if apply is not None:
+            nodes.append(apply)
+
+    def parse_atom(self, variant: Optional[str]) -> List[_Node]:
+        kind, value = self.next()
+        if kind == "num":
+            return [_Node(f"<mn>{value}</mn>")]
+        if kind == "char":
+            return [self.char_node(value, variant)]
+        return self.command(value, variant)
+
+    def char_node(self, ch: str, variant: Optional[str]) -> _Node:
+        if ch == "{":
+            return _Node(_row(self.parse_sequence("}", variant)))
+        if ch in "}&#%":
+            raise UnsupportedTeX(f"unexpected {ch}")
+        if ch == "~":
+            return _Node('<mspace width="0.25em"></mspace>')
+        if ch.isascii() and ch.isalpha():
+            return _Node(_mi(ch, variant))
+        if ch == "-":
+            return _Node("<mo>−</mo>")
+        if ch in "+=<>/!:;,|()[]*.?":
+            if ch in "()[]|":
+                return _Node(f'<mo stretchy="false">{_esc(ch)}</mo>')
+            return _Node(f"<mo>{_esc(ch)}</mo>")
+        if ch.isascii():
+            raise UnsupportedTeX(f"unexpected {ch}")
+        if ch.isalpha() and ord(ch) < 0x3000:
+            # 直接入力されたギリシャ文字など
+            return _Node(_mi(ch, variant))
+        return _Node(f"<mtext>{_esc(ch)}</mtext>")
+
+    def command(self, name: str, variant: Optional[str]) -> List[_Node]:
+        if name in _GREEK:
+            return [_Node(_mi(_GREEK[name], variant))]
+        if name in _GREEK_UPPER:
+            return [_Node(_mi(_GREEK_UPPER[name], variant or "normal"))]
+        if name in _SYMBOL_IDENTIFIERS:
+            return [_Node(_mi(_SYMBOL_IDENTIFIERS[name], variant))]
+        if name in _OPERATORS:
+            if name in _LARGE_OPERATORS:
+                return [_Node(f'<mo largeop="true">{_esc(_OPERATORS[name])}</mo>', limits=name != "int" and name != "oint")]
+            return [_Node(f"<mo>{_esc(_OPERATORS[name])}</mo>")]
+        if name in _FUNCTIONS:
+            return [_Node(f"<mi>{name}</mi>", limits=name in _LIMIT_FUNCTIONS), _Node(_APPLY_FUNCTION)]
+        if name in _SPACES:
+            return [_Node(f'<mspace width="{_SPACES[name]}"></mspace>')]
+        if name in ("frac", "dfrac", "tfrac"):
+            num = self.parse_argument()
+            den = self.parse_argument()
+            frac = f"<mfrac>{num.xml}{den.xml}</mfrac>"
+            if name == "dfrac":
+                frac = f'<mstyle displaystyle="true">{frac}</mstyle>'
+            elif name == "tfrac":
+                frac = f'<mstyle displaystyle="false">{frac}</mstyle>'
+            return [_Node(frac)]
+        if name == "sqrt":
+            if self.peek() == ("char", "["):
+                self.pos += 1
+                index = self.parse_sequence_until_bracket()
+                radicand = self.parse_argument()
+                return [_Node(f"<mroot>{radicand.xml}{index}</mroot>")]
+            return [_Node(f"<msqrt>{self.parse_argument().xml}</msqrt>")]
+        if name in _ACCENTS:
+            base = self.parse_argument(variant)
+            return [_Node(f'<mover accent="true">{base.xml}<mo>{_ACCENTS[name]}</mo></mover>')]
+        if name == "overset":
+            over = self.parse_argument()
+            base = self.parse_argument(variant)
+            return [_Node(f"<mover>{base.xml}{over.xml}</mover>")]
+        if name == "underset":
+            under = self.parse_argument()
+            base = self.parse_argument(variant)
+            return [_Node(f"<munder>{base.xml}{under.xml}</munder>")]
+        if name == "underbrace":
+            base = self.parse_argument(variant)
+            return [_Node(f'<munder accentunder="true">{base.xml}<mo>⏟</mo></munder>', limits=True)]
+        if name in _TEXT_VARIANTS:
+            return [_Node(self.text_node(self.read_group_tokens(), _TEXT_VARIANTS[name]))]
+        if name in _FONT_VARIANTS:
+            return [self.styled(self.parse_argument(_FONT_VARIANTS[name]), _FONT_VARIANTS[name])]
+        if name == "strong":
+            # viewer.html の MathJax マクロ \strong と同じ見た目（青の太字）
+            arg = self.parse_argument()
+            return [_Node(f'<mrow style="color:#3b82f6;font-weight:bold">{arg.xml}</mrow>')]
+        if name == "left":
+            open_delim = self.delimiter()
+            inner = self.parse_sequence("right", variant)
+            self.next()  # \right
+            close_delim = self.delimiter()
+            return [_Node(f"<mrow>{_fence(open_delim)}{_row(inner)}{_fence(close_delim)}</mrow>")]
+        if name in _BIG:
+            delim = self.delimiter()
+            return [_Node(f'<mo minsize="{_BIG[name]}" maxsize="{_BIG[name]}">{_esc(delim)}</mo>')]
+        raise UnsupportedTeX(f"\\{name}")
+
+    def parse_sequence_until_bracket(self) -> str:
+        nodes: List[_Node] = []
+        while self.peek() != ("char", "]"):
+            if self.peek() is None:
+                raise UnsupportedTeX("unclosed [")
+            nodes.extend(self.parse_atom(None))
+        self.pos += 1
+        return _row(nodes)
+
+    def delimiter(self) -> str:
+        kind, value = self.next()
+        if kind == "char" and value in _DELIMITERS:
+            return value
+        if kind == "cmd" and value in ("{", "}", "|", "lvert", "rvert", "vert", "langle", "rangle"):
+            return {"lvert": "|", "rvert": "|", "vert": "|", "|": "‖", "langle": "⟨", "rangle": "⟩"}.get(value, value)
+        raise UnsupportedTeX(f"delimiter {value}")
+
+    def text_node(self, tokens: List[Tuple[str, str]], variant: Optional[str]) -> str:
+        parts = []
+        for kind, value in tokens:
+            if kind == "cmd":
+                if value in ("{", "}", "%", "$", "&", "#", "_"):
+                    parts.append(value)
+                elif value == " ":
+                    parts.append(" ")
+                elif value in _SPACES:
+                    parts.append(" ")
+                else:
+                    # \text{…} の中の数式・コマンドは扱わない
+                    raise UnsupportedTeX(f"\\{value} in text")
+            elif kind == "char" and value in "{}$":
+                raise UnsupportedTeX("nested text group")
+            else:
+                parts.append(value)
+        text = "".join(parts)
+        text = text.replace(" ", "\u00a0") if text.strip() != text else text
+        attr = f' mathvariant="{variant}"' if variant else ""
+        style = f' style="{_STYLE_FOR_VARIANT[variant]}"' if variant in _STYLE_FOR_VARIANT else ""
+        return f"<mtext{attr}{style}>{_esc(text)}</mtext>"
+
+    @staticmethod
+    def styled(node: _Node, variant: str) -> _Node:
+        style = _STYLE_FOR_VARIANT.get(variant)
+        if style:
+            return _Node(f'<mrow style="{style}">{node.xml}</mrow>')
+        return node
+
+
+def _mi(text: str, variant: Optional[str]) -> str:
+    if variant in ("normal", "bold", "script"):
+        return f'<mi mathvariant="{variant}">{_esc(text)}</mi>'
+    return f"<mi>{_esc(text)}</mi>"
+
+
+def _row(nodes: List[_Node]) -> str:
+    if len(nodes) == 1:
+        return nodes[0].xml
+    return "<mrow>" + "".join(n.xml for n in nodes) + "</mrow>"
+
+
+def _fence(delim: str) -> str:
+    if delim == ".":
+        return ""
+    return f'<mo fence="true" stretchy="true">{_esc(delim)}</mo>'
+
+
+def render_builtin(tex: str, display: bool) -> str:
+    body = TeXToMathML(tex).convert()
+    # \mathrm{m} などの連続した立体の文字は1つの <mi> にまとめる
+    body = re.sub(r'(?:<mi mathvariant="normal">[^<]</mi>){2,}',
+                  lambda m: '<mi mathvariant="normal">' + "".join(re.findall(r'>([^<])<', m.group(0))) + '</mi>', body)
+    return _wrap_math(body, display)
+
+
+def render_latex2mathml(tex: str, display: bool) -> str:
+    if latex2mathml is None:
+        raise UnsupportedTeX("latex2mathml is not installed")
+    try:
+        out = latex2mathml.convert(tex, display="block" if display else "inline")
+    except Exception as e:  # latex2mathml は未対応の入力に様々な例外を投げる
+        raise UnsupportedTeX(str(e)) from e
+    return out
+
+
+def _wrap_math(body: str, display: bool) -> str:
+    # 元の TeX を <annotation> で残すと解説全体の転送量が1割ほど増えるため付けない
+    attr = ' display="block"' if display else ""
+    return f"<math{attr}>{body}</math>"
+
+
+RENDERERS: Dict[str, Callable[[str, bool], str]] = {
+    "builtin": render_builtin,
+    "latex2mathml": render_latex2mathml,
+}
+
+
+class MathCache:
+    """数式（表示形式＋TeX）の内容ハッシュ -> 変換結果 のキャッシュ
+
+    変換できなかった数式は None として記録し、次回も変換を試みない。
+    変換器の種類が変わった場合は全件作り直す。
+    """
+
+    def __init__(self, renderer: str = "builtin", cache_path: Optional[Path] = CACHE_PATH):
+        self.renderer = renderer
+        self.render = RENDERERS[renderer]
+        self.cache_path = cache_path
+        self.entries: Dict[str, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def load(self) -> "MathCache":
+        if self.cache_path is None:
+            return self
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION and data.get("renderer") == self.renderer:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def lookup(self, tex: str, display: bool) -> Optional[str]:
+        """変換した <math> 要素を返す。対応していない数式は None"""
+        key = hashlib.sha256(f"{'D' if display else 'I'}:{tex}".encode('utf-8')).hexdigest()[:20]
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        try:
+            rendered: Optional[str] = self.render(tex.strip(), display)
+        except (UnsupportedTeX, RecursionError):
+            rendered = None
+        self.entries[key] = rendered
+        self.dirty = True
+        return rendered
+
+    def save(self) -> None:
+        if not self.dirty or self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "renderer": self.renderer, "entries": self.entries},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+def prerender_html(source: str, cache: MathCache, unsupported: Optional[Counter] = None) -> Tuple[str, int, int]:
+    """HTML断片の数式を MathML に置き換え、(変換後のHTML, 変換数, 未対応数) を返す
+
+    数式はタグをまたがないテキストの中だけを探す（MathJax と同じ）。
+    未対応の数式は元の TeX のまま <span class="tex-fallback"> で囲む。
+    """
+    out: List[str] = []
+    rendered_count = 0
+    fallback_count = 0
+    for m in _TOKEN_RE.finditer(source):
+        text = m.group("text")
+        if text is None or ("$" not in text and "\\" not in text):
+            out.append(m.group(0))
+            continue
+        pos = 0
+        for math in MATH_RE.finditer(text):
+            out.append(text[pos:math.start()])
+            pos = math.end()
+            display = math.group("d1") is not None or math.group("d2") is not None
+            tex = html.unescape(next(g for g in math.group("d1", "d2", "i1", "i2") if g is not None))
+            rendered = cache.lookup(tex, display)
+            if rendered is None:
+                fallback_count += 1
+                if unsupported is not None:
+                    unsupported[(tex.strip(), display)] += 1
+                out.append(f'<span class="{FALLBACK_CLASS}">{math.group(0)}</span>')
+            else:
+                rendered_count += 1
+                out.append(rendered)
+        out.append(text[pos:])
+    return "".join(out), rendered_count, fallback_count
+
+
+def unsupported_reason(tex: str, display: bool, renderer: str) -> str:
+    try:
+        RENDERERS[renderer](tex, display)
+    except (UnsupportedTeX, RecursionError) as e:
+        return str(e)
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説HTMLの数式を MathML に変換できるか確認する")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="builtin", help="変換器（既定: builtin）")
+    parser.add_argument("--list-unsupported", action="store_true", help="対応していない数式を一覧表示")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに全件変換する")
+    args = parser.parse_args()
+
+    if args.renderer == "latex2mathml" and latex2mathml is None:
+        parser.error("latex2mathml がインストールされていません（pip install latex2mathml）")
+
+    cache = MathCache(args.renderer, None if args.no_cache else CACHE_PATH).load()
+    unsupported: Counter = Counter()
+    files = sorted(EXPLANATIONS_ROOT.rglob("*.html"))
+    rendered_total = fallback_total = 0
+    for path in files:
+        _, rendered, fallback = prerender_html(path.read_text(encoding='utf-8'), cache, unsupported)
+        rendered_total += rendered
+        fallback_total += fallback
+    cache.save()
+
+    total = rendered_total + fallback_total
+    print(f"対象: {len(files)} ファイル / 数式 {total} 件（うち異なる数式 {len(cache.entries)} 件）")
+    print(f"変換: {rendered_total} 件 / 未対応（MathJax で表示）: {fallback_total} 件"
+          + (f"（変換率 {rendered_total / total * 100:.1f}%）" if total else ""))
+    print(f"キャッシュ: ヒット {cache.hits} / 変換 {cache.misses}")
+
+    if unsupported:
+        reasons = Counter()
+        for (tex, display), count in unsupported.items():
+            reasons[unsupported_reason(tex, display, args.renderer)] += count
+        print("未対応の理由（上位）:")
+        for reason, count in reasons.most_common(10):
+            print(f"  {count:>5}  {reason}")
+    if args.list_unsupported:
+        for (tex, display), count in unsupported.most_common():
+            print(f"  {count:>3}  {'$$' if display else '$'}{tex}{'$$' if display else '$'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問題番号（「例題1」「類題2」「問a~c」「前期 大問Ⅱ」など）の解析をまとめるモジュール
+generate_textbook_basic_json.py・scripts/update_textbook_basic_from_sheet.py・build_prefetch_map.py から使う。
+
+- 問題番号は1つの正規表現で先頭から1回だけ走査し、ProblemNumber（区分, 種類, 番号, 記号）にする。
+  ProblemNumber はハッシュできるので、そのまま辞書のキー（解説・シートの行との照合）に使える
+- 解析結果はタイトルごとにメモ化する。同じタイトルを何度解析・並べ替えしても正規表現は1回だけ
+- 解説ファイル名の番号との対応（例題1 -> 01, 類題1 -> 11, 演習問題1 -> 21）と
+  並び順（例題・基本例題 -> 類題 -> 問 -> 演習問題 -> その他）もここで決める
+
+対応する形:
+  例題1 / 類題1 / 問1 / 問a / 問a~c / 演習問題1 / 思考学習 / 基本例題1 / 基本問題1 / 応用問題1 / 編末問題1 / 問題1
+  前期 大問1 / 理工 大問〔Ⅱ〕 / 前期 第1問（大問1 と同じ）/ 前期 問題Ⅲ / 前期 全問題（「前期」などは区分）
+タイトル（「例題1：正弦波の進行」）を渡した場合は「：」より前だけを解析する。
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# 長いものから並べる（「基本例題」を「例題」より、「問題」を「問」より先に試す）
+KINDS = ["基本例題", "基本問題", "応用問題", "編末問題", "演習問題", "思考学習",
+         "問題番号", "全問題", "例題", "類題", "大問", "問題", "問"]
+# 解説ファイル名の番号 = 問題の番号 + オフセット（例題1 -> 01.html, 類題1 -> 11.html, 演習問題1 -> 21.html）
+FILE_NUMBER_OFFSETS = {"例題": 0, "類題": 10, "演習問題": 20}
+# ファイル名の番号から種類を推測する範囲（これ以外の番号は 問N）
+FILE_NUMBER_SPAN = 10
+# 並び順（ここにない種類は最後）。基本例題は以前の並べ替え（タイトルに「例題」を含むか）と同じく例題と一緒に並べる
+SORT_ORDER = {"例題": 0, "基本例題": 0, "類題": 1, "問": 2, "演習問題": 3}
+# ここにない種類の並び順
+SORT_OTHER = max(SORT_ORDER.values()) + 1
+# 番号のない問題を同じ種類の最後に並べるための番号
+UNNUMBERED = 999
+
+_ROMAN = {"Ⅰ": 1, "Ⅱ": 2, "Ⅲ": 3, "Ⅳ": 4, "Ⅴ": 5, "Ⅵ": 6, "Ⅶ": 7, "Ⅷ": 8, "Ⅸ": 9, "Ⅹ": 10}
+
+_NUMBER_RE = re.compile(
+    # 入試の区分（前期・理工・2022年 同志社大学 など）は空白の前
+    r'\s*(?:(?P<session>\S(?:[^：]*?\S)?)\s+)??'
+    r'(?:第(?P<ordinal>\d+)問'
+    r'|(?P<kind>' + '|'.join(KINDS) + r')\s*'
+    r'(?:(?P<number>\d+)|〔?(?P<roman>[' + ''.join(_ROMAN) + r'])〕?|(?P<label>[A-Za-z]+(?:[~〜～][A-Za-z]+)?))?)'
+)
+
+
+class ProblemNumber(NamedTuple):
+    """解析した問題番号（解釈できなければ kind が空）"""
+    session: str
+    kind: str
+    number: Optional[int]
+    label: str
+
+    @property
+    def index(self):
+        """番号（問a などは記号）。どちらもなければ None"""
+        if self.number is not None:
+            return self.number
+        return self.label or None
+
+
+UNKNOWN = ProblemNumber("", "", None, "")
+
+
+@lru_cache(maxsize=None)
+def parse_problem_number(text: str) -> ProblemNumber:
+    """問題番号（またはタイトル）を解析する（例題1 -> 例題/1, 問a -> 問/a, 前期 大問Ⅱ -> 前期/大問/2）"""
+    head = (text or "").partition("：")[0]
+    match = _NUMBER_RE.match(head)
+    if not match:
+        return UNKNOWN
+    session = match.group("session") or ""
+    if match.group("ordinal"):
+        return ProblemNumber(session, "大問", int(match.group("ordinal")), "")
+    if match.group("number"):
+        number = int(match.group("number"))
+    elif match.group("roman"):
+        number = _ROMAN[match.group("roman")]
+    else:
+        number = None
+    return ProblemNumber(session, match.group("kind"), number, match.group("label") or "")
+
+
+@lru_cache(maxsize=None)
+def sort_key(title: str) -> Tuple[int, int]:
+    """問題の並び順キー（例題・基本例題 -> 類題 -> 問 -> 演習問題 -> その他、同じ種類は番号順）
+
+    以前はタイトルに「例題」「類題」「問」を含むかで決めていたため、演習問題も「問」を含むとして
+    番号のない問（2, 999）と同じ扱いになっていた。いまは問題番号の種類で決めるので、演習問題は
+    すべての問の後に番号順で並ぶ（基本問題・応用問題なども「問」ではなく「その他」になる）。
+    「：」より後の副題は見ない。
+    """
+    parsed = parse_problem_number(title)
+    if parsed.kind not in SORT_ORDER:
+        return (SORT_OTHER, 0)
+    return (SORT_ORDER[parsed.kind], UNNUMBERED if parsed.number is None else parsed.number)
+
+
+def file_number(parsed: ProblemNumber) -> Optional[int]:
+    """解説ファイル名・問題IDに使う番号（例題1 -> 1, 類題1 -> 11, 演習問題1 -> 21, 問3 -> 3）"""
+    if parsed.number is None:
+        return None
+    return parsed.number + FILE_NUMBER_OFFSETS.get(parsed.kind, 0)
+
+
+def from_file_number(value: int) -> str:
+    """解説ファイル名の番号から問題番号を推測する（1〜10 -> 例題, 11〜20 -> 類題, 21〜30 -> 演習問題, ほか -> 問）"""
+    for kind, offset in FILE_NUMBER_OFFSETS.items():
+        if offset < value <= offset + FILE_NUMBER_SPAN:
+            return f"{kind}{value - offset}"
+    return f"問{value}"
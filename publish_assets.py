@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配信するサイト一式を dist/ に作るスクリプト（firebase.json の hosting.public は dist）
+npm run deploy の最後（firebase deploy の直前）に実行する。
+
+- サイトのルートの HTML・sw.js と css/・js/・config/・data/ を dist/ に写す
+  （ビルド用のスクリプト・文書・ドットファイルは写さない。生徒のメモを含む data/analytics/ も写さない）
+- 解説HTML（data/explanations/**/*.html）は図を optimize_figures.py で最適化し、
+  数式を prerender_math.py で MathML に変換してから縮小し、
+  data/ の JSON は区切りの空白をなくして出力する。
+  それ以外のファイルはそのまま写す
+- 内容が変わったファイルだけ書き込み、元のファイルがなくなったものは dist/ から削除する
+- generate_asset_manifest.py と build_bundles.py も Publisher で同じ中身を作ってハッシュ・バンドルにするので、
+  Service Worker が比べるハッシュは実際に配信するファイルのもの
+- gzip / brotli の圧縮は Firebase Hosting が配信時に行うので、事前圧縮版は出力せず大きさだけ表示する
+
+使い方:
+  python3 publish_assets.py                # dist/ を更新し、変換したファイルごとの大きさを表示
+  python3 publish_assets.py --quiet        # 合計だけ表示
+  python3 publish_assets.py --out /tmp/site  # 出力先を変更（確認用）
+"""
+
+import argparse
+import gzip
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from material_store import write_bytes_if_changed
+from optimize_figures import FigureCache
+from prerender_math import MathCache, prerender_html
+
+try:
+    import brotli
+except ImportError:  # pip install brotli で brotli の大きさも表示される
+    brotli = None
+
+DATA_ROOT = Path("data")
+EXPLANATIONS_ROOT = DATA_ROOT / "explanations"
+DEFAULT_OUT = Path("dist")
+# 配信するもの（サイトのルートにあるファイルと、ディレクトリ）
+SITE_FILE_PATTERNS = ["*.html", "sw.js", "favicon.ico", "robots.txt", "ads.txt"]
+SITE_DIRS = ["css", "js", "config", "data"]
+# 配信しないディレクトリ（aggregate_student_logs.py の集計結果は生徒ごとのメモを含む）
+PRIVATE_DIRS = [DATA_ROOT / "analytics"]
+
+# コメント・生テキスト要素（中身は変更しない）・タグ・テキストに分割する
+_TOKEN_RE = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<raw><(?P<rawtag>script|style|pre|textarea)\b.*?</(?P=rawtag)\s*>)'
+    r'|(?P<tag><[^>]*>)'
+    r'|(?P<text>[^<]+)',
+    re.DOTALL | re.IGNORECASE,
+)
+_WS_RE = re.compile(r'\s+')
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,])\s*')
+_STYLE_RE = re.compile(r'^(<style\b[^>]*>)(.*)(</style\s*>)$', re.DOTALL | re.IGNORECASE)
+
+
+def minify_css(css: str) -> str:
+    """CSS のコメントと余分な空白を取り除く"""
+    css = _CSS_COMMENT_RE.sub('', css)
+    css = _WS_RE.sub(' ', css)
+    return _CSS_PUNCT_RE.sub(r'\1', css).strip()
+
+
+def minify_html(html: str) -> str:
+    """HTML断片を縮小する
+
+    コメントを削除し、連続する空白（インデント・改行）を1つの空白にまとめる。
+    空白を完全には消さないので、インライン要素の間の表示やTeXの区切りは変わらない。
+    script / pre / textarea の中身はそのまま、style はCSSとして縮小する。
+    """
+    out: List[str] = []
+    pos = 0
+    for m in _TOKEN_RE.finditer(html):
+        if m.start() != pos:
+            # どのパターンにも一致しない '<'（閉じていないタグなど）はそのまま残す
+            out.append(html[pos:m.start()])
+        pos = m.end()
+        token = m.group(0)
+        if m.group("comment") is not None:
+            continue
+        if m.group("raw") is not None:
+            style = _STYLE_RE.match(token)
+            out.append(style.group(1) + minify_css(style.group(2)) + style.group(3) if style else token)
+        else:
+            # タグ内の改行・インデントもテキストと同様に1つの空白へ
+            out.append(_WS_RE.sub(' ', token))
+    out.append(html[pos:])
+    return "".join(out).strip()
+
+
+def minify_json(text: str) -> str:
+    """JSON を区切り文字の空白なしで出力し直す"""
+    return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+
+
+def collect_site_files() -> Iterator[Path]:
+    """配信するファイルを列挙する（ドットファイル・__pycache__・PRIVATE_DIRS は除く）"""
+    for pattern in SITE_FILE_PATTERNS:
+        yield from sorted(path for path in Path(".").glob(pattern) if path.is_file())
+    for root in SITE_DIRS:
+        for path in sorted(Path(root).rglob("*")):
+            if not path.is_file() or any(part.startswith(".") or part == "__pycache__" for part in path.parts):
+                continue
+            if any(private in path.parents for private in PRIVATE_DIRS):
+                continue
+            yield path
+
+
+def is_transformed(src: Path) -> bool:
+    """縮小して配信するファイルか（解説HTMLと data/ の JSON）"""
+    if src.suffix == ".json":
+        return DATA_ROOT in src.parents
+    return src.suffix == ".html" and EXPLANATIONS_ROOT in src.parents
+
+
+class Publisher:
+    """配信するファイルの中身を作る（解説HTMLは図の最適化・数式の変換・縮小、data/ の JSON は空白なし、ほかはそのまま）"""
+
+    def __init__(self):
+        self.figure_cache = FigureCache().load()
+        self.math_cache = MathCache().load()
+
+    def render(self, src: Path) -> bytes:
+        raw = src.read_bytes()
+        if not is_transformed(src):
+            return raw
+        text = raw.decode('utf-8')
+        if src.suffix == ".json":
+            return minify_json(text).encode('utf-8')
+        text, _ = self.figure_cache.optimize(text, src)
+        text, _, _ = prerender_html(text, self.math_cache)
+        return minify_html(text).encode('utf-8')
+
+    def save(self) -> None:
+        """変換のキャッシュを保存する"""
+        self.figure_cache.save()
+        self.math_cache.save()
+
+
+def compressed_sizes(src: Path, data: bytes) -> Dict[str, int]:
+    """元・配信・gzip・brotli のバイト数"""
+    sizes = {"source": src.stat().st_size, "minified": len(data)}
+    sizes["gzip"] = len(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        sizes["brotli"] = len(brotli.compress(data, quality=11))
+    return sizes
+
+
+def remove_stale(out_root: Path, keep: set) -> List[Path]:
+    """元のファイルがなくなった出力を削除する"""
+    removed = []
+    for path in sorted(out_root.rglob("*"), reverse=True):
+        if path.is_file() and path not in keep:
+            path.unlink()
+            removed.append(path)
+        elif path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    return removed
+
+
+def format_row(name: str, sizes: Dict[str, int]) -> str:
+    source = sizes["source"]
+
+    def pct(key: str) -> str:
+        if key not in sizes:
+            return f"{'-':>16}"
+        return f"{sizes[key]:>9} ({sizes[key] / source * 100 if source else 0:>4.0f}%)"
+
+    return f"{source:>10} {pct('minified')} {pct('gzip')} {pct('brotli')}  {name}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="配信するサイト一式を dist/ に作る")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="出力ディレクトリ（既定: dist）")
+    parser.add_argument("--quiet", action="store_true", help="ファイルごとの結果を表示しない")
+    args = parser.parse_args()
+
+    out_root = args.out.resolve()
+    if out_root == Path.cwd() or out_root in Path.cwd().parents:
+        parser.error(f"{args.out} はサイトのソースを含むため出力先にできません")
+
+    publisher = Publisher()
+    totals: Dict[str, int] = {}
+    results: List[Tuple[Path, Dict[str, int]]] = []
+    written = copied = 0
+    keep = set()
+    for src in collect_site_files():
+        try:
+            data = publisher.render(src)
+        except (OSError, ValueError) as e:
+            print(f"Error publishing {src}: {e}")
+            continue
+        dest = out_root / src
+        keep.add(dest)
+        if write_bytes_if_changed(dest, data):
+            written += 1
+        copied += 1
+        if not is_transformed(src):
+            continue
+        sizes = compressed_sizes(src, data)
+        results.append((src, sizes))
+        for key, value in sizes.items():
+            totals[key] = totals.get(key, 0) + value
+    publisher.save()
+    removed = remove_stale(out_root, keep)
+
+    header = f"{'元':>10} {'縮小':>16} {'gzip':>16} {'brotli':>16}  ファイル"
+    if not args.quiet:
+        print(header)
+        for src, sizes in results:
+            print(format_row(str(src), sizes))
+        print("-" * len(header))
+        for path in removed:
+            print(f"  削除: {path.relative_to(out_root).as_posix()}")
+    if totals:
+        print(format_row(f"合計（縮小 {len(results)} ファイル）", totals))
+    print(f"{args.out}/: {copied} ファイル（書き込み {written} / 削除 {len(removed)}）")
+    if brotli is None:
+        print("brotli モジュールがないため brotli の大きさは表示していません（pip install brotli）")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,270 +2,294 @@
 # -*- coding: utf-8 -*-
 """
 スプレッドシートから物理基礎教科書問題のJSONを更新するスクリプト
-I列（章番号）とL列（問題番号）を読み取り、R列（YouTube URL）を追加
+スプレッドシートを書き出した CSV / TSV を1行ずつ読み、I列（章番号）とL列（問題番号）で
+問題を特定して、R列（YouTube URL）を追加する。
+
+- 行は読み込みながら（教材, 章）ごとにまとめ、問題は (章, 種類, 番号) をキーにした辞書で照合する
+- 結果は 追加 / 更新 / 変更なし / 競合 / 未一致 に分類して表示する（--report で JSON にも出力）
+- すでに別の URL が入っている問題はシートの URL で上書きする（更新）。--keep-existing では上書きせず競合として報告する
+- 解説がある問題は手作業で管理しているため追加しない（競合として報告）
+- シートを指定しなければ、これまで同期してきた物理基礎の行（scripts/textbook_basic_sheet.csv）を使う。
+  列を指定しなければ、見出しに「章」「問題番号」「YouTube URL」があればその列、なければ I / L / R 列を読む
+
+使い方:
+  python3 scripts/update_textbook_basic_from_sheet.py                # 同梱の textbook_basic_sheet.csv で同期
+  python3 scripts/update_textbook_basic_from_sheet.py sheet.csv
+  python3 scripts/update_textbook_basic_from_sheet.py sheet.csv --keep-existing   # 既存の URL は上書きしない
+  python3 scripts/update_textbook_basic_from_sheet.py sheet.tsv --dry-run --report report.json
+  python3 scripts/update_textbook_basic_from_sheet.py all.csv --material-col A   # 複数教材をまとめて同期
+  python3 scripts/update_textbook_basic_from_sheet.py sheet.csv --chapter-col 章 --problem-col 問題番号 --url-col URL
+  python3 scripts/update_textbook_basic_from_sheet.py sheet.csv --dry-run --profile   # 段階ごとの時間を計測
 """
 
+import argparse
+import csv
 import json
 import re
 import sys
+import time
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # プロジェクトルートのパス
-PROJECT_ROOT = Path(__file__).parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build_profile import add_profile_argument, count, profiling, stage  # noqa: E402
+from material_store import MaterialStore  # noqa: E402
+from problem_number import ProblemNumber, parse_problem_number  # noqa: E402
+
 JSON_FILE = PROJECT_ROOT / "data" / "materials" / "textbook_basic.json"
+MANIFEST_FILE = PROJECT_ROOT / "data" / "manifest.json"
+DEFAULT_MATERIAL = "textbook_basic"
+DEFAULT_SHEET = Path(__file__).resolve().parent / "textbook_basic_sheet.csv"
+# 列を指定しなかったときに使う (見出し名, 列記号)
+DEFAULT_COLUMNS = {"chapter": ("章", "I"), "problem": ("問題番号", "L"), "url": ("YouTube URL", "R")}
 
-def parse_problem_number(problem_str):
-    """
-    問題番号文字列をパースして、タイプと番号を返す
-    例: "問1" -> ("問", 1), "例題1" -> ("例題", 1), "演習問題1" -> ("演習問題", 1)
-    """
-    if not problem_str or problem_str.strip() == "":
-        return None, None
-    
-    problem_str = problem_str.strip()
-    
-    # 演習問題
-    match = re.match(r'演習問題(\d+)', problem_str)
-    if match:
-        return "演習問題", int(match.group(1))
-    
-    # 例題
-    match = re.match(r'例題(\d+)', problem_str)
-    if match:
-        return "例題", int(match.group(1))
-    
-    # 類題
-    match = re.match(r'類題(\d+)', problem_str)
-    if match:
-        return "類題", int(match.group(1))
-    
-    # 問（数字付き）
-    match = re.match(r'問(\d+)', problem_str)
-    if match:
-        return "問", int(match.group(1))
-    
-    # 問（abcなど）
-    match = re.match(r'問([a-z]+)', problem_str)
-    if match:
-        return "問", match.group(1)
-    
-    # 思考学習
-    if "思考学習" in problem_str:
-        return "思考学習", None
-    
-    return None, None
-
-def normalize_title(title):
-    """
-    タイトルを正規化して、問題番号部分を抽出
-    """
-    if not title:
-        return None
-    
-    # タイトルから問題番号部分を抽出
-    # 例: "問1：変位" -> "問1"
-    match = re.match(r'^([^：]+)', title)
-    if match:
-        return match.group(1).strip()
-    return title.strip()
-
-def find_matching_problem(problems, chapter_num, problem_number_str):
-    """
-    JSONの問題リストから、章番号と問題番号に一致する問題を探す
-    """
-    problem_type, problem_num = parse_problem_number(problem_number_str)
-    
-    if problem_type is None:
-        return None
-    
-    for problem in problems:
-        title = problem.get("title", "")
-        normalized_title = normalize_title(title)
-        
-        # 問題タイプと番号でマッチング
-        if problem_type == "演習問題":
-            if f"演習問題{problem_num}" in normalized_title:
-                return problem
-        elif problem_type == "例題":
-            if f"例題{problem_num}" in normalized_title:
-                return problem
-        elif problem_type == "類題":
-            if f"類題{problem_num}" in normalized_title:
-                return problem
-        elif problem_type == "問":
-            if isinstance(problem_num, int):
-                if f"問{problem_num}" in normalized_title or f"問{problem_num}：" in normalized_title:
-                    return problem
-            else:  # abcなど
-                if f"問{problem_num}" in normalized_title or f"問{problem_num}：" in normalized_title:
-                    return problem
-        elif problem_type == "思考学習":
-            if "思考学習" in normalized_title:
-                return problem
-    
-    return None
-
-def update_json_from_spreadsheet_data(json_data, spreadsheet_data):
+def column_index(spec: str, header: Optional[List[str]]) -> int:
+    """列の指定（"I" のような列記号、または見出し名）を0始まりの列番号にする"""
+    if header and spec in header:
+        return header.index(spec)
+    if re.fullmatch(r'[A-Za-z]{1,2}', spec):
+        index = 0
+        for ch in spec.upper():
+            index = index * 26 + (ord(ch) - ord('A') + 1)
+        return index - 1
+    raise ValueError(f"列が見つかりません: {spec}")
+
+
+def default_column(kind: str, header: Optional[List[str]]) -> str:
+    """列を指定しなかったときの列（見出しに既定の名前があればそれ、なければ列記号）"""
+    name, letter = DEFAULT_COLUMNS[kind]
+    return name if header and name in header else letter
+
+
+def read_sheet_rows(path: Path, chapter_col: Optional[str], problem_col: Optional[str], url_col: Optional[str],
+                    material_col: Optional[str] = None, has_header: bool = True) -> Iterator[Tuple[int, Optional[str], str, str, str]]:
+    """CSV / TSV を1行ずつ読み、(行番号, 教材ID, 章, 問題番号, URL) を返す
+
+    拡張子が .tsv の場合はタブ区切りとして読む。章・問題番号が空の行は読み飛ばす。
+    列が None のときは default_column の列を読む。
     """
-    スプレッドシートのデータを使ってJSONを更新
-    spreadsheet_data: [(chapter, problem_number, youtube_url), ...]
+    delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+    count("files_read")
+    count("bytes_read", path.stat().st_size)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None) if has_header else None
+        specs = zip(("chapter", "problem", "url"), (chapter_col, problem_col, url_col))
+        cols = [column_index(spec or default_column(kind, header), header) for kind, spec in specs]
+        material_index = column_index(material_col, header) if material_col else None
+        width = max(cols + ([material_index] if material_index is not None else [])) + 1
+
+        for line_no, row in enumerate(reader, start=2 if has_header else 1):
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            chapter, problem_number, url = (row[i].strip() for i in cols)
+            if not chapter and not problem_number:
+                continue
+            count("rows")
+            material = row[material_index].strip() if material_index is not None else None
+            yield line_no, material, chapter, problem_number, url
+
+
+def parse_chapter(value: str) -> Optional[int]:
+    """章番号（"1"・"第1章" など）を整数にする"""
+    match = re.search(r'\d+', value)
+    return int(match.group(0)) if match else None
+
+
+def build_problem_index(json_data) -> Dict[Tuple[int, ProblemNumber], List[Tuple[Dict, Dict]]]:
+    """(章番号, 問題番号) -> [(分野, 問題), ...] の辞書を作る
+
+    章番号は folderId の2番目の部分（例: "01/02" -> 2）。問題番号はタイトルの「：」より前を解析したもの。
     """
-    updated_count = 0
-    youtube_added_count = 0
-    
-    # 章番号からfolderIdへのマッピング（第1編=01, 第2編=02, 第3編=03）
-    # 外部リンクのデータを見ると、章番号は1-4の範囲のようです
-    # JSONの構造を見ると、第1編は01, 第2編は02, 第3編は03となっています
-    
+    index: Dict[Tuple[int, ProblemNumber], List[Tuple[Dict, Dict]]] = {}
     for subject in json_data.get("subjects", []):
         for field in subject.get("fields", []):
-            folder_id = field.get("folderId", "")
-            problems = field.get("problems", [])
-            
-            # folderIdから章番号を抽出（例: "01/01" -> 1, "01/02" -> 2）
-            # 第1編の第1章=1, 第1編の第2章=2, 第1編の第3章=3, 第4編の第4章=4
-            # ただし、外部リンクのデータは「物理」シートのデータで、章番号が1-4の範囲
-            # 「物理基礎」の場合は、第1編の第1章=1, 第1編の第2章=2, 第1編の第3章=3となる
-            
-            # folderIdの最初の部分（編）と2番目の部分（章）を取得
-            parts = folder_id.split("/")
-            if len(parts) >= 2:
-                try:
-                    chapter_num = int(parts[1])  # 章番号
-                except ValueError:
+            parts = field.get("folderId", "").split("/")
+            if len(parts) < 2:
+                continue
+            try:
+                chapter_num = int(parts[1])
+            except ValueError:
+                continue
+            for problem in field.get("problems", []):
+                parsed = parse_problem_number(problem.get("title", ""))
+                if not parsed.kind:
                     continue
+                index.setdefault((chapter_num, parsed), []).append((field, problem))
+    return index
+
+
+class SyncReport:
+    """同期結果を 追加 / 更新 / 変更なし / 競合 / 未一致 に分けて記録する"""
+
+    KINDS = ("added", "updated", "unchanged", "conflicting", "unmatched")
+    LABELS = {"added": "追加", "updated": "更新", "unchanged": "変更なし", "conflicting": "競合", "unmatched": "未一致"}
+
+    def __init__(self):
+        self.entries: Dict[str, List[Dict]] = {kind: [] for kind in self.KINDS}
+
+    def add(self, kind: str, **entry) -> None:
+        self.entries[kind].append(entry)
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: len(items) for kind, items in self.entries.items()}
+
+    def to_json(self) -> Dict:
+        return {"counts": self.counts(), **self.entries}
+
+    def print_summary(self, verbose: bool = False) -> None:
+        for kind in ("added", "updated", "conflicting", "unmatched"):
+            for entry in self.entries[kind]:
+                where = f"{entry.get('material', '')} 行{entry.get('line', '?')}"
+                target = entry.get("title") or entry.get("problem", "")
+                reason = f"（{entry['reason']}）" if entry.get("reason") else ""
+                print(f"  {self.LABELS[kind]}: {where} 第{entry.get('chapter', '?')}章 {target}{reason}")
+        if verbose:
+            for entry in self.entries["unchanged"]:
+                print(f"  {self.LABELS['unchanged']}: {entry.get('material', '')} 第{entry.get('chapter', '?')}章 {entry.get('title', '')}")
+        counts = self.counts()
+        print(" / ".join(f"{self.LABELS[kind]} {counts[kind]}" for kind in self.KINDS))
+
+
+def apply_chapter_rows(index, chapter_num: int, rows: List[Tuple[int, str, str]], material_id: str, report: SyncReport,
+                       keep_existing: bool = False) -> int:
+    """1つの章の行をまとめて適用し、更新した問題数を返す（keep_existing なら既存の URL は上書きしない）"""
+    updated = 0
+    for line_no, problem_number, url in rows:
+        base = {"material": material_id, "line": line_no, "chapter": chapter_num, "problem": problem_number}
+        parsed = parse_problem_number(problem_number)
+        if not parsed.kind:
+            report.add("unmatched", reason="問題番号を解釈できません", **base)
+            continue
+        if not url:
+            report.add("unmatched", reason="URL が空です", **base)
+            continue
+        matches = index.get((chapter_num, parsed))
+        if not matches:
+            report.add("unmatched", reason="該当する問題がありません", **base)
+            continue
+        for field, problem in matches:
+            entry = dict(base, field=field.get("fieldName", ""), title=problem.get("title", ""), url=url)
+            current = problem.get("youtubeUrl", "")
+            if current == url:
+                report.add("unchanged", **entry)
+            elif problem.get("explanationPath"):
+                # 解説がある問題は手作業で管理しているため上書きしない
+                report.add("conflicting", reason="解説ページがあるため追加しません", **entry)
+            elif current and keep_existing:
+                report.add("conflicting", reason=f"既存の URL と異なります: {current}", **entry)
+            elif current:
+                problem["youtubeUrl"] = url
+                report.add("updated", reason=f"以前の URL: {current}", **entry)
+                updated += 1
             else:
+                problem["youtubeUrl"] = url
+                report.add("added", **entry)
+                updated += 1
+    return updated
+
+
+def load_material_paths() -> Dict[str, Path]:
+    """manifest.json から 教材ID -> JSON パス を求める"""
+    paths = {DEFAULT_MATERIAL: JSON_FILE}
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                if entry.get("id") and entry.get("path"):
+                    paths[entry["id"]] = PROJECT_ROOT / entry["path"]
+    except (OSError, ValueError):
+        pass
+    return paths
+
+
+def sync_sheet(sheet: Path, args, store: MaterialStore) -> Tuple[SyncReport, Dict[str, Path]]:
+    """シートを読み込んで全教材に適用する。変更した教材の 教材ID -> パス を返す"""
+    report = SyncReport()
+    material_paths = load_material_paths()
+
+    # 読み込みながら (教材, 章) ごとにまとめる
+    grouped: Dict[str, Dict[int, List[Tuple[int, str, str]]]] = {}
+    with stage("read_sheet"):
+        for line_no, material, chapter, problem_number, url in read_sheet_rows(
+                sheet, args.chapter_col, args.problem_col, args.url_col, args.material_col, not args.no_header):
+            material_id = material or args.material
+            chapter_num = parse_chapter(chapter)
+            if chapter_num is None:
+                report.add("unmatched", material=material_id, line=line_no, chapter=chapter,
+                           problem=problem_number, reason="章番号を解釈できません")
                 continue
-            
-            # この章に該当するスプレッドシートのデータをフィルタ
-            chapter_data = [(ch, pn, url) for ch, pn, url in spreadsheet_data if ch == chapter_num]
-            
-            for chapter_num_sp, problem_number, youtube_url in chapter_data:
-                problem = find_matching_problem(problems, chapter_num_sp, problem_number)
-                
-                if problem:
-                    # すでにexplanationPathが存在する場合はスキップ
-                    if "explanationPath" in problem and problem["explanationPath"]:
-                        continue
-                    
-                    # YouTube URLがある場合は追加
-                    if youtube_url and youtube_url.strip():
-                        problem["youtubeUrl"] = youtube_url.strip()
-                        youtube_added_count += 1
-                        updated_count += 1
-                        print(f"更新: {field.get('fieldName', '')} - {problem.get('title', '')} - YouTube URL追加")
-    
-    return updated_count, youtube_added_count
+            grouped.setdefault(material_id, {}).setdefault(chapter_num, []).append((line_no, problem_number, url))
+
+    changed: Dict[str, Path] = {}
+    for material_id, chapters in grouped.items():
+        path = material_paths.get(material_id)
+        if path is None or not path.exists():
+            for chapter_num, rows in chapters.items():
+                for line_no, problem_number, _ in rows:
+                    report.add("unmatched", material=material_id, line=line_no, chapter=chapter_num,
+                               problem=problem_number, reason="教材が見つかりません")
+            continue
+        with stage("load_json"):
+            json_data = store.load(path)
+        with stage("build_index"):
+            index = build_problem_index(json_data)
+        updated = 0
+        with stage("apply"):
+            for chapter_num, rows in chapters.items():
+                updated += apply_chapter_rows(index, chapter_num, rows, material_id, report, args.keep_existing)
+        if updated:
+            changed[material_id] = path
+    return report, changed
+
+
+def run(args) -> None:
+    started = time.perf_counter()
+    store = MaterialStore()
+    try:
+        report, changed = sync_sheet(args.sheet, args, store)
+    except (OSError, ValueError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+    # 問題番号の解析は文字列ごとにメモ化しているので、正規表現を走らせたのは異なる文字列の数だけ
+    count("problem_number_parsed", parse_problem_number.cache_info().currsize)
+
+    for material_id, path in changed.items():
+        with stage("save_json"):
+            diff = store.save(path, dry_run=args.dry_run)
+        if diff:
+            print(f"{'変更あり' if args.dry_run else '保存'}: {path.relative_to(PROJECT_ROOT)}（{diff.summary()}）")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report.to_json(), f, ensure_ascii=False, indent=2)
+
+    print("\n同期結果:")
+    report.print_summary(args.verbose)
+    print(f"処理時間: {time.perf_counter() - started:.3f} 秒" + ("（--dry-run のため保存していません）" if args.dry_run else ""))
+
 
 def main():
-    # スプレッドシートのデータ（外部リンクから取得したデータをパース）
-    # 形式: [(章番号, 問題番号, YouTube URL), ...]
-    # 外部リンクのデータから手動で抽出したデータを使用
-    spreadsheet_data = [
-        # 第1章（章番号1）
-        (1, "問1", "https://youtu.be/sC5li_LEcxM"),
-        (1, "問2", "https://youtu.be/I9JNMF_YuXo"),
-        (1, "例題1", "https://youtu.be/2OtwN26MA2M"),
-        (1, "類題1", "https://youtu.be/nP0Gd-FDrNE"),
-        (1, "問abc", "https://youtu.be/k1TNTW4EkPo"),
-        (1, "問3", "https://youtu.be/BIE_4psLN-8"),
-        (1, "例題2", "https://youtu.be/RB9LdYZ1Eys"),
-        (1, "類題2", "https://youtu.be/z3LUnGS8CPg"),
-        (1, "例題3", "https://youtu.be/UEO2SDUOQEU"),
-        (1, "類題3", "https://youtu.be/R5raAFoJX6c"),
-        (1, "問a", "https://youtu.be/coGvlyA9E98"),
-        (1, "問b", "https://youtu.be/CxOtCGL_1NM"),
-        (1, "問c", "https://youtu.be/pZeQFyAcJ8M"),
-        (1, "演習問題1", "https://youtu.be/EK9tWnXNW2w"),
-        (1, "演習問題2", "https://youtu.be/m3dT3KMbm30"),
-        (1, "演習問題3", "https://youtu.be/vCgarDovoN8"),
-        (1, "演習問題4", "https://youtu.be/GPxG-uqTdN4"),
-        (1, "演習問題5", "https://youtu.be/pEDfjbJKnCQ"),
-        # 第2章（章番号2）
-        (2, "問4", "https://youtu.be/S6oPL7MYe4I"),
-        (2, "問5", "https://youtu.be/P0XNwjErJnY"),
-        (2, "例題4", "https://youtu.be/1g7kBf3GR_w"),
-        (2, "類題4", "https://youtu.be/fRYknHrrHp8"),
-        (2, "問6", "https://youtu.be/ZcF22W83Kbw"),
-        (2, "問7", "https://youtu.be/bbnLoZYwDjc"),
-        (2, "問8", "https://youtu.be/C8bEzjJQz6Q"),
-        (2, "問9", "https://youtu.be/Y_3Y3qlAqjY"),
-        (2, "問10", "https://youtu.be/Cs3KXR3lbZc"),
-        (2, "問11", "https://youtu.be/SrIBSW0M1cw"),
-        (2, "例題5", "https://youtu.be/HJgZXbZ0GJw"),
-        (2, "類題5", "https://youtu.be/NaHwNxef7j4"),
-        (2, "思考学習", "https://youtu.be/cfrXjJA2waI"),
-        (2, "演習問題1", "https://youtu.be/rd6lrQ4ToY8"),
-        (2, "演習問題2", "https://youtu.be/o0Qz9Lv-GN4"),
-        (2, "演習問題3", "https://youtu.be/k78UcD-Oe4I"),
-        (2, "演習問題4", "https://youtu.be/6i41BckCIZM"),
-        # 第3章（章番号3）
-        (3, "問13", "https://youtu.be/0jd4rfHUlno"),
-        (3, "問14", "https://youtu.be/JaImpWW_S9A"),
-        (3, "例題6", "https://youtu.be/B5qHXDqly_A"),
-        (3, "類題6", "https://youtu.be/7Lgb3lN4-PQ"),
-        (3, "例題7", "https://youtu.be/HL5v4ti7HTA"),
-        (3, "類題7", "https://youtu.be/sEOS78A72r0"),
-        (3, "例題8", "https://youtu.be/heVDy2xSZPA"),
-        (3, "類題8", "https://youtu.be/WHhDQTqk1uA"),
-        (3, "例題9", "https://youtu.be/qPbDHGxX7eg"),
-        (3, "類題9", "https://youtu.be/YOmYBUBSd6k"),
-        (3, "問16", "https://youtu.be/-hrJtcsf_NE"),
-        (3, "問17", "https://youtu.be/y80Oru5DH9Y"),
-        (3, "例題10", "https://youtu.be/0zV0RaXWaGE"),
-        (3, "類題10", "https://youtu.be/vlnuw9pDqxk"),
-        (3, "例題11", "https://youtu.be/A6bdSvoAxyE"),
-        (3, "類題11", "https://youtu.be/mGIpKSJ_PMI"),
-        (3, "問18", "https://youtu.be/1PWUjjg-JHI"),
-        (3, "演習問題1", "https://youtu.be/_gOZdFZpCG8"),
-        (3, "演習問題2", "https://youtu.be/3u_0Vpa36F4"),
-        (3, "演習問題3", "https://youtu.be/nxV3hntL-Ic"),
-        (3, "演習問題4", "https://youtu.be/c0c7Sq_ibUo"),
-        (3, "演習問題5", "https://youtu.be/Ji6mGBbynpI"),
-        (3, "演習問題6", "https://youtu.be/rrVTCh-vVRs"),
-        (3, "演習問題7", "https://youtu.be/p1faQ94uHmA"),
-        # 第4章（章番号4）
-        (4, "問22", "https://youtu.be/4DQlE2YIgi0"),
-        (4, "例題12", "https://youtu.be/YmZYYgo4Toc"),
-        (4, "類題12", "https://youtu.be/eBjfVD7UOnc"),
-        (4, "例題13", "https://youtu.be/QQEhEBNMFhM"),
-        (4, "類題13", "https://youtu.be/-fXY7F9FhRM"),
-        (4, "例題14", "https://youtu.be/e9e8l2GIcxo"),
-        (4, "類題14", "https://youtu.be/jj-mhM8D8h0"),
-        (4, "例題15", "https://youtu.be/gR2mTRvYbuM"),
-        (4, "類題15", "https://youtu.be/u0M0g-yMwPE"),
-        (4, "例題16", "https://youtu.be/A1ENGNfqJtg"),
-        (4, "類題16", "https://youtu.be/l9JdImmnU_4"),
-        (4, "問24", "https://youtu.be/BbRpp4GKgYw"),
-        (4, "問25", "https://youtu.be/Fur02gUT0Kw"),
-        (4, "問26", "https://youtu.be/MN2t5sORWys"),
-        (4, "問27", "https://youtu.be/BMpA7zjgxuE"),
-        (4, "問28", "https://youtu.be/Tx2AOY3GanM"),
-        (4, "例題17", "https://youtu.be/qHtTkIe2LZc"),
-        (4, "問31", "https://youtu.be/hcw-DfkgAS0"),
-        (4, "問32", "https://youtu.be/E-E02BRiiM8"),
-        (4, "問34", "https://youtu.be/fzGsoloGOd4"),
-        (4, "例題18", "https://youtu.be/b_RGUkshXSs"),
-        (4, "類題18", "https://youtu.be/_kIlZBYb6Zw"),
-        (4, "問35", "https://youtu.be/gPTa4gId1TM"),
-        (4, "例題19", "https://youtu.be/AGarIiC4CzI"),
-        (4, "類題19", "https://youtu.be/tY4pq0P1JLY"),
-    ]
-    
-    # JSONファイルを読み込み
-    with open(JSON_FILE, "r", encoding="utf-8") as f:
-        json_data = json.load(f)
-    
-    # JSONを更新
-    updated_count, youtube_added_count = update_json_from_spreadsheet_data(json_data, spreadsheet_data)
-    
-    # JSONファイルを保存
-    with open(JSON_FILE, "w", encoding="utf-8") as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n更新完了:")
-    print(f"  更新された問題数: {updated_count}")
-    print(f"  YouTube URL追加数: {youtube_added_count}")
+    parser = argparse.ArgumentParser(description="スプレッドシートの書き出し（CSV / TSV）から教材JSONの YouTube URL を更新")
+    parser.add_argument("sheet", type=Path, nargs="?", default=DEFAULT_SHEET,
+                        help=f"スプレッドシートを書き出した CSV / TSV ファイル（既定: {DEFAULT_SHEET.relative_to(PROJECT_ROOT)}）")
+    parser.add_argument("--material", default=DEFAULT_MATERIAL, help=f"教材列がない行の教材ID（既定: {DEFAULT_MATERIAL}）")
+    parser.add_argument("--material-col", help="教材IDの列（列記号または見出し名）")
+    parser.add_argument("--chapter-col", help="章番号の列（既定: 見出し「章」、なければ I）")
+    parser.add_argument("--problem-col", help="問題番号の列（既定: 見出し「問題番号」、なければ L）")
+    parser.add_argument("--url-col", help="YouTube URL の列（既定: 見出し「YouTube URL」、なければ R）")
+    parser.add_argument("--no-header", action="store_true", help="1行目もデータとして読む")
+    parser.add_argument("--keep-existing", action="store_true", help="別の URL が入っている問題を上書きせず競合として報告")
+    parser.add_argument("--dry-run", action="store_true", help="JSON を書き込まずに結果だけ表示")
+    parser.add_argument("--report", type=Path, help="結果を JSON で書き出すパス")
+    parser.add_argument("--verbose", action="store_true", help="変更なしの問題も表示")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling(args.profile, "update_textbook_basic_from_sheet"):
+        run(args)
+
 
 if __name__ == "__main__":
     main()
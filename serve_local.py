@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Firebase Hosting の配信規則をまねたローカルサーバー
+firebase.json の hosting（public・ignore・headers）を読み、本番に近い応答ヘッダーで静的ファイルを配信する。
+benchmarks/load_test.py の負荷試験の相手や、デプロイ前の確認に使う。
+
+- 公開ディレクトリは firebase.json の public（dist/、publish_assets.py の出力）。--source ではリポジトリのルートを配信する
+- Accept-Encoding に応じて、同じ場所に .br / .gz があればそれを返す。
+  なければ Firebase Hosting と同じく、テキスト系のファイルをその場で gzip 圧縮して返す（--no-compress で無効）
+- 返す中身ごとに強い ETag（内容のハッシュ）を付け、If-None-Match が一致すれば 304 を返す
+- Cache-Control は firebase.json の headers、なければ Firebase Hosting の既定（max-age=3600）
+- ignore に当たるパス（.git・.build-cache・node_modules など）と存在しないパスは 404.html を 404 で返す
+
+使い方（リポジトリのルートで実行）:
+  python3 serve_local.py                 # http://127.0.0.1:5000/ で dist/ を配信（先に python3 publish_assets.py）
+  python3 serve_local.py --source        # 変換前のファイル（リポジトリのルート）を配信
+  python3 serve_local.py --source --dist # ルートを配信し、dist/ に同じパスがあればそちらを優先
+  python3 serve_local.py --port 0 -v     # 空いているポートで起動し、リクエストを1行ずつ表示
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import sys
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import unquote, urlsplit
+
+FIREBASE_CONFIG = Path("firebase.json")
+DEFAULT_DIST = Path("dist")
+DEFAULT_PORT = 5000
+# Firebase Hosting が headers の指定のないファイルに付ける Cache-Control
+DEFAULT_CACHE_CONTROL = "max-age=3600"
+NOT_FOUND_PAGE = "404.html"
+# 事前圧縮ファイルの拡張子（優先順）
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+# その場で圧縮するファイルの種類と、圧縮しない小さいファイルの上限
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/xml")
+MIN_COMPRESS_SIZE = 256
+# その場で圧縮した結果をメモリに保持する上限
+COMPRESS_CACHE_BYTES = 64 * 1024 * 1024
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".txt": "text/plain; charset=utf-8",
+    ".bin": "application/octet-stream",
+    ".webmanifest": "application/manifest+json",
+}
+
+
+def glob_to_regex(pattern: str) -> Pattern:
+    """firebase.json の source / ignore の glob を正規表現にする（先頭の / はあってもなくてもよい）"""
+    pattern = pattern.lstrip("/")
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+class HostingRules:
+    """firebase.json の hosting の設定（公開ディレクトリ・除外・ヘッダー）"""
+
+    def __init__(self, config: Dict):
+        hosting = config.get("hosting", {})
+        if isinstance(hosting, list):
+            hosting = hosting[0] if hosting else {}
+        self.public = Path(hosting.get("public", "."))
+        self.ignore = [glob_to_regex(p) for p in hosting.get("ignore", [])]
+        self.headers: List[Tuple[Pattern, List[Tuple[str, str]]]] = [
+            (glob_to_regex(rule["source"]), [(h["key"], h["value"]) for h in rule.get("headers", [])])
+            for rule in hosting.get("headers", []) if "source" in rule
+        ]
+
+    @classmethod
+    def load(cls, path: Path = FIREBASE_CONFIG) -> "HostingRules":
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls({})
+
+    def is_ignored(self, rel: str) -> bool:
+        """パスそのものか、途中のディレクトリが ignore に当たるか（Firebase CLI はディレクトリごと除外する）"""
+        parts = rel.split("/")
+        prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        return any(pattern.match(prefix) for pattern in self.ignore for prefix in prefixes)
+
+    def headers_for(self, rel: str) -> List[Tuple[str, str]]:
+        """パスに当たる headers を firebase.json の順に適用する（同じキーは後の規則で上書き）"""
+        merged: Dict[str, Tuple[str, str]] = {}
+        for pattern, headers in self.headers:
+            if pattern.match(rel):
+                for key, value in headers:
+                    merged[key.lower()] = (key, value)
+        if "cache-control" not in merged:
+            merged["cache-control"] = ("Cache-Control", DEFAULT_CACHE_CONTROL)
+        return list(merged.values())
+
+
+def content_type(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix in CONTENT_TYPES:
+        return CONTENT_TYPES[suffix]
+    guessed, _ = mimetypes.guess_type(path.name)
+    return guessed or "application/octet-stream"
+
+
+def is_compressible(mime: str) -> bool:
+    return mime.startswith(COMPRESSIBLE_TYPES)
+
+
+def strong_etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:20] + '"'
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding を 符号化名 -> q値 にする（q=0 は受け付けない）"""
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return {name: q for name, q in accepted.items() if q > 0}
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match（弱い比較）"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class Representation:
+    """1つのファイルの、ある符号化での中身"""
+
+    __slots__ = ("data", "etag", "encoding")
+
+    def __init__(self, data: bytes, etag: str, encoding: Optional[str]):
+        self.data = data
+        self.etag = etag
+        self.encoding = encoding
+
+
+class SiteFiles:
+    """公開ディレクトリ（と dist/ の縮小版）からファイルを探し、符号化ごとの中身と ETag を返す"""
+
+    def __init__(self, root: Path, dist: Optional[Path], compress: bool):
+        self.root = root.resolve()
+        self.dist = dist.resolve() if dist else None
+        self.compress = compress
+        # (ファイル, mtime_ns, size) -> ETag
+        self._etags: Dict[Tuple[str, int, int], str] = {}
+        # (ファイル, mtime_ns, size) -> その場で gzip 圧縮した中身
+        self._compressed: "OrderedDict[Tuple[str, int, int], Representation]" = OrderedDict()
+        self._compressed_bytes = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, rel: str) -> Optional[Path]:
+        """公開パスに対応するファイル（dist/ に同じパスがあれば優先）"""
+        for base in ([self.dist] if self.dist else []) + [self.root]:
+            candidate = (base / rel).resolve()
+            # 公開ディレクトリの外を指すパスは扱わない
+            if candidate != base and base not in candidate.parents:
+                continue
+            if candidate.is_dir():
+                candidate = candidate / "index.html"
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def _read(self, path: Path, encoding: Optional[str]) -> Representation:
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        data = path.read_bytes()
+        with self._lock:
+            etag = self._etags.get(key)
+        if etag is None:
+            etag = strong_etag(data)
+            with self._lock:
+                self._etags[key] = etag
+        return Representation(data, etag, encoding)
+
+    def _gzip(self, path: Path) -> Representation:
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._compressed.get(key)
+            if cached is not None:
+                self._compressed.move_to_end(key)
+                return cached
+        data = gzip.compress(path.read_bytes(), compresslevel=6, mtime=0)
+        rep = Representation(data, strong_etag(data), "gzip")
+        with self._lock:
+            self._compressed[key] = rep
+            self._compressed_bytes += len(data)
+            while self._compressed_bytes > COMPRESS_CACHE_BYTES and len(self._compressed) > 1:
+                _, old = self._compressed.popitem(last=False)
+                self._compressed_bytes -= len(old.data)
+        return rep
+
+    def representation(self, path: Path, accept: Dict[str, float]) -> Representation:
+        """Accept-Encoding に合う中身（事前圧縮 > その場で gzip > そのまま）"""
+        ranked = sorted(ENCODINGS, key=lambda e: -accept.get(e[0], 0.0))
+        for name, suffix in ranked:
+            if accept.get(name, 0.0) <= 0:
+                continue
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                return self._read(variant, name)
+        if self.compress and accept.get("gzip", 0.0) > 0 and is_compressible(content_type(path)) \
+                and path.stat().st_size >= MIN_COMPRESS_SIZE:
+            return self._gzip(path)
+        return self._read(path, None)
+
+
+class HostingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "serve_local"
+    sys_version = ""
+    # ヘッダーと本文を別々に送るので、Nagle と遅延ACKで 40ms 待たされないようにする
+    disable_nagle_algorithm = True
+
+    rules: HostingRules
+    site: SiteFiles
+    verbose = False
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool) -> None:
+        rel = unquote(urlsplit(self.path).path).lstrip("/")
+        path = None if self.rules.is_ignored(rel) else self.site.resolve(rel)
+        status = HTTPStatus.OK
+        if path is None:
+            status = HTTPStatus.NOT_FOUND
+            path = self.site.resolve(NOT_FOUND_PAGE)
+            if path is None:
+                self._send_empty(status)
+                return
+            rel = NOT_FOUND_PAGE
+
+        mime = content_type(path)
+        compressible = is_compressible(mime) or any(path.with_name(path.name + s).is_file() for _, s in ENCODINGS)
+        rep = self.site.representation(path, accepted_encodings(self.headers.get("Accept-Encoding")))
+
+        headers = self.rules.headers_for(rel)
+        headers.append(("ETag", rep.etag))
+        if compressible:
+            headers.append(("Vary", "Accept-Encoding"))
+
+        if status == HTTPStatus.OK and etag_matches(self.headers.get("If-None-Match"), rep.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in headers:
+                self.send_header(key, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", mime)
+        if rep.encoding:
+            self.send_header("Content-Encoding", rep.encoding)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(rep.data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(rep.data)
+
+    def _send_empty(self, status: HTTPStatus) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class HostingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 負荷試験で同時に多数接続されても SYN の再送（1秒）待ちにならないようにする
+    request_queue_size = 128
+
+
+def make_server(host: str, port: int, rules: HostingRules, site: SiteFiles, verbose: bool = False) -> HostingServer:
+    handler = type("Handler", (HostingHandler,), {"rules": rules, "site": site, "verbose": verbose})
+    return HostingServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firebase Hosting の配信規則をまねたローカルサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="待ち受けるポート（0 で空いているポート）")
+    parser.add_argument("--config", type=Path, default=FIREBASE_CONFIG, help="firebase.json のパス")
+    parser.add_argument("--source", action="store_true", help="firebase.json の public ではなくリポジトリのルートを配信する")
+    parser.add_argument("--dist", nargs="?", const=DEFAULT_DIST, type=Path, metavar="DIR",
+                        help=f"縮小版・事前圧縮版を優先して配信するディレクトリ（既定: {DEFAULT_DIST}）")
+    parser.add_argument("--no-compress", action="store_true", help="事前圧縮版がないファイルをその場で圧縮しない")
+    parser.add_argument("-v", "--verbose", action="store_true", help="リクエストを1行ずつ表示する")
+    args = parser.parse_args()
+
+    rules = HostingRules.load(args.config)
+    root = args.config.parent / (Path(".") if args.source else rules.public)
+    if not root.is_dir():
+        print(f"Warning: {root} がありません。python3 publish_assets.py で作成できます。", file=sys.stderr)
+    if args.dist and not args.dist.is_dir():
+        print(f"Warning: {args.dist} がありません。python3 publish_assets.py で作成できます。", file=sys.stderr)
+    site = SiteFiles(root, args.dist if args.dist and args.dist.is_dir() else None, compress=not args.no_compress)
+    server = make_server(args.host, args.port, rules, site, verbose=args.verbose)
+
+    host, port = server.server_address[:2]
+    # benchmarks/load_test.py は最初の行から URL を読む
+    print(f"http://{host}:{port}/", flush=True)
+    print(f"公開ディレクトリ: {root.resolve()}" + (f"（優先: {site.dist}）" if site.dist else ""), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
 /* Service Worker: 解説データのキャッシュとオフライン対応
  * デプロイ時は `npm run deploy` を使うと CACHE_NAME のバージョンが自動で1つ上がる。
+ * 解説・教材データは版に依存しない DATA_CACHE に保存し、data/asset-manifest.json
+ * （generate_asset_manifest.py で生成）と前回のマニフェストを比較して、
+ * 内容が変わったファイルだけを削除・再取得する。
+ * viewer.js から先読みを頼まれた解説（data/prefetch-map.json で求めた次の解説）も同じキャッシュに入れる。
+ * 教材をまとめて保存する依頼では、build_bundles.py のバンドル（教材ごとの解説を1ファイルにしたもの）を
+ * 1回で取得し、解説ごとに切り出して同じキャッシュに入れる。
  */
 const CACHE_NAME = "rikeich-explanations-v11";
+const DATA_CACHE = "rikeich-data";
+const ASSET_MANIFEST_URL = "data/asset-manifest.json";
+// 前回同期したマニフェストを DATA_CACHE 内に保存するためのキー
+const ASSET_MANIFEST_KEY = "__asset-manifest__";
+// ページ表示ごとの同期チェックの最短間隔
+const SYNC_INTERVAL_MS = 60 * 1000;
+// 1回の依頼で先読みする解説の上限
+const PREFETCH_LIMIT = 4;
+const BUNDLE_INDEX_URL = "data/bundles/index.json";
+
+let syncing = null;
+let lastSyncAt = 0;
+// 同期で削除したファイルの再取得。データの応答はこれを待たない（削除が終われば syncing は解決する）
+let refetching = Promise.resolve();
 
 self.addEventListener("install", (event) => {
   self.skipWaiting();
@@ -9,33 +29,234 @@ self.addEventListener("install", (event) => {
 
 self.addEventListener("activate", (event) => {
   event.waitUntil(
-    caches.keys().then((keys) =>
-      Promise.all(
-        keys.filter((k) => k !== CACHE_NAME).map((k) => caches.delete(k))
+    caches.keys()
+      .then((keys) =>
+        Promise.all(
+          keys
+            .filter((k) => k !== CACHE_NAME && k !== DATA_CACHE)
+            .map((k) => caches.delete(k))
+        )
       )
-    )
+      .then(() => syncAssetManifest())
   );
   self.clients.claim();
 });
 
+/** サイトのルートからの相対パス（asset-manifest.json のキー形式）を返す */
+function toAssetPath(url) {
+  const scopePath = new URL(self.registration.scope).pathname;
+  const pathname = decodeURI(new URL(url).pathname);
+  return pathname.startsWith(scopePath) ? pathname.substring(scopePath.length) : pathname.replace(/^\//, "");
+}
+
+/**
+ * 最新のアセットマニフェストを取得し、前回から内容が変わったキャッシュだけを削除する。
+ * 返す Promise は削除とマニフェストの保存が終わった時点で解決し、削除したファイルの再取得は
+ * refetching で裏で進める（初回の同期で全件を入れ替えるときも、解説の表示を待たせない）。
+ * オフラインなどで取得できない場合は何もしない（キャッシュをそのまま使う）。
+ */
+function syncAssetManifest() {
+  if (syncing) return syncing;
+  lastSyncAt = Date.now();
+  syncing = fetch(ASSET_MANIFEST_URL, { cache: "no-store" })
+    .then((res) => {
+      if (!res || !res.ok) return;
+      return res.json().then((manifest) => applyAssetManifest(manifest));
+    })
+    .catch(() => {})
+    .finally(() => {
+      syncing = null;
+    });
+  return syncing;
+}
+
+function applyAssetManifest(manifest) {
+  const assets = (manifest && manifest.assets) || {};
+  return caches.open(DATA_CACHE).then((cache) =>
+    cache.match(ASSET_MANIFEST_KEY)
+      .then((res) => (res ? res.json() : null))
+      .catch(() => null)
+      .then((previous) => {
+        if (previous && previous.hash === manifest.hash) return;
+        const oldAssets = (previous && previous.assets) || {};
+        const changed = [];
+        return cache.keys().then((requests) =>
+          Promise.all(
+            requests.map((request) => {
+              if (request.url.endsWith(ASSET_MANIFEST_KEY)) return null;
+              const path = toAssetPath(request.url);
+              const next = assets[path];
+              const prev = oldAssets[path];
+              // 前回のマニフェストに載っていて内容が同じものだけ残す
+              if (next && prev && prev[0] === next[0]) return null;
+              if (next) changed.push(request);
+              return cache.delete(request);
+            })
+          )
+        ).then(() =>
+          cache.put(
+            ASSET_MANIFEST_KEY,
+            new Response(JSON.stringify(manifest), { headers: { "Content-Type": "application/json" } })
+          )
+        ).then(() => {
+          refetching = refetching.then(() => refetchAssets(cache, changed));
+        });
+      })
+  );
+}
+
+/**
+ * 内容が変わって削除したファイルを1つずつ取り直す（失敗しても次回アクセス時に取得される）。
+ * その間に表示のために取得済みのものは飛ばす。ブラウザの HTTP キャッシュに残った古い版を
+ * 受け取らないよう、サーバーに確認させる
+ */
+function refetchAssets(cache, requests) {
+  return requests.reduce(
+    (chain, request) =>
+      chain.then(() =>
+        cache.match(request).then((cached) => {
+          if (cached) return null;
+          return fetch(request.url, { cache: "no-cache" }).then((response) => {
+            if (response && response.status === 200 && response.type === "basic") {
+              return cache.put(request, response);
+            }
+          });
+        }).catch(() => {})
+      ),
+    Promise.resolve()
+  );
+}
+
+// viewer.js から届く先読みの依頼（build_prefetch_map.py の先読みマップで求めた次の解説）
+self.addEventListener("message", (event) => {
+  const data = event.data || {};
+  if (data.type === "prefetch" && Array.isArray(data.paths)) {
+    event.waitUntil(prefetchExplanations(data.paths.slice(0, PREFETCH_LIMIT)));
+    return;
+  }
+  // 教材をまとめて保存する依頼（bundle は data/bundles/index.json のバンドル名。例: "lead_light", "exam_national/chiba"）
+  if (data.type === "precache-bundle" && typeof data.bundle === "string") {
+    const source = event.source;
+    event.waitUntil(
+      precacheBundle(data.bundle).then((result) => {
+        if (source) source.postMessage({ type: "precache-bundle", bundle: data.bundle, ...result });
+      })
+    );
+  }
+});
+
+/** キャッシュにない解説だけを取得して DATA_CACHE に入れておく（失敗しても無視する） */
+function prefetchExplanations(paths) {
+  return Promise.resolve(syncing).then(() =>
+    caches.open(DATA_CACHE).then((cache) =>
+      Promise.all(
+        paths
+          .filter((path) => typeof path === "string" && path.startsWith("data/explanations/"))
+          .map((path) => {
+            const url = new URL(path, self.registration.scope).href;
+            return cache.match(url).then((cached) => {
+              if (cached) return null;
+              return fetch(url).then((response) => {
+                if (response && response.status === 200 && response.type === "basic") {
+                  return cache.put(url, response);
+                }
+              });
+            }).catch(() => {});
+          })
+      )
+    )
+  );
+}
+
+function sha256Prefix(buffer) {
+  return crypto.subtle.digest("SHA-256", buffer).then((digest) =>
+    Array.from(new Uint8Array(digest).slice(0, 8), (b) => b.toString(16).padStart(2, "0")).join("")
+  );
+}
+
+/** バンドルの1解説分（単独の gzip）を展開する */
+function inflateMember(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return new Response(stream).arrayBuffer();
+}
+
+/**
+ * バンドルを1回で取得し、キャッシュにない解説を切り出して DATA_CACHE に入れる。
+ * 展開した内容は索引のハッシュ（asset-manifest.json と同じ）と照合し、一致したものだけ保存する。
+ * 結果は { cached: 保存した数, skipped: すでにあった数, failed: 失敗した数 }（バンドルを取得できなければ ok: false）。
+ */
+function precacheBundle(name) {
+  if (typeof DecompressionStream === "undefined") return Promise.resolve({ ok: false });
+  return Promise.resolve(syncing)
+    .then(() => fetch(BUNDLE_INDEX_URL, { cache: "no-cache" }))
+    .then((res) => (res && res.ok ? res.json() : null))
+    .then((index) => {
+      const bundle = index && index.bundles && index.bundles[name];
+      if (!bundle) return { ok: false };
+      // バンドルの URL に内容のハッシュを付け、索引と食い違う古いバンドルを CDN から受け取らないようにする
+      const bundleUrl = new URL(bundle.file + "?v=" + bundle.hash, self.registration.scope).href;
+      return Promise.all([fetch(bundleUrl), caches.open(DATA_CACHE)]).then(([res, cache]) => {
+        if (!res || !res.ok) return { ok: false };
+        return res.arrayBuffer().then((buffer) => {
+          const result = { ok: true, cached: 0, skipped: 0, failed: 0 };
+          return Promise.all(
+            Object.entries(bundle.entries || {}).map(([path, [offset, length, hash]]) => {
+              const url = new URL(path, self.registration.scope).href;
+              return cache.match(url).then((cached) => {
+                if (cached) {
+                  result.skipped++;
+                  return null;
+                }
+                return inflateMember(new Uint8Array(buffer, offset, length))
+                  .then((body) =>
+                    sha256Prefix(body).then((digest) => {
+                      if (digest !== hash) throw new Error("hash mismatch: " + path);
+                      result.cached++;
+                      return cache.put(url, new Response(body, {
+                        headers: { "Content-Type": "text/html; charset=utf-8", "Content-Length": String(body.byteLength) },
+                      }));
+                    })
+                  );
+              }).catch(() => {
+                result.failed++;
+              });
+            })
+          ).then(() => result);
+        });
+      });
+    })
+    .catch(() => ({ ok: false }));
+}
+
 self.addEventListener("fetch", (event) => {
   const url = event.request.url;
-  if (!url.includes("/data/explanations/") && !url.includes("/data/materials/")) {
+
+  // ページを開くたびに（一定間隔で）マニフェストを確認する
+  if (event.request.mode === "navigate" && Date.now() - lastSyncAt > SYNC_INTERVAL_MS) {
+    // 再取得が終わるまで Service Worker を止めない（ページの表示は待たせない）
+    event.waitUntil(syncAssetManifest().then(() => refetching));
+    return;
+  }
+
+  if (!url.includes("/data/explanations/") && !url.includes("/data/materials/") && !url.includes("/data/speech/")) {
     return;
   }
   if (event.request.method !== "GET") return;
 
   event.respondWith(
-    caches.open(CACHE_NAME).then((cache) =>
-      cache.match(event.request).then((cached) => {
-        if (cached) return cached;
-        return fetch(event.request).then((response) => {
-          if (response && response.status === 200 && response.type === "basic") {
-            cache.put(event.request, response.clone());
-          }
-          return response;
-        });
-      })
+    // 同期中は古いキャッシュの削除が終わってから応答する（古い解説を返さないため。再取得は待たない）
+    Promise.resolve(syncing).then(() =>
+      caches.open(DATA_CACHE).then((cache) =>
+        cache.match(event.request).then((cached) => {
+          if (cached) return cached;
+          return fetch(event.request).then((response) => {
+            if (response && response.status === 200 && response.type === "basic") {
+              cache.put(event.request, response.clone());
+            }
+            return response;
+          });
+        })
+      )
     )
   );
 });
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解説の編集を監視して、派生データを変更分だけ作り直すスクリプト（ウォッチモード）
+data/explanations 以下の解説HTMLと data/materials の教材JSONを監視し、保存されたファイルごとに次だけを行う。
+
+  1. 完全なHTML文書として保存された解説があれば警告する（ソースは書き換えない。直すのは fix_html_fragments.py）
+  2. 物理基礎教科書の解説なら、その分野に問題を追加する（generate_textbook_basic_json.py と同じ処理）
+  3. その解説の読み上げテキストを作り直す（build_speech_text.py と同じ出力）
+  4. 逆引きインデックス・先読みマップ・アセットマニフェストを、変わった教材・ファイルの分だけ計算し直す
+  5. 参照されている解説が消えた・どの教材からも参照されていない解説が増えた・教材の explanationPath の
+     ファイルがない場合は警告する（scripts/check-explanation-paths.js の確認を変更分だけ行う）
+
+- Linux では inotify（ctypes で libc を直接呼ぶ）で監視し、使えない環境や --poll では
+  --interval 秒ごとにファイルの mtime とサイズを比べる
+- イベントは最後のイベントから --debounce-ms の間まとめてから処理する
+  （エディタの「一時ファイルに書いて置き換える」保存や、複数ファイルの一括保存を1回にまとめる）
+- 教材JSON・アセットの一覧は起動時に1回だけ読み込み、以降は変わったものだけ読み直す。
+  自分で書き込んだファイルのイベントは無視する
+- 1回の処理ごとに、待ち時間と段階ごとの時間（build_profile.Profiler）を表示する
+
+使い方:
+  python3 watch_explanations.py                  # 監視を始める（Ctrl+C で終了）
+  python3 watch_explanations.py --poll           # inotify を使わずに定期的に確認
+  python3 watch_explanations.py --once a.html    # 指定したファイルを保存された扱いで1回だけ処理して終了
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import build_prefetch_map
+import generate_asset_manifest
+import generate_explanation_index
+import generate_textbook_basic_json
+from build_profile import Profiler
+from build_speech_text import SIDECAR_VERSION, build_sidecar, load_sidecar, sidecar_path
+from fix_html_fragments import is_full_document
+from material_store import MaterialStore, write_text_if_changed
+from publish_assets import Publisher
+
+EXPLANATIONS_ROOT = Path("data/explanations")
+MATERIALS_ROOT = Path("data/materials")
+WATCH_ROOTS = [EXPLANATIONS_ROOT, MATERIALS_ROOT]
+DEFAULT_DEBOUNCE_MS = 50
+DEFAULT_INTERVAL = 0.5
+
+# inotify(7) の定数
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+# ファイルの (mtime_ns, size)。存在しなければ None
+Stamp = Optional[Tuple[int, int]]
+
+
+def stamp_of(path: Path) -> Stamp:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def is_relevant(path: Path) -> bool:
+    """監視対象のファイルか（エディタの一時ファイル・隠しファイルは除く）"""
+    if path.name.startswith(".") or path.name.endswith("~"):
+        return False
+    parts = path.parts
+    if path.suffix == ".html":
+        return parts[:2] == EXPLANATIONS_ROOT.parts
+    return path.suffix == ".json" and parts[:2] == MATERIALS_ROOT.parts
+
+
+class InotifyWatcher:
+    """inotify でディレクトリ以下を監視する（作られたディレクトリも監視に加える）"""
+
+    def __init__(self, roots: List[Path]):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify が使えません")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 に失敗しました")
+        self.roots = roots
+        self.directories: Dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add_tree(self, root: Path) -> List[Path]:
+        """root 以下のディレクトリを監視に加え、中にあるファイルを返す（監視を始める前に作られた分）"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                print(f"Warning: {dirpath} を監視できません（errno {ctypes.get_errno()}）", file=sys.stderr)
+                continue
+            self.directories[wd] = Path(dirpath)
+            files.extend(Path(dirpath) / name for name in filenames)
+        return files
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        """イベントを待ち、変わったファイルを返す（timeout 秒で何もなければ空）"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT.unpack_from(buffer, offset)
+                name = buffer[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # イベントがあふれた場合は全ファイルを変更扱いにする
+                    for root in self.roots:
+                        changed.update(p for p in root.rglob("*") if p.is_file())
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        changed.update(self._add_tree(path))
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """一定間隔でファイルの mtime とサイズを比べる（inotify が使えない環境用）"""
+
+    def __init__(self, roots: List[Path], interval: float):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    stamp = stamp_of(path)
+                    if stamp is not None:
+                        snapshot[path] = stamp
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        current = self._scan()
+        changed = {p for p, stamp in current.items() if self.snapshot.get(p) != stamp}
+        changed.update(p for p in self.snapshot if p not in current)
+        self.snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class MaterialCache:
+    """教材JSONを (mtime, サイズ) が変わったときだけ読み直すキャッシュ（build_index / build_map の reader）"""
+
+    def __init__(self):
+        # パス -> (stamp, 生バイト列, パース結果, 参照している解説パス)
+        self.entries: Dict[Path, Tuple[Stamp, bytes, Dict, Set[str]]] = {}
+
+    def read(self, path: Path) -> Tuple[bytes, Dict]:
+        entry = self._entry(path)
+        return entry[1], entry[2]
+
+    def referenced(self, path: Path) -> Set[str]:
+        return self._entry(path)[3]
+
+    def _entry(self, path: Path) -> Tuple[Stamp, bytes, Dict, Set[str]]:
+        path = Path(path)
+        stamp = stamp_of(path)
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != stamp:
+            raw, data = generate_explanation_index.read_material(path)
+            paths = {problem["explanationPath"]
+                     for subject in data.get("subjects", []) for field in subject.get("fields", [])
+                     for problem in field.get("problems", []) if problem.get("explanationPath")}
+            entry = self.entries[path] = (stamp, raw, data, paths)
+        return entry
+
+
+class Rebuilder:
+    """変わったファイルの一覧を受け取り、派生データを作り直す"""
+
+    def __init__(self):
+        self.manifest = generate_explanation_index.load_manifest()
+        self.material_paths = {Path(entry["path"]): entry.get("id", "") for entry in self.manifest if entry.get("path")}
+        self.materials = MaterialCache()
+        self.links_cache: Dict[str, Tuple[str, Dict[str, List[str]]]] = {}
+        self.store: Optional[MaterialStore] = None
+        self.store_stamp: Stamp = None
+        # アセットマニフェストの一覧（起動時に1回だけ全ファイルのハッシュを取る。ハッシュは配信する中身のもの）
+        self.publisher = Publisher()
+        self.assets = generate_asset_manifest.collect_assets(publisher=self.publisher)
+        # 自分で処理・書き込みした時点のファイルの stamp（同じならイベントを無視する）
+        self.handled: Dict[Path, Stamp] = {}
+
+    def pending(self, paths: Iterable[Path]) -> List[Path]:
+        """処理が必要なファイル（監視対象で、前回の処理・自分の書き込みから変わっているもの）"""
+        result = []
+        for path in paths:
+            path = Path(os.path.relpath(path))
+            if is_relevant(path) and path not in result and self.handled.get(path, False) != stamp_of(path):
+                result.append(path)
+        return sorted(result)
+
+    def _material_data(self) -> Dict:
+        """textbook_basic.json（外で書き換えられていれば読み直す）"""
+        json_path = generate_textbook_basic_json.JSON_PATH
+        if self.store is None or stamp_of(json_path) != self.store_stamp:
+            self.store = MaterialStore()
+            self.store_stamp = stamp_of(json_path)
+        return self.store.load(json_path, default=generate_textbook_basic_json.DEFAULT_MATERIAL)
+
+    def _written(self, path: Path) -> None:
+        self.handled[path] = stamp_of(path)
+
+    def handle(self, paths: List[Path]) -> Tuple[Profiler, List[str]]:
+        """paths の変更を反映し、(段階ごとの時間, 表示する行) を返す"""
+        profiler = Profiler()
+        stage = profiler.stage
+        log: List[str] = []
+        explanations = [p for p in paths if p.suffix == ".html"]
+        materials_changed = {p for p in paths if p in self.material_paths}
+        textbook_base = generate_textbook_basic_json.EXPLANATIONS_BASE
+        # 存在するかどうかが変わった解説（先読みマップ・参照の確認に影響する）
+        appeared: List[str] = []
+        disappeared: List[str] = []
+        material_edited = False
+
+        for path in explanations:
+            key = path.as_posix()
+            existed = key in self.assets
+            if path.is_file():
+                with stage("fragment"):
+                    # 保存中のファイルを書き換えるとエディタと競合するため、変換はせず知らせるだけにする
+                    if is_full_document(path):
+                        log.append(f"警告: {key} が完全なHTML文書です（python3 fix_html_fragments.py {key} で断片に直せます）")
+                if path.parent.parent.parent == textbook_base:
+                    with stage("material_entry"):
+                        if generate_textbook_basic_json.add_problem_file(self._material_data(), path):
+                            material_edited = True
+                            log.append(f"問題を追加: {key}")
+                with stage("speech"):
+                    raw = path.read_bytes()
+                    source_hash = hashlib.sha256(raw).hexdigest()[:16]
+                    out_path = sidecar_path(path)
+                    existing = load_sidecar(out_path)
+                    if existing is None or existing.get("version") != SIDECAR_VERSION or existing.get("source") != source_hash:
+                        sidecar = build_sidecar(raw.decode('utf-8'), source_hash)
+                        out_path.parent.mkdir(parents=True, exist_ok=True)
+                        out_path.write_text(json.dumps(sidecar, ensure_ascii=False, separators=(",", ":")) + "\n", encoding='utf-8')
+                    self._update_asset(out_path)
+                if not existed:
+                    appeared.append(key)
+            else:
+                with stage("speech"):
+                    out_path = sidecar_path(path)
+                    if out_path.exists():
+                        out_path.unlink()
+                    self._update_asset(out_path)
+                if existed:
+                    disappeared.append(key)
+            self._update_asset(path)
+            self._written(path)
+
+        if material_edited:
+            with stage("save_material"):
+                json_path = generate_textbook_basic_json.JSON_PATH
+                diff = self.store.save(json_path)
+                self.store_stamp = stamp_of(json_path)
+                self._written(json_path)
+                if diff:
+                    materials_changed.add(json_path)
+                    log.append(f"更新: {json_path}（{diff.summary()}）")
+        for path in materials_changed:
+            self._update_asset(path)
+            self._written(path)
+
+        if explanations or materials_changed:
+            with stage("derived_indexes"):
+                log.extend(self._rebuild_indexes(appeared + disappeared))
+        with stage("check_paths"):
+            log.extend(self._check_paths(appeared, disappeared, materials_changed))
+        return profiler, log
+
+    def _update_asset(self, path: Path) -> None:
+        """アセットマニフェストの1ファイル分を更新する（collect_assets と同じ並び順を保つ）"""
+        key = path.as_posix()
+        if not any(root in path.parents for root in generate_asset_manifest.ASSET_ROOTS):
+            return
+        if path.is_file():
+            data = self.publisher.render(path)
+            entry = [generate_asset_manifest.hash_bytes(data), len(data)]
+            if key in self.assets:
+                self.assets[key] = entry
+                return
+            self.assets[key] = entry
+        elif self.assets.pop(key, None) is None:
+            return
+        # 追加・削除したときだけ並べ直す
+        order = {root: i for i, root in enumerate(generate_asset_manifest.ASSET_ROOTS)}
+
+        def position(item):
+            asset = Path(item[0])
+            return next(order[root] for root in order if root in asset.parents), asset
+
+        self.assets = dict(sorted(self.assets.items(), key=position))
+
+    def _rebuild_indexes(self, existence_changed: List[str]) -> List[str]:
+        log = []
+        # 解説が追加・削除された教材は、先読み先が変わるので計算し直す
+        for material_path in self.material_paths:
+            if material_path.exists() and self.materials.referenced(material_path) & set(existence_changed):
+                self.links_cache.pop(material_path.as_posix(), None)
+
+        index = generate_explanation_index.build_index(self.manifest, reader=self.materials.read)
+        if write_text_if_changed(generate_explanation_index.INDEX_PATH, generate_explanation_index.serialize_index(index)):
+            log.append(f"更新: {generate_explanation_index.INDEX_PATH}")
+        prefetch = build_prefetch_map.build_map(self.manifest, reader=self.materials.read, links_cache=self.links_cache)
+        if write_text_if_changed(build_prefetch_map.PREFETCH_MAP_PATH, build_prefetch_map.serialize_map(prefetch)):
+            log.append(f"更新: {build_prefetch_map.PREFETCH_MAP_PATH}")
+        manifest = generate_asset_manifest.build_manifest(self.assets)
+        if write_text_if_changed(generate_asset_manifest.MANIFEST_PATH, generate_asset_manifest.serialize_manifest(manifest)):
+            log.append(f"更新: {generate_asset_manifest.MANIFEST_PATH}")
+        return log
+
+    def _referenced_by(self, key: str) -> List[str]:
+        return [material_id for path, material_id in self.material_paths.items()
+                if path.exists() and key in self.materials.referenced(path)]
+
+    def _check_paths(self, appeared: List[str], disappeared: List[str], materials_changed: Set[Path]) -> List[str]:
+        log = []
+        for key in disappeared:
+            users = self._referenced_by(key)
+            if users:
+                log.append(f"警告: {key} が削除されましたが、{', '.join(users)} から参照されています")
+        for key in appeared:
+            if not self._referenced_by(key):
+                log.append(f"注意: {key} はどの教材からも参照されていません")
+        for path in sorted(materials_changed):
+            missing = sorted(p for p in self.materials.referenced(path) if not Path(p).is_file())
+            for key in missing:
+                log.append(f"警告: {self.material_paths[path]} の解説ファイルが見つかりません: {key}")
+        return log
+
+
+def report(paths: List[Path], profiler: Profiler, log: List[str], elapsed: float, waited: float) -> None:
+    stages = " / ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds, _, _ in profiler.by_stage())
+    names = ", ".join(p.as_posix() for p in paths[:3]) + (f" ほか{len(paths) - 3}件" if len(paths) > 3 else "")
+    print(f"[{datetime.now():%H:%M:%S}] {names}: 処理 {elapsed * 1000:.1f}ms（待ち {waited * 1000:.0f}ms）  {stages}")
+    for line in log:
+        print(f"  {line}")
+    sys.stdout.flush()
+
+
+def make_watcher(poll: bool, interval: float):
+    if not poll:
+        try:
+            return InotifyWatcher(WATCH_ROOTS)
+        except (OSError, AttributeError) as e:
+            print(f"inotify を使えないため、{interval}秒ごとに確認します（{e}）", file=sys.stderr)
+    return PollingWatcher(WATCH_ROOTS, interval)
+
+
+def watch(rebuilder: Rebuilder, watcher, debounce: float) -> None:
+    pending: Set[Path] = set()
+    first_event = 0.0
+    while True:
+        events = watcher.read(debounce if pending else None)
+        if events:
+            if not pending:
+                first_event = time.perf_counter()
+            pending |= events
+            continue
+        paths = rebuilder.pending(pending)
+        pending = set()
+        if paths:
+            started = time.perf_counter()
+            profiler, log = rebuilder.handle(paths)
+            report(paths, profiler, log, time.perf_counter() - started, started - first_event)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解説の編集を監視して派生データを変更分だけ作り直す")
+    parser.add_argument("--poll", action="store_true", help="inotify を使わずに定期的に確認する")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="--poll の確認間隔（秒）")
+    parser.add_argument("--debounce-ms", type=float, default=DEFAULT_DEBOUNCE_MS,
+                        help="最後のイベントからこの時間待ってからまとめて処理する（ミリ秒）")
+    parser.add_argument("--once", nargs="+", type=Path, metavar="PATH", help="指定したファイルを1回だけ処理して終了")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rebuilder = Rebuilder()
+    print(f"準備完了（{(time.perf_counter() - started) * 1000:.0f}ms, アセット {len(rebuilder.assets)} ファイル）")
+
+    if args.once:
+        paths = rebuilder.pending(args.once)
+        started = time.perf_counter()
+        profiler, log = rebuilder.handle(paths)
+        report(paths, profiler, log, time.perf_counter() - started, 0.0)
+        return
+
+    watcher = make_watcher(args.poll, args.interval)
+    print(f"監視中: {', '.join(str(root) for root in WATCH_ROOTS)}（{type(watcher).__name__}、Ctrl+C で終了）")
+    sys.stdout.flush()
+    try:
+        watch(rebuilder, watcher, args.debounce_ms / 1000)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()